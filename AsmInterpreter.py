@@ -0,0 +1,213 @@
+from BrainfuckIO import InputBuffer, OutputBuffer, EOF_ERROR, EOF_POLICIES, eof_value
+from CommandType import CommandType
+
+
+class AsmInterpreter:
+    """
+    Runs the commands of parse_code directly, as a reference for the compiled brainfuck.
+    Numbers wrap at cell_range ** num_size, and the heap and the stack are addressed modulo it, as in the VMCs.
+    Comparisons of two immediates compare them as written, booleans and I/O work on the last byte of a number,
+    and jumps count basic blocks like the brainfuck dispatch loop, so a ret to any pushed value lands where
+    the compiled code would. user_input, output_stream and eof_policy work as in BrainfuckInterpreter
+    """
+
+    def __init__(self, controller, commands, label_to_basic_block, user_input="Hello World!", output_stream=None,
+                 eof_policy=EOF_ERROR):
+        if eof_policy not in EOF_POLICIES:
+            raise ValueError(f"Unknown eof policy {eof_policy}")
+        self.controller = controller
+        self.commands = commands
+        self.label_to_basic_block = label_to_basic_block
+        self.cell_range = controller.cell_range
+        self.num_range = controller.cell_range ** controller.num_size
+        self.exit_basic_block = label_to_basic_block['exit']
+        self.block_starts = {}
+        for command_idx, command in enumerate(commands):
+            self.block_starts.setdefault(command.basic_block_idx, command_idx)
+        self.decoded = [self.decode(command) for command in commands]
+        self.registers = [0] * len(controller.offset_reg)
+        self.heap = {}
+        self.stack = {}
+        self.stack_pointer = 0
+        self.command_idx = 0
+        self.commands_executed = 0
+        self.user_input = user_input
+        self.input = InputBuffer(user_input)
+        self.output = OutputBuffer(output_stream)
+        self.eof_policy = eof_policy
+
+    @classmethod
+    def from_source(cls, source, user_input="Hello World!", **options):
+        from compiler import parse_code
+        return cls(*parse_code(source), user_input, **options)
+
+    def decode(self, command):
+        """
+        Return the command type, the basic block, the (is_register, value, text_value) operands,
+        and the basic block diff of jumps
+        """
+        kinds = command.command_type.operand_kinds()
+        if len(command.operands) != len(kinds) or any(
+                operand.is_label() != (kind == 'l') or (kind == 'r' and not operand.is_register())
+                for operand, kind in zip(command.operands, kinds)):
+            raise Exception(f"Invalid operands for {command.command_type.name} in line {command.line_number}")
+        operands = []
+        for operand in command.operands:
+            if operand.is_register():
+                operands.append((True, self.controller.offset_reg.index(operand.value), None))
+            elif operand.is_immediate():
+                operands.append((False, operand.value % self.num_range, operand.value))
+            else:
+                operands.append((False, None, operand.value))
+        diff = None
+        if command.command_type in (CommandType.jmp, CommandType.jnz, CommandType.call):
+            diff = command.calculate_basic_block_diff(self.label_to_basic_block, operands[-1][2])
+        return command.command_type, command.basic_block_idx, operands, diff
+
+    @property
+    def code_output(self):
+        return self.output.getvalue()
+
+    @property
+    def execution_completed(self):
+        return self.command_idx is None
+
+    @property
+    def basic_block_idx(self):
+        """
+        The basic block of the next command, or the exit basic block once execution is completed
+        """
+        if self.command_idx is None:
+            return self.exit_basic_block
+        return self.commands[self.command_idx].basic_block_idx
+
+    def signed(self, value, as_signed_num):
+        if as_signed_num and value >= self.num_range / 2:
+            return value - self.num_range
+        return value
+
+    def get_register(self, register_idx, as_signed_num=False):
+        return self.signed(self.registers[register_idx], as_signed_num)
+
+    def get_memory(self, address, as_signed_num=False):
+        return self.signed(self.heap.get(address % self.num_range, 0), as_signed_num)
+
+    def get_stack(self, as_signed_num=False):
+        """
+        The values below the stack pointer, from the bottom of the stack
+        """
+        return [self.signed(self.stack.get(address, 0), as_signed_num) for address in range(self.stack_pointer)]
+
+    def flush(self):
+        self.output.flush()
+
+    def read_value(self, current_value):
+        """
+        Return the next input value, or the value the eof policy gives at the end of the input
+        """
+        if self.input.is_empty():
+            self.flush()
+        value = self.input.read_byte()
+        if value is not None:
+            return value % self.cell_range
+        return eof_value(self.eof_policy, self.cell_range, current_value)
+
+    def jump(self, basic_block_idx, diff):
+        """
+        Return the index of the command diff basic blocks after basic_block_idx, or None when that is the exit.
+        Like the dispatch loop, the blocks are counted around a cycle of the basic blocks and the exit,
+        and diff is first stored as a number, where 0 stands for cell_range ** num_size
+        """
+        diff %= self.num_range
+        if diff == 0:
+            diff = self.num_range
+        target = (basic_block_idx + diff) % (self.exit_basic_block + 1)
+        if target == self.exit_basic_block:
+            return None
+        return self.block_starts[target]
+
+    def exec_commands(self, max_amount=1):
+        """
+        Execute at most max_amount commands. Return the amount of commands executed
+        """
+        registers = self.registers
+        heap = self.heap
+        stack = self.stack
+        decoded = self.decoded
+        num_range = self.num_range
+        cell_range = self.cell_range
+        command_idx = self.command_idx
+        executed = 0
+        try:
+            while executed < max_amount and command_idx is not None:
+                command_type, basic_block_idx, operands, diff = decoded[command_idx]
+                values = [registers[value] if is_register else value for is_register, value, text in operands]
+                next_idx = command_idx + 1
+                if command_type is CommandType.mov:
+                    registers[operands[0][1]] = values[1]
+                elif command_type is CommandType.add:
+                    registers[operands[0][1]] = (values[1] + values[2]) % num_range
+                elif command_type is CommandType.sub:
+                    registers[operands[0][1]] = (values[1] - values[2]) % num_range
+                elif command_type is CommandType.less or command_type is CommandType.eq:
+                    if not operands[1][0] and not operands[2][0]:
+                        values = [text for is_register, value, text in operands]
+                    if command_type is CommandType.less:
+                        registers[operands[0][1]] = int(values[1] < values[2])
+                    else:
+                        registers[operands[0][1]] = int(values[1] == values[2])
+                elif command_type is CommandType.jnz:
+                    next_idx = self.jump(basic_block_idx, diff if values[0] else 1)
+                elif command_type is CommandType.jmp:
+                    next_idx = self.jump(basic_block_idx, diff)
+                elif command_type is CommandType.label:
+                    next_idx = self.jump(basic_block_idx, 1)
+                elif command_type is CommandType.load:
+                    registers[operands[0][1]] = heap.get(values[1], 0)
+                elif command_type is CommandType.store:
+                    heap[values[0]] = values[1]
+                elif command_type is CommandType.push:
+                    stack[self.stack_pointer] = values[0]
+                    self.stack_pointer = (self.stack_pointer + 1) % num_range
+                elif command_type is CommandType.pop:
+                    self.stack_pointer = (self.stack_pointer - 1) % num_range
+                    registers[operands[0][1]] = stack.get(self.stack_pointer, 0)
+                elif command_type is CommandType.call:
+                    stack[self.stack_pointer] = (basic_block_idx + 1) % num_range
+                    self.stack_pointer = (self.stack_pointer + 1) % num_range
+                    next_idx = self.jump(basic_block_idx, diff)
+                elif command_type is CommandType.ret:
+                    self.stack_pointer = (self.stack_pointer - 1) % num_range
+                    target = stack.get(self.stack_pointer, 0)
+                    diff = target - basic_block_idx
+                    if basic_block_idx % num_range >= target:
+                        diff += self.exit_basic_block + 1
+                    next_idx = self.jump(basic_block_idx, diff)
+                elif command_type is CommandType.neg:
+                    registers[operands[0][1]] = -values[0] % num_range
+                elif command_type is CommandType.binary_not:
+                    registers[operands[0][1]] = num_range - 1 - values[0]
+                elif command_type is CommandType.logic_not:
+                    last_byte = values[0] % cell_range
+                    registers[operands[0][1]] += (last_byte - 1) % cell_range - last_byte if last_byte else 1
+                elif command_type is CommandType.logic_and or command_type is CommandType.logic_or:
+                    if operands[1][1] == operands[2][1]:
+                        last_byte = values[0] % cell_range
+                        registers[operands[0][1]] += values[1] % cell_range - last_byte
+                    elif command_type is CommandType.logic_and:
+                        registers[operands[0][1]] = int(bool(values[1] % cell_range and values[2] % cell_range))
+                    else:
+                        registers[operands[0][1]] = int(bool(values[1] % cell_range or values[2] % cell_range))
+                elif command_type is CommandType.read:
+                    last_byte = values[0] % cell_range
+                    registers[operands[0][1]] += self.read_value(last_byte) - last_byte
+                elif command_type is CommandType.write:
+                    self.output.write(values[0] % cell_range)
+                command_idx = None if next_idx == len(decoded) else next_idx
+                executed += 1
+        finally:
+            self.command_idx = command_idx
+            self.commands_executed += executed
+        if command_idx is None:
+            self.flush()
+        return executed
@@ -0,0 +1,59 @@
+import asyncio
+from FoldedInterpreter import FoldedInterpreter
+
+
+class AsyncInterpreter(FoldedInterpreter):
+    """
+    Runs a program as an asyncio task. , waits for bytes from the asyncio.StreamReader reader,
+    and output is written to the asyncio.StreamWriter writer after every slice of execution, or kept in code_output
+    without a writer. Execution yields to the event loop every yield_steps commands,
+    so many programs can share one event loop.
+    """
+
+    def __init__(self, code, cell_range, reader, writer=None, yield_steps=100000, read_size=65536, **options):
+        super().__init__(code, cell_range, None, output_stream=writer, **options)
+        self.reader = reader
+        self.writer = writer
+        self.yield_steps = yield_steps
+        self.read_size = read_size
+        self.commands_executed = 0
+
+    def waiting_for_input(self):
+        """
+        Did execution stop at a , that waits for the reader?
+        """
+        return (self.instruction_pointer < len(self.code) and self.code[self.instruction_pointer] == ','
+                and self.input.is_pending())
+
+    async def drain(self):
+        """
+        Write the buffered output to the writer
+        """
+        self.flush()
+        if self.writer is not None:
+            await self.writer.drain()
+
+    async def run(self, max_amount=None):
+        """
+        Run until the program ends, or after about max_amount commands. Return the amount of commands executed
+        """
+        while max_amount is None or self.commands_executed < max_amount:
+            amount = self.yield_steps
+            if max_amount is not None:
+                amount = min(amount, max_amount - self.commands_executed)
+            executed = self.exec_commands(amount)[0]
+            self.commands_executed += executed
+            if self.waiting_for_input():
+                await self.drain()
+                data = await self.reader.read(self.read_size)
+                if data:
+                    self.input.feed(data)
+                else:
+                    self.input.close()
+            elif self.instruction_pointer >= len(self.code):
+                break
+            else:
+                await self.drain()
+                await asyncio.sleep(0)
+        await self.drain()
+        return self.commands_executed
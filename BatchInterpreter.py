@@ -0,0 +1,181 @@
+from BrainfuckIO import InputBuffer, OutputBuffer, EOF_ERROR, EOF_POLICIES, eof_value
+from BrainfuckProgram import BrainfuckProgram, OP_ADD, OP_MOVE, OP_OPEN, OP_CLOSE, OP_OUTPUT, OP_INPUT, OP_FLAG, \
+    OP_CLEAR, OP_TRANSFER
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NATIVE_DTYPES = {2 ** 8: 'uint8', 2 ** 16: 'uint16', 2 ** 32: 'uint32', 2 ** 64: 'uint64'}
+
+
+class BatchInterpreter:
+    """
+    Runs one brainfuck program over many inputs in lockstep, with the memory of all instances in a 2-D NumPy array
+    of instances x cells. Each instance has its own data pointer and operation index in data_pointers and op_indexes.
+    Every round runs the operation with the lowest index among the running instances, for all instances that are
+    at it, so instances that leave a loop at different times are masked out until the others catch up.
+    Steps are counted like BrainfuckInterpreter counts commands. Debug flags are skipped.
+    An instance that fails stops, and its exception is kept in errors.
+    """
+
+    def __init__(self, code, cell_range, user_inputs, eof_policy=EOF_ERROR, program=None):
+        if numpy is None:
+            raise ImportError("BatchInterpreter requires numpy")
+        if eof_policy not in EOF_POLICIES:
+            raise ValueError(f"Unknown eof policy {eof_policy}")
+        self.program = program if program is not None else BrainfuckProgram(code)
+        self.cell_range = cell_range
+        self.eof_policy = eof_policy
+        count = len(user_inputs)
+        if cell_range in NATIVE_DTYPES:
+            self.dtype = numpy.dtype(NATIVE_DTYPES[cell_range])
+            self.wraps = True
+        elif cell_range < 2 ** 32:
+            self.dtype = numpy.dtype('uint64')
+            self.wraps = False
+        else:
+            self.dtype = numpy.dtype(object)
+            self.wraps = False
+        self.memory = numpy.zeros((count, 1024), self.dtype)
+        self.data_pointers = numpy.zeros(count, numpy.int64)
+        self.op_indexes = numpy.zeros(count, numpy.int64)
+        self.steps = numpy.zeros(count, numpy.int64 if cell_range <= 2 ** 32 else object)
+        self.running = numpy.ones(count, bool)
+        self.inputs = [InputBuffer(user_input) for user_input in user_inputs]
+        self.outputs = [OutputBuffer() for _ in user_inputs]
+        self.errors = [None] * count
+        self.running[self.op_indexes >= len(self.program.ops)] = False
+
+    @property
+    def code_outputs(self):
+        return [output.getvalue() for output in self.outputs]
+
+    def constant(self, value):
+        """
+        Return value modulo cell_range as a scalar of the memory type
+        """
+        return self.dtype.type(value % self.cell_range) if self.dtype != object else value % self.cell_range
+
+    def wrap(self, values):
+        return values if self.wraps else values % self.cell_range
+
+    def fail(self, lanes, exception):
+        for lane in lanes:
+            self.errors[lane] = exception
+        self.running[lanes] = False
+
+    def grow_memory(self, max_data_pointer):
+        """
+        Add zeroed columns to the memory so max_data_pointer is inside it
+        """
+        width = self.memory.shape[1]
+        if max_data_pointer < width:
+            return
+        new_width = max(width * 2, max_data_pointer + 1)
+        memory = numpy.zeros((self.memory.shape[0], new_width), self.dtype)
+        memory[:, :width] = self.memory
+        self.memory = memory
+
+    def read_value(self, lane, current_value):
+        """
+        Return the next input value of lane, or the value the eof policy gives at the end of its input
+        """
+        value = self.inputs[lane].read_byte()
+        if value is not None:
+            return value % self.cell_range
+        return eof_value(self.eof_policy, self.cell_range, current_value)
+
+    def exec_loop(self, op_idx, lanes, data_pointers):
+        """
+        Run the recognized loop at op_idx in a single round where possible.
+        Lanes whose loop would move the data pointer below 0 enter it like any other loop
+        """
+        program = self.program
+        loop_cell_delta, transfers, body_cost, min_offset, max_offset = program.loops[op_idx]
+        values = self.memory[lanes, data_pointers]
+        if loop_cell_delta < 0:
+            iterations = values
+        elif self.wraps:
+            iterations = self.constant(0) - values
+        else:
+            iterations = (self.cell_range - values) % self.cell_range
+        entered = (iterations != 0) & (data_pointers + min_offset < 0)
+        skipped = (iterations != 0) & ~entered
+        self.steps[lanes] += 1
+        self.steps[lanes[skipped]] += iterations[skipped].astype(self.steps.dtype) * (body_cost + 1)
+        self.op_indexes[lanes] = numpy.where(entered, op_idx + 1, program.args[op_idx] + 1)
+        lanes, data_pointers, iterations = lanes[skipped], data_pointers[skipped], iterations[skipped]
+        if len(lanes) == 0:
+            return
+        self.grow_memory(int(data_pointers.max()) + max_offset)
+        for target, delta in transfers:
+            targets = data_pointers + target
+            added = self.wrap(iterations * self.constant(delta))
+            self.memory[lanes, targets] = self.wrap(self.memory[lanes, targets] + added)
+        self.memory[lanes, data_pointers] = 0
+
+    def exec_op(self, op_idx, lanes):
+        """
+        Execute the operation at op_idx for the instances in lanes
+        """
+        program = self.program
+        op = program.ops[op_idx]
+        arg = program.args[op_idx]
+        data_pointers = self.data_pointers[lanes]
+        if op == OP_ADD:
+            self.memory[lanes, data_pointers] = self.wrap(self.memory[lanes, data_pointers] + self.constant(arg))
+        elif op == OP_MOVE:
+            data_pointers += arg
+            self.data_pointers[lanes] = data_pointers
+            if arg > 0:
+                self.grow_memory(int(data_pointers.max()))
+            else:
+                self.fail(lanes[data_pointers < 0], Exception("Negative data pointer!"))
+        elif op == OP_OPEN:
+            taken = self.memory[lanes, data_pointers] != 0
+            self.op_indexes[lanes] = numpy.where(taken, op_idx + 1, arg + 1)
+            self.steps[lanes] += 1
+            return
+        elif op == OP_CLOSE:
+            taken = self.memory[lanes, data_pointers] != 0
+            self.op_indexes[lanes] = numpy.where(taken, arg + 1, op_idx + 1)
+            self.steps[lanes] += 1
+            return
+        elif op == OP_CLEAR or op == OP_TRANSFER:
+            self.exec_loop(op_idx, lanes, data_pointers)
+            return
+        elif op == OP_OUTPUT:
+            for lane, data_pointer in zip(lanes, data_pointers):
+                self.outputs[lane].write(int(self.memory[lane, data_pointer]))
+        elif op == OP_INPUT:
+            for lane, data_pointer in zip(lanes, data_pointers):
+                try:
+                    self.memory[lane, data_pointer] = self.read_value(lane, self.memory[lane, data_pointer])
+                except EOFError as e:
+                    self.fail([lane], e)
+        elif op != OP_FLAG:
+            self.fail(lanes, Exception(f"Unrecognized symbol {arg} in code"))
+        self.op_indexes[lanes] += 1
+        self.steps[lanes] += program.costs[op_idx]
+
+    def run(self, max_steps=None):
+        """
+        Run all instances until they finish or fail.
+        Instances that pass max_steps steps fail, checked after each operation
+        """
+        op_count = len(self.program.ops)
+        while True:
+            lanes = numpy.flatnonzero(self.running)
+            if len(lanes) == 0:
+                break
+            op_indexes = self.op_indexes[lanes]
+            op_idx = int(op_indexes.min())
+            lanes = lanes[op_indexes == op_idx]
+            self.exec_op(op_idx, lanes)
+            self.running[lanes[self.op_indexes[lanes] >= op_count]] = False
+            if max_steps is not None:
+                exceeded = lanes[self.running[lanes] & (self.steps[lanes] > max_steps)]
+                self.fail(exceeded, Exception("Step limit exceeded"))
+        return self.steps
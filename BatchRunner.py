@@ -0,0 +1,78 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import PurePath
+from BrainfuckIO import EOF_ERROR
+from BrainfuckProgram import BrainfuckProgram
+from FoldedInterpreter import FoldedInterpreter
+
+worker_program = None  # the program decoded by init_worker, shared by all runs of a worker process
+worker_options = {}
+
+
+class RunResult:
+    """
+    The outcome of running the program on one input. error is the exception that stopped the run, or None
+    """
+
+    def __init__(self, output, steps, error=None):
+        self.output = output
+        self.steps = steps
+        self.error = error
+
+
+def init_worker(code, cell_range, eof_policy, max_steps):
+    """
+    Decode the program once for the worker process
+    """
+    global worker_program, worker_options
+    worker_program = BrainfuckProgram(code)
+    worker_options = {'code': code, 'cell_range': cell_range, 'eof_policy': eof_policy, 'max_steps': max_steps}
+
+
+def run_input(user_input):
+    """
+    Run the worker's program on user_input, a string or the path of an input file
+    """
+    if isinstance(user_input, PurePath):
+        with open(user_input, 'rb') as f:
+            user_input = f.read()
+    interpreter = FoldedInterpreter(worker_options['code'], worker_options['cell_range'], user_input,
+                                    program=worker_program, eof_policy=worker_options['eof_policy'])
+    max_steps = worker_options['max_steps']
+    try:
+        steps = interpreter.exec_commands(max_steps)[0]
+        if steps == max_steps and interpreter.instruction_pointer < worker_program.code_length:
+            raise Exception("Step limit exceeded")
+    except Exception as e:
+        return RunResult(interpreter.code_output, None, e)
+    return RunResult(interpreter.code_output, steps)
+
+
+def run_batch(code, cell_range, user_inputs, max_steps=10 ** 12, eof_policy=EOF_ERROR, workers=None):
+    """
+    Run the compiled code on every input of user_inputs over a pool of worker processes (all cores by default).
+    Inputs are strings, or pathlib paths of input files. Returns a RunResult for each input, in input order
+    """
+    user_inputs = list(user_inputs)
+    workers = min(workers or os.cpu_count() or 1, max(len(user_inputs), 1))
+    chunk_size = max(1, len(user_inputs) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(code, cell_range, eof_policy, max_steps)) as executor:
+        return list(executor.map(run_input, user_inputs, chunksize=chunk_size))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print(f'Usage {sys.argv[0]} code_file cell_range input_file...')
+        sys.exit(1)
+    with open(sys.argv[1], 'r') as f_code:
+        batch_code = f_code.read()
+    input_files = [PurePath(path) for path in sys.argv[3:]]
+    for input_file, result in zip(input_files, run_batch(batch_code, int(sys.argv[2]), input_files)):
+        if result.error is not None:
+            print(f'{input_file}: failed: {result.error}')
+            continue
+        with open(f'{input_file}.out', 'w') as f_out:
+            f_out.write(result.output)
+        print(f'{input_file}: {result.steps} steps')
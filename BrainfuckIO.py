@@ -0,0 +1,199 @@
+import io
+
+EOF_ERROR = 'error'  # raise EOFError
+EOF_ZERO = 'zero'  # read 0
+EOF_MAX = 'max'  # read cell_range - 1, the brainfuck equivalent of -1
+EOF_UNCHANGED = 'unchanged'  # leave the cell as it is
+EOF_POLICIES = (EOF_ERROR, EOF_ZERO, EOF_MAX, EOF_UNCHANGED)
+
+
+def eof_value(eof_policy, cell_range, current_value):
+    """
+    Return the value a , reads at the end of the input under eof_policy, current_value being the value of its cell
+    """
+    if eof_policy == EOF_ZERO:
+        return 0
+    if eof_policy == EOF_MAX:
+        return cell_range - 1
+    if eof_policy == EOF_ERROR:
+        raise EOFError("Input exhausted")
+    return current_value
+
+
+class InputPending(Exception):
+    """
+    Raised when reading from a pushed input that is waiting for more data
+    """
+
+
+class InputBuffer:
+    """
+    The input of a brainfuck program.
+    source is a string, bytes, or a binary readable stream which is read buffer_size bytes at a time.
+    When source is None, data is pushed with feed until close is called
+    """
+
+    def __init__(self, source, buffer_size=65536):
+        self.stream = None
+        self.buffer_size = buffer_size
+        self.pushed = source is None
+        self.closed = not self.pushed
+        if source is None:
+            self.buffer = b''
+        elif isinstance(source, str):
+            try:
+                self.buffer = source.encode('latin-1')
+            except UnicodeEncodeError:
+                self.buffer = [ord(char) for char in source]
+        elif isinstance(source, (bytes, bytearray)):
+            self.buffer = bytes(source)
+        else:
+            self.stream = source
+            self.buffer = b''
+        self.position = 0
+        self.consumed = 0
+
+    def is_empty(self):
+        """
+        Is a read from the stream needed to get the next value?
+        """
+        return self.position == len(self.buffer)
+
+    def is_pending(self):
+        """
+        Is the next value of a pushed input yet to be fed?
+        """
+        return not self.closed and self.position == len(self.buffer)
+
+    def feed(self, data):
+        """
+        Add bytes to the end of a pushed input
+        """
+        if self.closed:
+            raise Exception("Can't feed a closed input")
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+
+    def close(self):
+        """
+        Mark the end of a pushed input
+        """
+        self.closed = True
+
+    def refill(self):
+        """
+        Read the next chunk of the stream. Return False at the end of the input
+        """
+        if self.stream is None:
+            return False
+        read = getattr(self.stream, 'read1', self.stream.read)
+        data = read(self.buffer_size)
+        if not data:
+            return False
+        self.buffer = data
+        self.position = 0
+        return True
+
+    def seek(self, consumed):
+        """
+        Go back or forward to the point where consumed values were read
+        """
+        if consumed == self.consumed:
+            return
+        if self.stream is not None or self.pushed:
+            raise Exception("Can't seek in a streamed input")
+        self.position = consumed
+        self.consumed = consumed
+
+    def fork(self):
+        """
+        Return an independent buffer that reads the rest of this input
+        """
+        if self.stream is not None or self.pushed:
+            raise Exception("A streamed input can't be shared")
+        forked = InputBuffer(b'', self.buffer_size)
+        forked.buffer = self.buffer
+        forked.position = self.position
+        forked.consumed = self.consumed
+        return forked
+
+    def read_byte(self):
+        """
+        Return the next input value, or None at the end of the input
+        """
+        if self.is_pending():
+            raise InputPending("Waiting for input")
+        if self.position == len(self.buffer) and not self.refill():
+            return None
+        value = self.buffer[self.position]
+        self.position += 1
+        self.consumed += 1
+        return value
+
+
+class OutputBuffer:
+    """
+    The output of a brainfuck program.
+    Values are written to a binary writable stream, modulo 256, once buffer_size of them are waiting.
+    Without a stream, the output is kept as text, with one character per value.
+    """
+
+    def __init__(self, stream=None, buffer_size=65536):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.text = io.StringIO() if stream is None else None
+        self.text_start = 0  # amount of values written before the text begins
+        self.written = 0
+
+    def write(self, value):
+        self.written += 1
+        if self.stream is None:
+            self.text.write(chr(value))
+            return
+        self.buffer.append(value & 0xFF)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.stream is None:
+            return
+        if self.buffer:
+            self.stream.write(self.buffer)
+            self.buffer = bytearray()
+        if hasattr(self.stream, 'flush'):
+            self.stream.flush()
+
+    def truncate(self, written):
+        """
+        Drop the output written after the first written values
+        """
+        if written == self.written:
+            return
+        if self.stream is None and written >= self.text_start:
+            self.text.seek(written - self.text_start)
+            self.text.truncate()
+        elif self.stream is not None and self.written - written <= len(self.buffer):
+            del self.buffer[len(self.buffer) - (self.written - written):]
+        else:
+            raise Exception("Output before this point was already written elsewhere")
+        self.written = written
+
+    def fork(self, stream=None):
+        """
+        Return an independent buffer continuing this output. Without a stream, it starts with the text written so far
+        """
+        forked = OutputBuffer(stream, self.buffer_size)
+        if stream is None and self.stream is None:
+            forked.text.write(self.text.getvalue())
+            forked.text_start = self.text_start
+        elif stream is None:
+            forked.text_start = self.written
+        forked.written = self.written
+        return forked
+
+    def getvalue(self):
+        """
+        The output written so far, as text. Empty when writing to a stream
+        """
+        return self.text.getvalue() if self.stream is None else ''
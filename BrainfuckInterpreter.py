@@ -1,18 +1,165 @@
-import sys
+import copy
+from BrainfuckIO import InputBuffer, OutputBuffer, EOF_ERROR, EOF_POLICIES, eof_value
+from Tape import new_tape, grow_tape, copy_tape, tape_bytes
+
+
+class InterpreterState:
+    """
+    The execution state of an interpreter, as captured by BrainfuckInterpreter.snapshot
+    """
+
+    def __init__(self, memory, data_pointer, instruction_pointer, input_consumed, output_written):
+        self.memory = memory
+        self.data_pointer = data_pointer
+        self.instruction_pointer = instruction_pointer
+        self.input_consumed = input_consumed
+        self.output_written = output_written
+
+
+class ExecutionStats:
+    """
+    Counters of an interpreter created with collect_stats, as returned by BrainfuckInterpreter.get_stats.
+    instruction_counts counts each brainfuck command, and { counts debug flags.
+    loop_iterations counts the times a loop body was entered, by [ or by jumping back from ]
+    """
+
+    def __init__(self):
+        self.steps = 0
+        self.instruction_counts = dict.fromkeys('+-><[].,{', 0)
+        self.loop_iterations = 0
+        self.peak_data_pointer = 0
+        self.tape_bytes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def copy(self):
+        copied = copy.copy(self)
+        copied.instruction_counts = dict(self.instruction_counts)
+        return copied
 
 
 class BrainfuckInterpreter:
+    """
+    user_input is a string, bytes or a binary readable stream.
+    When output_stream is given, output is written to it instead of being kept in code_output.
+    eof_policy decides what , does at the end of the input, see BrainfuckIO.
+    memory is a typed array chosen by Tape.new_tape from cell_range, so it can be handed over as a buffer.
+    With paged_memory, memory is a Tape.PagedTape, which only allocates the parts of the memory that are written to.
+    With collect_stats, execution is counted for get_stats, at the cost of speed.
+    """
 
-    def __init__(self, code, cell_range, user_input="Hello World!"):
+    def __init__(self, code, cell_range, user_input="Hello World!", output_stream=None, eof_policy=EOF_ERROR,
+                 paged_memory=False, collect_stats=False):
+        if eof_policy not in EOF_POLICIES:
+            raise ValueError(f"Unknown eof policy {eof_policy}")
         self.code = code
-        self.memory = []
+        self.memory = new_tape(cell_range, paged_memory)
         self.instruction_pointer = 0
         self.data_pointer = 0
         self.cell_range = cell_range
         self.while_mapper = self.map_whiles()
         self.user_input = user_input
-        self.code_output = ""
-        self.input_progress = 0
+        self.input = InputBuffer(user_input)
+        self.output = OutputBuffer(output_stream)
+        self.eof_policy = eof_policy
+        self.memory_shared = False
+        self.stats = ExecutionStats() if collect_stats else None
+        self.bind()
+
+    def bind(self):
+        """
+        Create the attributes that refer to this instance's methods
+        """
+        self.instruction_map = {'+': self.inc_data, '-': self.dec_data, '>': self.move_right, '<': self.move_left,
+                                ',': self.input_cell, '.': self.print_cell, '[': self.while_start,
+                                ']': self.while_end}
+        if self.stats is not None:
+            self.instruction_map = {symbol: self.counted(symbol, method)
+                                    for symbol, method in self.instruction_map.items()}
+
+    def counted(self, symbol, method):
+        """
+        Wrap the method of a brainfuck command to update the stats
+        """
+        stats = self.stats
+        counts = stats.instruction_counts
+
+        def run():
+            counts[symbol] += 1
+            if symbol in '[]' and self.memory[self.data_pointer]:
+                stats.loop_iterations += 1
+            method()
+            if symbol == '>' and self.data_pointer > stats.peak_data_pointer:
+                stats.peak_data_pointer = self.data_pointer
+        return run
+
+    @property
+    def code_output(self):
+        return self.output.getvalue()
+
+    @property
+    def input_progress(self):
+        return self.input.consumed
+
+    def get_stats(self):
+        """
+        Return an ExecutionStats of the execution so far
+        """
+        if self.stats is None:
+            raise Exception("Stats are only collected by interpreters created with collect_stats")
+        stats = self.stats.copy()
+        stats.steps = sum(stats.instruction_counts.values())
+        stats.tape_bytes = tape_bytes(self.memory)
+        stats.bytes_read = self.input.consumed
+        stats.bytes_written = self.output.written
+        return stats
+
+    def snapshot(self):
+        """
+        Capture the execution state. The memory is shared with the state until the interpreter runs again
+        """
+        self.memory_shared = True
+        return InterpreterState(self.memory, self.data_pointer, self.instruction_pointer, self.input.consumed,
+                                self.output.written)
+
+    def restore(self, state):
+        """
+        Go back to a state captured by snapshot. Output written after the state is dropped
+        """
+        self.memory = state.memory
+        self.memory_shared = True
+        self.data_pointer = state.data_pointer
+        self.instruction_pointer = state.instruction_pointer
+        self.input.seek(state.input_consumed)
+        self.output.truncate(state.output_written)
+
+    def fork(self, user_input=None, output_stream=None):
+        """
+        Return an independent interpreter continuing from the current state. Memory is copied when either one runs.
+        user_input replaces the rest of the input, output of the fork goes to output_stream
+        """
+        forked = copy.copy(self)
+        self.memory_shared = forked.memory_shared = True
+        if self.stats is not None:
+            forked.stats = self.stats.copy()
+        forked.input = self.input.fork() if user_input is None else InputBuffer(user_input)
+        forked.output = self.output.fork(output_stream)
+        forked.bind()
+        return forked
+
+    def own_memory(self):
+        """
+        Copy the memory if it is shared with a snapshot or a fork
+        """
+        if self.memory_shared:
+            self.memory = copy_tape(self.memory)
+            self.memory_shared = False
+
+    def flush(self):
+        """
+        Write buffered output to the output stream
+        """
+        self.output.flush()
 
     def map_whiles(self):
         """
@@ -33,28 +180,38 @@ class BrainfuckInterpreter:
             raise Exception("Matching ']' not found")
         return while_mapper
 
-    def exec_commands(self, max_amount=1):
+    def exec_commands(self, max_amount=1, stop_on_flag=False):
         """
         Execute at most max_amount commands. Return amount of commands exe
         Also returns a list of debug flags passed.
+        If stop_on_flag, return right after passing a debug flag
         """
+        self.own_memory()
         debug_flags = []
+        instruction_map = self.instruction_map
         for i in range(max_amount):
             if self.instruction_pointer < len(self.code) and self.code[self.instruction_pointer] == '{':
                 debug_flags.append(self.read_debug_flag())
+                if stop_on_flag:
+                    return i + 1, debug_flags
                 continue
             if self.instruction_pointer >= len(self.code):
+                self.flush()
                 return i, debug_flags
             if self.data_pointer == len(self.memory):
-                self.memory += [0] * 10000
-            instruction_map = {'+': self.inc_data, '-': self.dec_data, '>': self.move_right, '<': self.move_left,
-                               ',': self.input_cell, '.': self.print_cell, '[': self.while_start, ']': self.while_end}
+                self.grow_memory()
             if self.code[self.instruction_pointer] in instruction_map:
                 instruction_map[self.code[self.instruction_pointer]]()
             else:
                 raise Exception(f"Unrecognized symbol {self.code[self.instruction_pointer]} in code")
         return max_amount, debug_flags
 
+    def grow_memory(self):
+        """
+        Add zeroed cells to the end of the memory
+        """
+        grow_tape(self.memory, 10000)
+
     def read_debug_flag(self):
         """
         Read and return a debug flag from the code
@@ -62,24 +219,22 @@ class BrainfuckInterpreter:
         flag_end = self.code.find('}', self.instruction_pointer)
         flag = self.code[self.instruction_pointer + 1: flag_end]
         self.instruction_pointer = flag_end + 1
+        if self.stats is not None:
+            self.stats.instruction_counts['{'] += 1
         return flag
 
     def inc_data(self):
         """
         Brainfuck +
         """
-        self.memory[self.data_pointer] += 1
-        if self.memory[self.data_pointer] == self.cell_range:
-            self.memory[self.data_pointer] = 0
+        self.memory[self.data_pointer] = (self.memory[self.data_pointer] + 1) % self.cell_range
         self.instruction_pointer += 1
 
     def dec_data(self):
         """
         Brainfuck -
         """
-        self.memory[self.data_pointer] -= 1
-        if self.memory[self.data_pointer] == -1:
-            self.memory[self.data_pointer] = self.cell_range - 1
+        self.memory[self.data_pointer] = (self.memory[self.data_pointer] - 1) % self.cell_range
         self.instruction_pointer += 1
 
     def move_right(self):
@@ -102,15 +257,25 @@ class BrainfuckInterpreter:
         """
         Brainfuck .
         """
-        self.code_output += chr(self.memory[self.data_pointer])
+        self.output.write(self.memory[self.data_pointer])
         self.instruction_pointer += 1
 
+    def read_value(self, current_value):
+        """
+        Return the next input value, or the value the eof policy gives at the end of the input
+        """
+        if self.input.is_empty():
+            self.flush()
+        value = self.input.read_byte()
+        if value is not None:
+            return value % self.cell_range
+        return eof_value(self.eof_policy, self.cell_range, current_value)
+
     def input_cell(self):
         """
         Brainfuck ,
         """
-        self.memory[self.data_pointer] = ord(self.user_input[self.input_progress])
-        self.input_progress += 1
+        self.memory[self.data_pointer] = self.read_value(self.memory[self.data_pointer])
         self.instruction_pointer += 1
 
     def while_start(self):
@@ -0,0 +1,232 @@
+import json
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+OP_ADD = 0
+OP_MOVE = 1
+OP_OPEN = 2
+OP_CLOSE = 3
+OP_OUTPUT = 4
+OP_INPUT = 5
+OP_FLAG = 6
+OP_INVALID = 7
+OP_CLEAR = 8
+OP_TRANSFER = 9
+
+token_regex = re.compile(r'\++|-+|>+|<+|\{[^}]*\}|.', re.DOTALL)
+
+PRECOMPILED_MAGIC = b'BFC1'
+PRECOMPILED_HEADER = struct.Struct('<4sQ')
+
+
+def precompiled_path(bf_file):
+    """
+    The path of the precompiled program saved next to a compiled brainfuck file
+    """
+    return (bf_file[:-3] if bf_file.endswith('.bf') else bf_file) + '.bfc'
+
+
+def int_array(values):
+    """
+    Return the bytes of values as little endian 64 bit integers
+    """
+    values = array('q', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def int_list(data):
+    values = array('q')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tolist()
+
+
+class BrainfuckProgram:
+    """
+    Brainfuck code decoded once into a list of operations.
+    Each run of identical + - > < commands is folded into a single ADD or MOVE, brackets hold the index of their
+    matching operation and debug flags become FLAG operations.
+    ops[k] is the opcode, args[k] its argument, costs[k] the amount of brainfuck commands it stands for
+    and positions[k] the index in the code where it starts.
+    Loops like [-] or [->+>+<<] are marked as CLEAR or TRANSFER on their opening operation, and loops[k] describes
+    the whole loop so it can be run in a single step. They keep the index of their ] like OPEN does.
+    """
+
+    def __init__(self, code):
+        self.ops = []
+        self.args = []
+        self.costs = []
+        self.positions = []
+        self.flags = []
+        self.loops = {}
+        self.while_map = None
+        self.code_length = len(code)
+        self.decode(code)
+
+    def append_op(self, op, arg, cost, position):
+        self.ops.append(op)
+        self.args.append(arg)
+        self.costs.append(cost)
+        self.positions.append(position)
+
+    def decode(self, code):
+        """
+        Fold the code into operations and resolve the jump targets of [ and ]
+        """
+        while_stack = []
+        for match in token_regex.finditer(code):
+            token = match.group()
+            position = match.start()
+            symbol = token[0]
+            if symbol == '+':
+                self.append_op(OP_ADD, len(token), len(token), position)
+            elif symbol == '-':
+                self.append_op(OP_ADD, -len(token), len(token), position)
+            elif symbol == '>':
+                self.append_op(OP_MOVE, len(token), len(token), position)
+            elif symbol == '<':
+                self.append_op(OP_MOVE, -len(token), len(token), position)
+            elif symbol == '[':
+                while_stack.append(len(self.ops))
+                self.append_op(OP_OPEN, None, 1, position)
+            elif symbol == ']':
+                if len(while_stack) == 0:
+                    raise Exception("Matching '[' not found")
+                open_idx = while_stack.pop()
+                self.args[open_idx] = len(self.ops)
+                self.append_op(OP_CLOSE, open_idx, 1, position)
+                self.recognize_loop(open_idx)
+            elif symbol == '.':
+                self.append_op(OP_OUTPUT, None, 1, position)
+            elif symbol == ',':
+                self.append_op(OP_INPUT, None, 1, position)
+            elif symbol == '{':
+                if len(token) == 1:
+                    raise Exception("Matching '}' not found")
+                self.flags.append(token[1:-1])
+                self.append_op(OP_FLAG, len(self.flags) - 1, 1, position)
+            else:
+                self.append_op(OP_INVALID, symbol, 1, position)
+        if len(while_stack) > 0:
+            raise Exception("Matching ']' not found")
+
+    def recognize_loop(self, open_idx):
+        """
+        Mark the loop starting at open_idx if its body only adds constants to cells around the loop cell,
+        moves back to the loop cell and changes it by exactly 1 each iteration.
+        loops[open_idx] is (loop_cell_delta, ((offset, delta), ...), body_cost, min_offset, max_offset)
+        """
+        offset = 0
+        deltas = {}
+        min_offset = max_offset = 0
+        body_cost = 0
+        for op_idx in range(open_idx + 1, self.args[open_idx]):
+            if self.ops[op_idx] == OP_ADD:
+                deltas[offset] = deltas.get(offset, 0) + self.args[op_idx]
+            elif self.ops[op_idx] == OP_MOVE:
+                offset += self.args[op_idx]
+                min_offset = min(min_offset, offset)
+                max_offset = max(max_offset, offset)
+            else:
+                return
+            body_cost += self.costs[op_idx]
+        loop_cell_delta = deltas.pop(0, 0)
+        if offset != 0 or loop_cell_delta not in (1, -1):
+            return
+        transfers = tuple((target, delta) for target, delta in deltas.items() if delta != 0)
+        self.ops[open_idx] = OP_TRANSFER if transfers else OP_CLEAR
+        self.loops[open_idx] = (loop_cell_delta, transfers, body_cost, min_offset, max_offset)
+
+    def while_mapper(self):
+        """
+        Map the code indexes of [ and ] to the corresponding indexes, like BrainfuckInterpreter.map_whiles.
+        The map is built once and shared by every interpreter running this program
+        """
+        if self.while_map is None:
+            self.while_map = {self.positions[k]: self.positions[self.args[k]] for k, op in enumerate(self.ops)
+                              if op in (OP_OPEN, OP_CLOSE, OP_CLEAR, OP_TRANSFER)}
+        return self.while_map
+
+    def save(self, path, code, metadata=None):
+        """
+        Write the program to a precompiled .bfc file, which holds the code, the operations with their resolved
+        jump targets, the recognized loops, the [ ] table of while_mapper, the debug flags and metadata,
+        a dict that can be saved as JSON.
+        After the magic and the size of a JSON header of the flags, metadata and section sizes,
+        the code is kept as UTF-8 and everything else as columns of integers,
+        so BrainfuckProgram.load builds the program from them without decoding the code again
+        """
+        args = [arg if isinstance(arg, int) else 0 if arg is None else ord(arg) for arg in self.args]
+        loop_columns = [list(self.loops)] + [list(column) for column in zip(*self.loops.values())] \
+            if self.loops else [[]] * 6
+        transfer_counts = [len(transfers) for transfers in loop_columns[2]]
+        transfer_values = [value for transfers in loop_columns[2] for transfer in transfers for value in transfer]
+        while_map = self.while_mapper()
+        sections = [code.encode(), bytes(self.ops)] + [int_array(values) for values in (
+            args, self.costs, self.positions, loop_columns[0], loop_columns[1], loop_columns[3], loop_columns[4],
+            loop_columns[5], transfer_counts, transfer_values, list(while_map), list(while_map.values()))]
+        header = json.dumps({'flags': self.flags, 'metadata': metadata,
+                             'sections': [len(section) for section in sections]}).encode()
+        with open(path, 'wb') as f_out:
+            f_out.write(PRECOMPILED_HEADER.pack(PRECOMPILED_MAGIC, len(header)))
+            f_out.write(header)
+            for section in sections:
+                f_out.write(section)
+
+    @staticmethod
+    def load(path):
+        """
+        Read a program saved by save with a single read. Return the program, its code and the metadata
+        """
+        with open(path, 'rb') as f_in:
+            data = memoryview(f_in.read())
+        magic, header_size = PRECOMPILED_HEADER.unpack_from(data)
+        if magic != PRECOMPILED_MAGIC:
+            raise Exception("Not a precompiled brainfuck program")
+        start = PRECOMPILED_HEADER.size
+        header = json.loads(bytes(data[start:start + header_size]))
+        start += header_size
+        sections = []
+        for size in header['sections']:
+            sections.append(data[start:start + size])
+            start += size
+        code = str(sections[0], 'utf-8')
+        ops = bytes(sections[1])
+        (args, costs, positions, loop_opens, loop_cell_deltas, body_costs, min_offsets, max_offsets, transfer_counts,
+         transfer_values, while_keys, while_values) = [int_list(section) for section in sections[2:]]
+        program = BrainfuckProgram('')
+        program.ops = list(ops)
+        program.args = args
+        program.costs = costs
+        program.positions = positions
+        program.flags = header['flags']
+        program.code_length = len(code)
+        for op in (OP_OUTPUT, OP_INPUT, OP_INVALID):
+            op_idx = ops.find(op)
+            while op_idx != -1:
+                args[op_idx] = chr(args[op_idx]) if op == OP_INVALID else None
+                op_idx = ops.find(op, op_idx + 1)
+        values = iter(transfer_values)
+        transfer_pairs = list(zip(values, values))
+        transfers = [tuple(transfer_pairs[start:start + count])
+                     for start, count in zip(accumulate(transfer_counts, initial=0), transfer_counts)]
+        program.loops = dict(zip(loop_opens, zip(loop_cell_deltas, transfers, body_costs, min_offsets, max_offsets)))
+        program.while_map = dict(zip(while_keys, while_values))
+        return program, code, header['metadata']
+
+    def locate(self, instruction_pointer):
+        """
+        Return the index of the operation containing instruction_pointer,
+        and how many of its brainfuck commands come before instruction_pointer
+        """
+        if instruction_pointer >= self.code_length or len(self.ops) == 0:
+            return len(self.ops), 0
+        op_idx = bisect_right(self.positions, instruction_pointer) - 1
+        return op_idx, instruction_pointer - self.positions[op_idx]
@@ -0,0 +1,178 @@
+from BrainfuckIO import EOF_ERROR, EOF_ZERO, EOF_MAX, EOF_UNCHANGED
+from BrainfuckProgram import OP_ADD, OP_MOVE, OP_OPEN, OP_CLOSE, OP_OUTPUT, OP_INPUT, OP_CLEAR, OP_TRANSFER
+
+C_TYPES = {2 ** 8: 'uint8_t', 2 ** 16: 'uint16_t', 2 ** 32: 'uint32_t', 2 ** 64: 'uint64_t'}
+
+C_PROLOGUE = """\
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+typedef {cell_type} cell_t;
+
+static cell_t *m;
+static size_t size;
+
+static void fail(const char *message)
+{{
+    fflush(stdout);
+    fprintf(stderr, "%s\\n", message);
+    exit(1);
+}}
+
+static void grow(size_t index)
+{{
+    size_t new_size = size * 2 > index ? size * 2 : index + 1;
+    m = realloc(m, new_size * sizeof(cell_t));
+    if (m == NULL)
+        fail("Out of memory");
+    memset(m + size, 0, (new_size - size) * sizeof(cell_t));
+    size = new_size;
+}}
+
+static cell_t read_cell(cell_t current)
+{{
+    int c = getchar();
+    if (c != EOF)
+        return {read_value};
+{eof_code}
+}}
+
+int main(void)
+{{
+    size_t p = 0;
+    cell_t v;
+    (void)v;
+    (void)read_cell;
+    grow({initial_size});
+"""
+
+C_EPILOGUE = """\
+    fflush(stdout);
+    free(m);
+    return 0;
+}
+"""
+
+EOF_CODE = {
+    EOF_ERROR: '    fail("Input exhausted");\n    return current;',
+    EOF_ZERO: '    (void)current;\n    return 0;',
+    EOF_MAX: '    (void)current;\n    return {max_value};',
+    EOF_UNCHANGED: '    return current;',
+}
+
+
+class CGenerator:
+    """
+    Translates a BrainfuckProgram to a C program using a growing array of fixed width cells.
+    Cell ranges of 2**8, 2**16, 2**32 and 2**64 wrap with the cell type itself, other powers of two are masked,
+    and other ranges up to 2**32 use modulo. Output writes the low byte of the cell. Debug flags are dropped.
+    """
+
+    def __init__(self, program, cell_range, initial_size=65536, eof_policy=EOF_ERROR):
+        self.program = program
+        self.cell_range = cell_range
+        self.initial_size = initial_size
+        self.eof_policy = eof_policy
+        if cell_range in C_TYPES:
+            self.cell_type = C_TYPES[cell_range]
+            self.wrap = None
+        elif cell_range & (cell_range - 1) == 0 and cell_range < 2 ** 64:
+            self.cell_type = next(C_TYPES[r] for r in sorted(C_TYPES) if r > cell_range)
+            self.wrap = f' & {cell_range - 1}u'
+        elif cell_range < 2 ** 32:
+            self.cell_type = next(C_TYPES[r] for r in sorted(C_TYPES) if r >= cell_range)
+            self.wrap = f' % {cell_range}u'
+        else:
+            raise ValueError(f"The C backend doesn't support a cell range of {cell_range}")
+
+    def add(self, target, amount):
+        """
+        Return the statement adding amount to the cell target (a C expression), where amount may be an expression
+        """
+        if self.wrap is None:
+            return f'{target} += {amount};'
+        return f'{target} = (cell_t)(((uint64_t){target} + {amount}){self.wrap});'
+
+    def read_value(self):
+        return 'c' if self.wrap is None else f'(cell_t)((unsigned)c{self.wrap})'
+
+    def emit_op(self, op_idx, lines, indent):
+        op = self.program.ops[op_idx]
+        arg = self.program.args[op_idx]
+        if op == OP_ADD:
+            lines.append(indent + self.add('m[p]', f'{arg % self.cell_range}u'))
+        elif op == OP_MOVE and arg > 0:
+            lines.append(f'{indent}p += {arg};')
+            lines.append(f'{indent}if (p >= size)')
+            lines.append(f'{indent}    grow(p);')
+        elif op == OP_MOVE:
+            lines.append(f'{indent}if (p < {-arg})')
+            lines.append(f'{indent}    fail("Negative data pointer!");')
+            lines.append(f'{indent}p -= {-arg};')
+        elif op == OP_OPEN:
+            lines.append(f'{indent}while (m[p]) {{')
+        elif op == OP_CLOSE:
+            lines.append(f'{indent[4:]}}}')
+        elif op == OP_OUTPUT:
+            lines.append(f'{indent}putchar((int)(m[p] & 0xFF));')
+        elif op == OP_INPUT:
+            lines.append(f'{indent}m[p] = read_cell(m[p]);')
+        elif op == OP_CLEAR:
+            lines.append(f'{indent}m[p] = 0;')
+        elif op == OP_TRANSFER:
+            self.emit_transfer(op_idx, lines, indent)
+
+    def emit_transfer(self, op_idx, lines, indent):
+        loop_cell_delta, transfers, body_cost, min_offset, max_offset = self.program.loops[op_idx]
+        lines.append(f'{indent}if (m[p]) {{')
+        if loop_cell_delta > 0:
+            lines.append(f'{indent}    v = (cell_t)({self.cell_range - 1}u - m[p] + 1u);')
+        else:
+            lines.append(f'{indent}    v = m[p];')
+        if min_offset < 0:
+            lines.append(f'{indent}    if (p < {-min_offset})')
+            lines.append(f'{indent}        fail("Negative data pointer!");')
+        if max_offset > 0:
+            lines.append(f'{indent}    if (p + {max_offset} >= size)')
+            lines.append(f'{indent}        grow(p + {max_offset});')
+        for target, delta in transfers:
+            cell = f'm[p + {target}]' if target > 0 else f'm[p - {-target}]'
+            if self.wrap is None:
+                lines.append(f'{indent}    {cell} += (cell_t)({delta % self.cell_range}u * v);')
+            else:
+                product = f'({delta % self.cell_range}u * (uint64_t)v % {self.cell_range}u)'
+                lines.append(f'{indent}    {self.add(cell, product)}')
+        lines.append(f'{indent}    m[p] = 0;')
+        lines.append(f'{indent}}}')
+
+    def generate(self):
+        """
+        Return the source of the C program
+        """
+        eof_code = EOF_CODE[self.eof_policy].replace('{max_value}', f'{self.cell_range - 1}u')
+        lines = [C_PROLOGUE.format(cell_type=self.cell_type, read_value=self.read_value(), eof_code=eof_code,
+                                   initial_size=self.initial_size)]
+        depth = 1
+        op_idx = 0
+        while op_idx < len(self.program.ops):
+            op = self.program.ops[op_idx]
+            self.emit_op(op_idx, lines, '    ' * depth)
+            if op == OP_OPEN:
+                depth += 1
+            elif op == OP_CLOSE:
+                depth -= 1
+            elif op in (OP_CLEAR, OP_TRANSFER):
+                op_idx = self.program.args[op_idx]
+            op_idx += 1
+        lines.append(C_EPILOGUE)
+        return '\n'.join(lines)
+
+
+def generate_c(program, controller, eof_policy=EOF_ERROR):
+    """
+    Return C source running program, with cells matching the cell_range of controller
+    and an initial memory of 1024 VMCs
+    """
+    return CGenerator(program, controller.cell_range, controller.vmc_size * 1024, eof_policy).generate()
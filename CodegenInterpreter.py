@@ -0,0 +1,289 @@
+from BrainfuckInterpreter import BrainfuckInterpreter
+from BrainfuckProgram import BrainfuckProgram, OP_ADD, OP_MOVE, OP_OPEN, OP_CLOSE, OP_OUTPUT, OP_INPUT, OP_FLAG, \
+    OP_CLEAR, OP_TRANSFER
+
+MAX_NESTED_LOOPS = 16  # Python refuses to compile more than 20 nested blocks in a single function
+
+
+class StepLimitExceeded(Exception):
+    """
+    Raised by generated code when it executed more commands than allowed
+    """
+
+    def __init__(self, data_pointer, steps):
+        super().__init__("Step limit exceeded")
+        self.data_pointer = data_pointer
+        self.steps = steps
+
+
+class NegativeDataPointer(Exception):
+    """
+    Raised by generated code when a < moves the data pointer below the first cell, where it stops
+    """
+
+    def __init__(self, data_pointer):
+        super().__init__("Negative data pointer!")
+        self.data_pointer = data_pointer
+
+
+def cell(offset):
+    if offset == 0:
+        return 'm[p]'
+    return f'm[p + {offset}]' if offset > 0 else f'm[p - {-offset}]'
+
+
+class PythonGenerator:
+    """
+    Translates a BrainfuckProgram to the source of a python function with nested while loops.
+    Inside a run of operations without loops, pointer moves are folded into constant offsets from p,
+    and p is only updated once at the end of the run. The data pointer is checked at the start of the run,
+    and again at moves further left than the run went after it wrote or printed anything. Recognized loops become straight line code.
+    """
+
+    def __init__(self, program, cell_range):
+        self.program = program
+        self.cell_range = cell_range
+        if cell_range & (cell_range - 1) == 0:
+            self.wrap = f' & {cell_range - 1}'
+        else:
+            self.wrap = f' % {cell_range}'
+        self.functions = []
+        self.offset = 0
+        self.steps = 0
+        self.adds = {}
+        self.statements = []
+        self.min_offset = 0
+        self.max_offset = 0
+        self.checked_offset = None
+
+    def touch(self, offset):
+        self.min_offset = min(self.min_offset, offset)
+        self.max_offset = max(self.max_offset, offset)
+
+    def flush_adds(self):
+        for offset, delta in self.adds.items():
+            if delta % self.cell_range != 0:
+                self.statements.append(f'{cell(offset)} = ({cell(offset)} + {delta % self.cell_range}){self.wrap}')
+        self.adds = {}
+
+    def check_offset(self):
+        """
+        Check the data pointer at the current offset, after the pending writes.
+        The check at the start of the run only covers the offsets reached before
+        """
+        self.flush_adds()
+        self.statements.append(f'if p < {-self.offset}:')
+        self.statements.append('    raise NegativeDataPointer(0)')
+        if self.checked_offset is None:
+            self.checked_offset = self.min_offset
+
+    def flush(self, lines, indent):
+        """
+        Emit the pending run of operations
+        """
+        self.flush_adds()
+        self.touch(self.offset)
+        if self.max_offset > 0:
+            lines.append(f'{indent}if p + {self.max_offset} >= n:')
+            lines.append(f'{indent}    n = grow(p + {self.max_offset})')
+        min_offset = self.min_offset if self.checked_offset is None else self.checked_offset
+        if min_offset < 0:
+            lines.append(f'{indent}if p < {-min_offset}:')
+            lines.append(f'{indent}    raise NegativeDataPointer(0)')
+        lines += [indent + statement for statement in self.statements]
+        if self.offset != 0:
+            lines.append(f'{indent}p += {self.offset}')
+        if self.steps != 0:
+            lines.append(f'{indent}s += {self.steps}')
+        self.offset = 0
+        self.steps = 0
+        self.statements = []
+        self.min_offset = 0
+        self.max_offset = 0
+        self.checked_offset = None
+
+    def emit_block(self, first_op, end_op, lines, depth):
+        """
+        Emit the operations in [first_op, end_op), which are all in the same loop
+        """
+        ops, args, costs = self.program.ops, self.program.args, self.program.costs
+        indent = '    ' * depth
+        op_idx = first_op
+        while op_idx < end_op:
+            op = ops[op_idx]
+            self.steps += costs[op_idx]
+            if op == OP_ADD:
+                self.touch(self.offset)
+                self.adds[self.offset] = self.adds.get(self.offset, 0) + args[op_idx]
+            elif op == OP_MOVE:
+                self.offset += args[op_idx]
+                if self.offset < self.min_offset and (self.statements or self.adds):
+                    self.check_offset()
+                self.touch(self.offset)
+            elif op == OP_OUTPUT:
+                self.touch(self.offset)
+                self.flush_adds()
+                self.statements.append(f'write({cell(self.offset)})')
+            elif op == OP_INPUT:
+                self.touch(self.offset)
+                self.flush_adds()
+                self.statements.append(f'{cell(self.offset)} = read(p + {self.offset})')
+            elif op == OP_FLAG:
+                self.flush(lines, indent)
+                lines.append(f'{indent}flag({args[op_idx]}, p)')
+            elif op == OP_CLEAR or op == OP_TRANSFER:
+                self.emit_recognized_loop(op_idx)
+                op_idx = args[op_idx]
+            elif op == OP_OPEN:
+                self.flush(lines, indent)
+                if depth + 1 >= MAX_NESTED_LOOPS:
+                    lines.append(f'{indent}p, s, n = loop{op_idx}(m, p, s, n, limit)')
+                    self.emit_function(f'loop{op_idx}', op_idx, args[op_idx] + 1, 'p, s, n')
+                else:
+                    self.emit_loop(op_idx, lines, depth)
+                op_idx = args[op_idx]
+            elif op != OP_CLOSE:
+                self.flush(lines, indent)
+                lines.append(f'{indent}raise Exception("Unrecognized symbol " + {args[op_idx]!r} + " in code")')
+            op_idx += 1
+        self.flush(lines, indent)
+
+    def emit_recognized_loop(self, open_idx):
+        """
+        Emit a CLEAR or TRANSFER loop as part of the pending run. The step of [ is already counted.
+        When the loop goes below the first cell, its first iteration runs a command at a time up to the failing move
+        """
+        loop_cell_delta, transfers, body_cost, min_offset, max_offset = self.program.loops[open_idx]
+        self.touch(self.offset)
+        self.touch(self.offset + max_offset)
+        self.flush_adds()
+        statements = [f'v = {cell(self.offset)}', 'if v:']
+        if self.offset + min_offset < 0:
+            statements.append(f'    if p < {-(self.offset + min_offset)}:')
+            statements += ['        ' + statement for statement in self.failing_iteration(open_idx)]
+        if loop_cell_delta > 0:
+            statements.append(f'    v = {self.cell_range} - v')
+        for target, delta in transfers:
+            target_cell = cell(self.offset + target)
+            statements.append(f'    {target_cell} = ({target_cell} + {delta % self.cell_range} * v){self.wrap}')
+        statements.append(f'    {cell(self.offset)} = 0')
+        statements.append(f'    s += v * {body_cost + 1}')
+        self.statements += statements
+
+    def failing_iteration(self, open_idx):
+        """
+        Return the statements of the body of a recognized loop, checking the data pointer at each move further left
+        """
+        ops, args = self.program.ops, self.program.args
+        statements = []
+        offset = self.offset
+        min_offset = offset
+        for op_idx in range(open_idx + 1, args[open_idx]):
+            if ops[op_idx] == OP_ADD:
+                statements.append(f'{cell(offset)} = ({cell(offset)} + {args[op_idx] % self.cell_range}){self.wrap}')
+            else:
+                offset += args[op_idx]
+                if offset < min_offset and offset < 0:
+                    statements.append(f'if p < {-offset}:')
+                    statements.append('    raise NegativeDataPointer(0)')
+                min_offset = min(min_offset, offset)
+        return statements
+
+    def emit_loop(self, open_idx, lines, depth):
+        """
+        Emit the loop starting at open_idx. The step of [ is already counted, the body counts the step of ]
+        """
+        indent = '    ' * depth
+        lines.append(f'{indent}while m[p]:')
+        self.emit_block(open_idx + 1, self.program.args[open_idx] + 1, lines, depth + 1)
+        lines.append(f'{indent}    if s > limit:')
+        lines.append(f'{indent}        raise StepLimitExceeded(p, s)')
+
+    def emit_function(self, name, first_op, end_op, returned):
+        lines = [f'def {name}(m, p, s, n, limit):']
+        if first_op < end_op and self.program.ops[first_op] == OP_OPEN:
+            self.emit_loop(first_op, lines, 1)
+        else:
+            self.emit_block(first_op, end_op, lines, 1)
+        lines.append(f'    return {returned}')
+        self.functions.append('\n'.join(lines))
+
+    def generate(self):
+        """
+        Return the source of a module whose run(m, p, s, n, limit) function executes the program
+        """
+        self.emit_function('run', 0, len(self.program.ops), 'p, s')
+        return '\n\n\n'.join(reversed(self.functions)) + '\n'
+
+
+class CodegenInterpreter(BrainfuckInterpreter):
+    """
+    Compiles the brainfuck code to a python function and runs the whole program with a single call.
+    Execution can't be paused: exec_commands runs to the end of the program, or stops for good once more than
+    max_amount commands were executed. Debug flags are returned after the run, in the order they were passed.
+    """
+
+    def __init__(self, code, cell_range, user_input="Hello World!", program=None, **options):
+        if options.get('collect_stats'):
+            raise ValueError("CodegenInterpreter doesn't collect stats")
+        self.program = program if program is not None else BrainfuckProgram(code)
+        self.source = PythonGenerator(self.program, cell_range).generate()
+        self.compiled = compile(self.source, '<brainfuck>', 'exec')
+        super().__init__(code, cell_range, user_input, **options)
+        self.debug_flags = []
+        self.limit_exceeded = False
+
+    def bind(self):
+        super().bind()
+        self.namespace = {'StepLimitExceeded': StepLimitExceeded, 'NegativeDataPointer': NegativeDataPointer,
+                          'grow': self.grow_to, 'write': self.output.write, 'read': self.read_input,
+                          'flag': self.pass_flag}
+        exec(self.compiled, self.namespace)
+
+    def restore(self, state):
+        super().restore(state)
+        self.limit_exceeded = False
+
+    def map_whiles(self):
+        return self.program.while_mapper()
+
+    def grow_to(self, index):
+        while index >= len(self.memory):
+            self.grow_memory()
+        return len(self.memory)
+
+    def read_input(self, data_pointer):
+        self.data_pointer = data_pointer
+        return self.read_value(self.memory[data_pointer])
+
+    def pass_flag(self, flag_idx, data_pointer):
+        self.data_pointer = data_pointer
+        self.debug_flags.append(self.program.flags[flag_idx])
+
+    def exec_commands(self, max_amount=1, stop_on_flag=False):
+        """
+        Execute the whole program. Return amount of commands executed and the list of debug flags passed.
+        stop_on_flag is ignored, as the run can't stop at debug flags
+        """
+        if self.limit_exceeded:
+            raise Exception("Execution stopped at the step limit and can't be resumed")
+        if self.instruction_pointer >= self.program.code_length:
+            return 0, []
+        self.own_memory()
+        self.debug_flags = []
+        if self.data_pointer >= len(self.memory):
+            self.grow_memory()
+        try:
+            self.data_pointer, steps = self.namespace['run'](self.memory, self.data_pointer, 0, len(self.memory),
+                                                             max_amount)
+        except StepLimitExceeded as e:
+            self.data_pointer = e.data_pointer
+            self.limit_exceeded = True
+            self.flush()
+            return e.steps, self.debug_flags
+        except NegativeDataPointer as e:
+            self.data_pointer = e.data_pointer
+            raise
+        self.instruction_pointer = self.program.code_length
+        self.flush()
+        return steps, self.debug_flags
@@ -29,3 +29,17 @@ class CommandType(Enum):
         Does this command end it's basic block?
         """
         return self in [CommandType.ret, CommandType.jmp, CommandType.label, CommandType.jnz, CommandType.call]
+
+    def operand_kinds(self):
+        """
+        The kinds of the operands of the command, as in supported_commands.txt:
+        r is a register, i an immediate, l a label and b a register or an immediate
+        """
+        return {
+            CommandType.mov: 'rb', CommandType.load: 'rb', CommandType.store: 'bb', CommandType.neg: 'r',
+            CommandType.add: 'rbb', CommandType.sub: 'rbb', CommandType.less: 'rbb', CommandType.eq: 'rbb',
+            CommandType.logic_not: 'r', CommandType.logic_and: 'rrr', CommandType.logic_or: 'rrr',
+            CommandType.binary_not: 'r', CommandType.push: 'b', CommandType.pop: 'r', CommandType.ret: '',
+            CommandType.jmp: 'l', CommandType.label: 'l', CommandType.jnz: 'rl', CommandType.call: 'l',
+            CommandType.read: 'r', CommandType.write: 'b'
+        }[self]
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from BrainfuckProgram import BrainfuckProgram
+from FoldedInterpreter import FoldedInterpreter
+from compiler import parse_code, compile_code
+
+SLICE_STEPS = 1000000  # commands executed between checks of the wall-clock limit
+
+
+class LRUCache:
+    """
+    A thread safe mapping that keeps the max_entries most recently used entries
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+worker_programs = LRUCache(64)  # compiled code and decoded programs of a worker process, by source key
+
+
+def source_key(source):
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def run_program(key, cell_range, user_input, max_steps, time_limit, code=None):
+    """
+    Run a compiled program in a worker process, decoding it unless it is in the worker's cache.
+    Returns the output, the amount of commands executed and the error that stopped the run,
+    or None without running when the program isn't in the cache and code wasn't given
+    """
+    cached = worker_programs.get(key)
+    if cached is None:
+        if code is None:
+            return None
+        cached = (code, BrainfuckProgram(code))
+        worker_programs.put(key, cached)
+    code, program = cached
+    interpreter = FoldedInterpreter(code, cell_range, user_input, program=program)
+    deadline = time.monotonic() + time_limit
+    steps = 0
+    error = None
+    try:
+        while True:
+            amount = interpreter.exec_commands(min(SLICE_STEPS, max_steps - steps))[0]
+            steps += amount
+            if interpreter.instruction_pointer >= program.code_length:
+                break
+            if steps >= max_steps:
+                raise Exception("Step limit exceeded")
+            if time.monotonic() > deadline:
+                raise Exception("Time limit exceeded")
+    except Exception as e:
+        error = str(e)
+    return {'output': interpreter.code_output, 'steps': steps, 'error': error}
+
+
+class CompileService:
+    """
+    Compiles assembly sources and runs them in a pool of worker processes.
+    Compiled programs are kept in an LRU cache keyed by the hash of their source,
+    and each worker keeps the decoded programs it ran, so repeated sources skip compiling and decoding.
+    The code of a cached program is only sent to a worker that doesn't have it yet
+    """
+
+    def __init__(self, workers=None, cache_size=64, max_steps=10 ** 10, time_limit=10):
+        self.compiled = LRUCache(cache_size)
+        self.executor = ProcessPoolExecutor(workers)
+        self.max_steps = max_steps
+        self.time_limit = time_limit
+
+    def compile(self, source):
+        """
+        Return the source key, the compiled code and its cell range, and whether they came from the cache
+        """
+        key = source_key(source)
+        compiled = self.compiled.get(key)
+        if compiled is not None:
+            return key, compiled, True
+        compiled = (compile_code(source), parse_code(source)[0].cell_range)
+        self.compiled.put(key, compiled)
+        return key, compiled, False
+
+    def run(self, source, user_input='', max_steps=None, time_limit=None):
+        """
+        Compile and run source on user_input. The step and wall-clock limits can only be lowered
+        """
+        max_steps = self.max_steps if max_steps is None else min(max_steps, self.max_steps)
+        time_limit = self.time_limit if time_limit is None else min(time_limit, self.time_limit)
+        key, (code, cell_range), cached = self.compile(source)
+        arguments = (key, cell_range, user_input, max_steps, time_limit)
+        result = self.executor.submit(run_program, *arguments, None if cached else code).result()
+        if result is None:
+            result = self.executor.submit(run_program, *arguments, code).result()
+        result['cached'] = cached
+        return result
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+class CompileRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles POST requests with a JSON body of source, and optionally input, max_steps and time_limit
+    """
+
+    def do_POST(self):
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            result = self.server.service.run(request['source'], request.get('input', ''), request.get('max_steps'),
+                                             request.get('time_limit'))
+            status = 200
+        except Exception as e:
+            result = {'error': f'{type(e).__name__}: {e}'}
+            status = 400
+        body = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(port=8000, **service_options):
+    """
+    Return an HTTP server on localhost running a CompileService
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), CompileRequestHandler)
+    server.service = CompileService(**service_options)
+    return server
+
+
+if __name__ == "__main__":
+    http_server = make_server(int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
+    print(f'Serving on http://127.0.0.1:{http_server.server_port}')
+    try:
+        http_server.serve_forever()
+    finally:
+        http_server.service.shutdown()
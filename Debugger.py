@@ -1,28 +1,291 @@
-from BrainfuckInterpreter import BrainfuckInterpreter
+from array import array
+from bisect import bisect_right
+from CodegenInterpreter import CodegenInterpreter
+from FoldedInterpreter import FoldedInterpreter
+from Profiler import Profile
+from Tape import PagedTape, PAGE_SHIFT, tape_typecode
 from VMCController import VMCController
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class Debugger:
+    """
+    interpreter_class is the engine that runs the code. It gets the code, the cell range and interpreter_options.
+    The default FoldedInterpreter finds the debug flags when decoding the code,
+    so the code runs in large batches that only stop at the flags.
+    The CodegenInterpreter runs the whole code at once and only passes the flags back after the run,
+    so it can't run code with mem and print flags, which show the state at the flag.
+    source_map is the SourceMap of the code. With it and profile, the execution is profiled by assembly line.
+    With checkpoint_interval, a snapshot of the interpreter is kept every checkpoint_interval commands,
+    so the execution can go back by running forward from the closest checkpoint. The memory is paged by default then,
+    so checkpoints only keep their own copy of the pages written after them.
+    Watchpoints stop exec_commands when a register or a heap value changes. The FoldedInterpreter reports writes
+    to the watched cells, so values are only decoded after one of their cells was written to.
+    Registers move along with the current VMC in the middle of commands, so they are only compared at the start
+    of a command of the source map.
+    get_heap, get_stack and get_register_column decode a number of every VMC at once into a NumPy array.
+    The current VMC is followed through the move_vmc flags of code that has them,
+    and found from the data pointer otherwise, see locate_vmc.
+    """
 
-    def __init__(self, vmc_controller, code):
+    def __init__(self, vmc_controller, code, interpreter_class=FoldedInterpreter, source_map=None, profile=False,
+                 checkpoint_interval=None, **interpreter_options):
         self.vmc_controller = vmc_controller
-        self.interpreter = BrainfuckInterpreter(code, vmc_controller.cell_range)
-        self.vmc_idx = 0
+        self.source_map = source_map
+        if profile:
+            if source_map is None or not issubclass(interpreter_class, FoldedInterpreter):
+                raise Exception("Profiling needs a source map and a FoldedInterpreter")
+            if checkpoint_interval is not None:
+                raise Exception("A profiled execution can't go back")
+            interpreter_options['collect_stats'] = True
+        if issubclass(interpreter_class, CodegenInterpreter) and \
+                any(flag in code for flag in ('{mem', '{print')):
+            raise Exception("The CodegenInterpreter can't stop at mem and print flags")
+        if checkpoint_interval is not None:
+            interpreter_options.setdefault('paged_memory', True)
+        self.interpreter = interpreter_class(code, vmc_controller.cell_range, **interpreter_options)
+        self.has_vmc_flags = '{move_vmc ' in code
+        self.flag_vmc_idx = 0
         self.commands_executed = 0
         self.execution_completed = False
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_steps = []
+        self.checkpoints = []
+        self.furthest_executed = 0
+        self.watchpoints = {}
+        self.register_watchpoints = {}
+        self.registers_written = False
+        self.triggered_watchpoints = []
+        self.entry_starts = None if source_map is None else set(source_map.bf_offsets)
+        if checkpoint_interval is not None:
+            self.take_checkpoint()
 
     def exec_commands(self, max_amount=999999999999999):
         """
-        Execute at most max_amount commands
+        Execute at most max_amount commands, stopping early when a watchpoint triggers.
+        After a write to a watched register, the interpreter also stops at the next command boundary
         """
-        for i in range(max_amount):
-            amount_executed, flags = self.interpreter.exec_commands(1)
+        self.triggered_watchpoints = []
+        while max_amount > 0:
+            amount = max_amount
+            if self.register_watchpoints:
+                self.interpreter.stop_at_breaks = self.registers_written
+            if self.checkpoint_interval is not None:
+                next_checkpoint = (self.commands_executed // self.checkpoint_interval + 1) * self.checkpoint_interval
+                amount = min(amount, next_checkpoint - self.commands_executed)
+            amount_executed, flags = self.interpreter.exec_commands(amount, stop_on_flag=True)
             self.commands_executed += amount_executed
+            max_amount -= amount_executed
             if amount_executed == 0:
                 self.execution_completed = True
-                break;
+                break
             for flag in flags:
-                self.process_flag(flag)
+                self.process_flag(flag, quiet=self.commands_executed <= self.furthest_executed)
+            self.furthest_executed = max(self.furthest_executed, self.commands_executed)
+            if self.checkpoint_interval is not None and self.commands_executed % self.checkpoint_interval == 0 \
+                    and self.commands_executed > self.checkpoint_steps[-1]:
+                self.take_checkpoint()
+            if (self.watchpoints or self.register_watchpoints) and self.interpreter.watch_hit:
+                self.check_watchpoints()
+                self.registers_written = self.registers_written or any(
+                    first_cell <= self.interpreter.data_pointer < first_cell + self.vmc_controller.num_size
+                    for first_cell, value in self.register_watchpoints.values())
+            if self.registers_written and self.at_command_boundary():
+                self.check_register_watchpoints()
+            if self.triggered_watchpoints:
+                break
+
+    @property
+    def vmc_idx(self):
+        """
+        The index of the current VMC
+        """
+        if self.has_vmc_flags:
+            return self.flag_vmc_idx
+        return self.locate_vmc()
+
+    def locate_vmc(self):
+        """
+        Find the current VMC of code compiled without debug flags, from the data pointer and where it is
+        relative to the current VMC at the instruction pointer, see SourceMap.cur_offset_at.
+        Without a source map, this is the VMC holding the data pointer
+        """
+        vmc_size = self.vmc_controller.vmc_size
+        if self.source_map is None:
+            return self.interpreter.data_pointer // vmc_size
+        cur_offset = self.source_map.cur_offset_at(self.interpreter.code, self.interpreter.instruction_pointer,
+                                                   vmc_size)
+        return (self.interpreter.data_pointer - cur_offset) // vmc_size
+
+    def add_watchpoint(self, name, first_cell):
+        if not isinstance(self.interpreter, FoldedInterpreter):
+            raise Exception("Watchpoints need a FoldedInterpreter")
+        self.watchpoints[first_cell] = (name, self.parse_num_unsigned(first_cell))
+        self.interpreter.watch_cells(range(first_cell, first_cell + self.vmc_controller.num_size))
+
+    def at_command_boundary(self):
+        """
+        Whether the instruction pointer is at the start of an entry of the source map or at the end of the code.
+        Commands only move the registers to another VMC in their middle
+        """
+        instruction_pointer = self.interpreter.instruction_pointer
+        return instruction_pointer >= len(self.interpreter.code) or instruction_pointer in self.entry_starts
+
+    def watch_register(self, register_idx):
+        """
+        Stop at the start of the command after one that changed the value of register r<register_idx>.
+        Needs a source map to find the commands
+        """
+        if not isinstance(self.interpreter, FoldedInterpreter):
+            raise Exception("Watchpoints need a FoldedInterpreter")
+        if self.source_map is None:
+            raise Exception("Watching a register needs a source map")
+        first_cell = self.vmc_idx * self.vmc_controller.vmc_size + self.vmc_controller.offset_reg[register_idx]
+        if not self.interpreter.break_ops and not self.interpreter.break_runs:
+            self.interpreter.break_at(self.source_map.bf_offsets)
+        self.register_watchpoints[register_idx] = (first_cell, None)
+        self.interpreter.watch_cells(range(first_cell, first_cell + self.vmc_controller.num_size))
+        self.reset_register_watchpoints()
+
+    def watch_memory(self, address):
+        """
+        Stop when the value at a memory address changes
+        """
+        first_cell = address * self.vmc_controller.vmc_size + self.vmc_controller.offset_heap_value
+        self.add_watchpoint(f'memory {address}', first_cell)
+
+    def clear_watchpoints(self):
+        for first_cell in list(self.watchpoints) + [cell for cell, value in self.register_watchpoints.values()]:
+            self.interpreter.unwatch_cells(range(first_cell, first_cell + self.vmc_controller.num_size))
+        if self.register_watchpoints:
+            self.interpreter.stop_at_breaks = False
+        self.watchpoints = {}
+        self.register_watchpoints = {}
+        self.registers_written = False
+
+    def check_watchpoints(self):
+        """
+        Decode the watched values after a write to their cells.
+        Return whether any of them changed, and list the changes as (name, old value, new value)
+        in triggered_watchpoints
+        """
+        for first_cell, (name, value) in self.watchpoints.items():
+            new_value = self.parse_num_unsigned(first_cell)
+            if new_value != value:
+                self.triggered_watchpoints.append((name, value, new_value))
+                self.watchpoints[first_cell] = (name, new_value)
+        return len(self.triggered_watchpoints) > 0
+
+    def check_register_watchpoints(self):
+        """
+        Decode the watched registers in the current VMC at a command boundary, and watch their cells there.
+        Changes are listed in triggered_watchpoints, except for registers that weren't read yet
+        """
+        num_size = self.vmc_controller.num_size
+        for register_idx, (first_cell, value) in self.register_watchpoints.items():
+            new_first_cell = self.vmc_idx * self.vmc_controller.vmc_size + self.vmc_controller.offset_reg[register_idx]
+            if new_first_cell != first_cell:
+                self.interpreter.unwatch_cells(range(first_cell, first_cell + num_size))
+                self.interpreter.watch_cells(range(new_first_cell, new_first_cell + num_size))
+            new_value = self.parse_num_unsigned(new_first_cell)
+            if value is not None and new_value != value:
+                self.triggered_watchpoints.append((f'r{register_idx}', value, new_value))
+            self.register_watchpoints[register_idx] = (new_first_cell, new_value)
+        self.registers_written = False
+
+    def reset_register_watchpoints(self):
+        """
+        Forget the values of the watched registers, which are read again at the next command boundary
+        """
+        for register_idx, (first_cell, value) in self.register_watchpoints.items():
+            self.register_watchpoints[register_idx] = (first_cell, None)
+        self.registers_written = bool(self.register_watchpoints)
+        if self.registers_written and self.at_command_boundary():
+            self.check_register_watchpoints()
+
+    def take_checkpoint(self):
+        self.checkpoint_steps.append(self.commands_executed)
+        self.checkpoints.append((self.flag_vmc_idx, self.interpreter.snapshot()))
+
+    def restore_checkpoint(self, checkpoint_idx):
+        self.flag_vmc_idx, state = self.checkpoints[checkpoint_idx]
+        self.interpreter.restore(state)
+        self.commands_executed = self.checkpoint_steps[checkpoint_idx]
+        self.execution_completed = False
+        for first_cell, (name, value) in self.watchpoints.items():
+            self.watchpoints[first_cell] = (name, self.parse_num_unsigned(first_cell))
+        self.reset_register_watchpoints()
+
+    def go_to(self, step):
+        """
+        Bring the execution to the state after step commands. Going back needs checkpoint_interval.
+        Flags that were already processed don't print again
+        """
+        if step < self.commands_executed:
+            if self.checkpoint_interval is None:
+                raise Exception("The debugger wasn't created with checkpoint_interval")
+            self.restore_checkpoint(bisect_right(self.checkpoint_steps, step) - 1)
+        while step > self.commands_executed and not self.execution_completed:
+            self.exec_commands(step - self.commands_executed)
+
+    def step_back(self, amount=1):
+        """
+        Go back amount commands
+        """
+        self.go_to(max(self.commands_executed - amount, 0))
+
+    def run_back_to_change(self, register_idx):
+        """
+        Go back to the start of the command after the last one that changed the value of register r<register_idx>.
+        Each interval between checkpoints is run again with a watchpoint on the register, from the last one back,
+        so the run only stops around writes to its cells, see watch_register.
+        An interval is run up to the first command boundary after its end, so a change across two intervals is found.
+        The other watchpoints are set again afterwards.
+        Return False and stay in place if the value didn't change since the start
+        """
+        watchpoints = dict(self.watchpoints)
+        register_watchpoints = list(self.register_watchpoints)
+        self.clear_watchpoints()
+        self.watch_register(register_idx)
+        start = self.commands_executed
+        end = start
+        last_change = None
+        checkpoint_idx = bisect_right(self.checkpoint_steps, end - 1) - 1
+        while checkpoint_idx >= 0 and last_change is None:
+            self.restore_checkpoint(checkpoint_idx)
+            while not self.execution_completed and self.commands_executed < start and (
+                    self.commands_executed < end or not self.at_command_boundary()):
+                if self.commands_executed < end:
+                    self.exec_commands(end - self.commands_executed)
+                else:
+                    self.registers_written = True
+                    self.exec_commands(start - self.commands_executed)
+                if self.triggered_watchpoints:
+                    last_change = self.commands_executed
+            end = self.checkpoint_steps[checkpoint_idx]
+            checkpoint_idx -= 1
+        self.go_to(start if last_change is None else last_change)
+        self.clear_watchpoints()
+        for first_cell, (name, value) in watchpoints.items():
+            self.add_watchpoint(name, first_cell)
+        for watched_idx in register_watchpoints:
+            self.watch_register(watched_idx)
+        return last_change is not None
+
+    def profile(self):
+        """
+        Return the Profile of the execution so far
+        """
+        if getattr(self.interpreter, 'op_counts', None) is None:
+            raise Exception("The debugger wasn't created with profile")
+        return Profile(self.interpreter.program, self.interpreter.op_counts, self.source_map)
+
+    def print_profile(self, limit=20):
+        print(self.profile().report(limit))
 
     def print_vmc_cell(self):
         """
@@ -34,16 +297,19 @@ class Debugger:
             print(f'{register.name}: {self.get_vmc_value(offset, as_signed_num=True)}')
         print()
 
-    def process_flag(self, flag):
+    def process_flag(self, flag, quiet=False):
         """
-        Process a debug flag
+        Process a debug flag. quiet skips the printing flags
         """
-        if flag.split()[0] == 'move_vmc':
-            self.vmc_idx += int(flag.split()[1])
-        elif flag.split()[0] == 'mem':
-            self.print_vmc_cell()
-        elif flag.split()[0] == 'print':
-            print(flag[flag.find(' ') + 1:])
+        flag_name = flag.split()[0]
+        if flag_name == 'move_vmc':
+            self.flag_vmc_idx += int(flag.split()[1])
+        elif flag_name == 'mem':
+            if not quiet:
+                self.print_vmc_cell()
+        elif flag_name == 'print':
+            if not quiet:
+                print(flag[flag.find(' ') + 1:])
         else:
             raise Exception("Unrecognized flag")
 
@@ -51,20 +317,90 @@ class Debugger:
         """
         Parse an unsigned num from the program's memory, starting at first_cell
         """
+        memory = self.interpreter.memory
+        cell_range = self.vmc_controller.cell_range
         result = 0
-        for i in range(self.vmc_controller.num_size):
-            mem_value = 0
-            if first_cell + i < len(self.interpreter.memory):
-                mem_value = self.interpreter.memory[first_cell + i]
-            result += mem_value * (self.vmc_controller.cell_range ** (self.vmc_controller.num_size - i - 1))
+        for cell in range(first_cell, first_cell + self.vmc_controller.num_size):
+            result = result * cell_range + (memory[cell] if cell < len(memory) else 0)
         return result
 
     def parse_num_signed(self, first_cell):
         unsigned_num = self.parse_num_unsigned(first_cell)
-        if unsigned_num >= (self.vmc_controller.cell_range ** self.vmc_controller.num_size) / 2:
-            return unsigned_num - self.vmc_controller.cell_range ** self.vmc_controller.num_size
+        num_range = self.vmc_controller.cell_range ** self.vmc_controller.num_size
+        if unsigned_num >= num_range / 2:
+            return unsigned_num - num_range
         return unsigned_num
 
+    def memory_cells(self, size):
+        """
+        Return the memory as a NumPy array of at least size cells, without copying array memory
+        """
+        memory = self.interpreter.memory
+        typecode = tape_typecode(self.vmc_controller.cell_range)
+        dtype = object if typecode is None else numpy.dtype(typecode)
+        if isinstance(memory, (bytearray, array)):
+            cells = numpy.frombuffer(memory, dtype=dtype)
+        elif isinstance(memory, PagedTape):
+            cells = numpy.zeros(len(memory), dtype=dtype)
+            for page_idx, page in memory.pages.items():
+                start = page_idx << PAGE_SHIFT
+                cells[start:start + len(page)] = page[:len(cells) - start]
+        else:
+            cells = numpy.array(memory, dtype=object)
+        if len(cells) < size:
+            cells = numpy.concatenate([cells, numpy.zeros(size - len(cells), dtype=dtype)])
+        return cells
+
+    def decode_numbers(self, offset, vmc_count=None, as_signed_num=False):
+        """
+        Decode the number at offset of the first vmc_count VMCs, all of the memory by default, into a NumPy array.
+        The digits are a strided view of the memory with a row per VMC, combined a column at a time.
+        Numbers are int64 when they fit, uint64 for unsigned numbers that fit, and Python ints otherwise
+        """
+        if numpy is None:
+            raise ImportError("Decoding numbers in bulk requires numpy")
+        vmc_size = self.vmc_controller.vmc_size
+        num_size = self.vmc_controller.num_size
+        cell_range = self.vmc_controller.cell_range
+        num_range = cell_range ** num_size
+        if vmc_count is None:
+            vmc_count = -(-len(self.interpreter.memory) // vmc_size)
+        digits = self.memory_cells(vmc_count * vmc_size)[:vmc_count * vmc_size].reshape(vmc_count, vmc_size)
+        digits = digits[:, offset:offset + num_size]
+        if num_range < 2 ** 63 or (num_range == 2 ** 63 and not as_signed_num):
+            dtype = numpy.int64
+        elif num_range == 2 ** 64 or (num_range < 2 ** 64 and not as_signed_num):
+            dtype = numpy.uint64
+        else:
+            dtype = object
+        numbers = digits[:, 0].astype(dtype)
+        for digit_idx in range(1, num_size):
+            numbers = numbers * cell_range + digits[:, digit_idx].astype(dtype)
+        if as_signed_num:
+            if dtype is numpy.uint64:
+                return numbers.view(numpy.int64)
+            return numpy.where(numbers >= num_range // 2, numbers - num_range, numbers)
+        return numbers
+
+    def get_heap(self, size=None, as_signed_num=False):
+        """
+        Return the values of memory addresses 0 to size, all of the memory by default, as a NumPy array
+        """
+        return self.decode_numbers(self.vmc_controller.offset_heap_value, size, as_signed_num)
+
+    def get_stack(self, as_signed_num=False):
+        """
+        Return the values pushed to the stack as a NumPy array, from the bottom of the stack
+        """
+        stack_size = self.get_vmc_value(self.vmc_controller.offset_stack_pointer)
+        return self.decode_numbers(self.vmc_controller.offset_stack_value, stack_size, as_signed_num)
+
+    def get_register_column(self, register_idx, as_signed_num=False):
+        """
+        Return the value of register r<register_idx> in every VMC of the memory as a NumPy array
+        """
+        return self.decode_numbers(self.vmc_controller.offset_reg[register_idx], None, as_signed_num)
+
     def get_memory(self, address, as_signed_num=False):
         """
         Return the value at a given memory address
@@ -80,5 +416,8 @@ class Debugger:
         return self.parse_num_signed(first_cell) if as_signed_num else self.parse_num_unsigned(first_cell)
 
     def full_debug_print(self):
-        print([self.get_memory(i, as_signed_num=True) for i in range(100)])
+        if numpy is not None:
+            print(self.get_heap(100, as_signed_num=True).tolist())
+        else:
+            print([self.get_memory(i, as_signed_num=True) for i in range(100)])
         self.print_vmc_cell()
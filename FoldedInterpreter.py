@@ -0,0 +1,374 @@
+from BrainfuckInterpreter import BrainfuckInterpreter, ExecutionStats
+from BrainfuckProgram import BrainfuckProgram, OP_ADD, OP_MOVE, OP_OPEN, OP_CLOSE, OP_OUTPUT, OP_INPUT, OP_FLAG, \
+    OP_CLEAR, OP_TRANSFER
+
+
+class FoldedInterpreter(BrainfuckInterpreter):
+    """
+    Runs the operations of a BrainfuckProgram instead of dispatching one character at a time.
+    Memory, output, debug flags and amounts of executed commands are the same as in BrainfuckInterpreter,
+    so execution can be stopped and resumed at any brainfuck command.
+    Recognized loops are run in a single step when the budget allows all of their commands,
+    otherwise they are entered like any other loop.
+    With collect_stats, a separate loop runs the code and counts the commands executed by each operation
+    in op_counts, so the main loop is the same whether stats are collected or not.
+    tracer gets the branch outcomes and input values of the execution, see Trace.TraceWriter.
+    Tracing runs in the same loop as collect_stats, and turns it on.
+    So do the cells given to watch_cells, where execution stops right after a command writes to one of them.
+    Runs of + and - on a watched cell, and recognized loops that write to one, go a command at a time
+    to stop at each write. With stop_at_breaks, execution also stops when it reaches a position given to break_at.
+    """
+
+    def __init__(self, code, cell_range, user_input="Hello World!", program=None, tracer=None, **options):
+        self.program = program if program is not None else BrainfuckProgram(code)
+        self.tracer = tracer
+        if tracer is not None:
+            options['collect_stats'] = True
+        super().__init__(code, cell_range, user_input, **options)
+        self.located_pointer = 0
+        self.located_op = 0
+        self.op_counts = [0] * len(self.program.ops) if self.stats is not None else None
+        self.watched_cells = set()
+        self.watch_hit = False
+        self.break_ops = set()
+        self.break_runs = {}
+        self.stop_at_breaks = False
+        self.break_hit = False
+
+    @classmethod
+    def from_file(cls, path, user_input="Hello World!", cell_range=None, **options):
+        """
+        Create an interpreter of a precompiled program, see BrainfuckProgram.save.
+        cell_range defaults to the one of the VMC layout saved by the compiler
+        """
+        program, code, metadata = BrainfuckProgram.load(path)
+        if cell_range is None:
+            cell_range = metadata['cell_range']
+        return cls(code, cell_range, user_input, program=program, **options)
+
+    def map_whiles(self):
+        return self.program.while_mapper()
+
+    def fork(self, user_input=None, output_stream=None):
+        forked = super().fork(user_input, output_stream)
+        if self.op_counts is not None:
+            forked.op_counts = self.op_counts[:]
+        forked.tracer = None
+        forked.watched_cells = set(self.watched_cells)
+        return forked
+
+    def count_ops(self):
+        """
+        Collect stats from here on if they weren't already, so exec_commands runs exec_counted
+        """
+        if self.stats is None:
+            self.stats = ExecutionStats()
+            self.op_counts = [0] * len(self.program.ops)
+            self.bind()
+
+    def watch_cells(self, cells):
+        """
+        Make exec_commands stop with watch_hit set right after a command writes to one of the memory cells.
+        Stats are collected from here on
+        """
+        self.count_ops()
+        self.watched_cells.update(cells)
+
+    def break_at(self, positions):
+        """
+        Make exec_commands stop with break_hit set when it reaches one of the code positions, after executing
+        at least one command, while stop_at_breaks is set. Stats are collected from here on
+        """
+        self.count_ops()
+        for position in positions:
+            op_idx, done = self.program.locate(position)
+            if op_idx == len(self.program.ops):
+                continue
+            if done == 0:
+                self.break_ops.add(op_idx)
+            else:
+                self.break_runs.setdefault(op_idx, []).append(done)
+        for offsets in self.break_runs.values():
+            offsets.sort()
+
+    def unwatch_cells(self, cells):
+        self.watched_cells.difference_update(cells)
+
+    def restore(self, state):
+        if self.tracer is not None:
+            raise Exception("A traced execution can't go back")
+        super().restore(state)
+
+    def flush(self):
+        super().flush()
+        if self.tracer is not None:
+            self.tracer.flush()
+
+    def get_stats(self):
+        stats = super().get_stats()
+        counts = dict.fromkeys(stats.instruction_counts, 0)
+        for position, count in zip(self.program.positions, self.op_counts):
+            if count:
+                counts[self.code[position]] += count
+        stats.instruction_counts = counts
+        stats.steps = sum(counts.values())
+        return stats
+
+    def locate_op(self):
+        """
+        Return the index of the operation at the instruction pointer,
+        and how many of its commands were already executed
+        """
+        if self.instruction_pointer == self.located_pointer:
+            return self.located_op, 0
+        return self.program.locate(self.instruction_pointer)
+
+    def exec_run(self, op_idx, amount):
+        """
+        Execute the first amount commands of the + - > < run at op_idx
+        """
+        op = self.program.ops[op_idx]
+        sign = 1 if self.program.args[op_idx] > 0 else -1
+        if op == OP_ADD:
+            self.memory[self.data_pointer] = (self.memory[self.data_pointer] + sign * amount) % self.cell_range
+        elif sign > 0:
+            self.data_pointer += amount
+            while self.data_pointer >= len(self.memory):
+                self.grow_memory()
+        else:
+            if self.data_pointer < amount:
+                self.instruction_pointer = self.program.positions[op_idx] + self.data_pointer
+                self.data_pointer = 0
+                raise Exception("Negative data pointer!")
+            self.data_pointer -= amount
+
+    def exec_commands(self, max_amount=1, stop_on_flag=False):
+        """
+        Execute at most max_amount commands. Return amount of commands executed
+        Also returns a list of debug flags passed.
+        If stop_on_flag, return right after passing a debug flag.
+        Stops before a , that waits for pushed input, see BrainfuckIO.InputBuffer
+        """
+        if self.op_counts is not None:
+            return self.exec_counted(max_amount, stop_on_flag)
+        self.own_memory()
+        program = self.program
+        ops, args, costs, positions, loops = program.ops, program.args, program.costs, program.positions, program.loops
+        op_count = len(ops)
+        debug_flags = []
+        budget = max_amount
+        op_idx, done = self.locate_op()
+        if op_idx < op_count and self.data_pointer >= len(self.memory):
+            self.grow_memory()
+        if done > 0 and budget > 0:
+            amount = min(costs[op_idx] - done, budget)
+            self.exec_run(op_idx, amount)
+            budget -= amount
+            if done + amount < costs[op_idx]:
+                self.instruction_pointer = positions[op_idx] + done + amount
+                return max_amount - budget, debug_flags
+            op_idx += 1
+        memory = self.memory
+        cell_range = self.cell_range
+        data_pointer = self.data_pointer
+        memory_size = len(memory)
+        while op_idx < op_count and budget > 0:
+            op = ops[op_idx]
+            if costs[op_idx] > budget:
+                self.data_pointer = data_pointer
+                self.exec_run(op_idx, budget)
+                self.instruction_pointer = positions[op_idx] + budget
+                return max_amount, debug_flags
+            if op == OP_MOVE:
+                data_pointer += args[op_idx]
+                if data_pointer >= memory_size:
+                    while data_pointer >= len(memory):
+                        self.grow_memory()
+                    memory_size = len(memory)
+                elif data_pointer < 0:
+                    self.data_pointer = data_pointer - args[op_idx]
+                    self.exec_run(op_idx, costs[op_idx])
+                budget -= costs[op_idx]
+                op_idx += 1
+            elif op == OP_ADD:
+                memory[data_pointer] = (memory[data_pointer] + args[op_idx]) % cell_range
+                budget -= costs[op_idx]
+                op_idx += 1
+            elif op == OP_OPEN:
+                budget -= 1
+                op_idx = op_idx + 1 if memory[data_pointer] else args[op_idx] + 1
+            elif op == OP_CLOSE:
+                budget -= 1
+                op_idx = args[op_idx] + 1 if memory[data_pointer] else op_idx + 1
+            elif op == OP_CLEAR or op == OP_TRANSFER:
+                loop_cell_delta, transfers, body_cost, min_offset, max_offset = loops[op_idx]
+                value = memory[data_pointer]
+                iterations = value if loop_cell_delta < 0 else (cell_range - value) % cell_range
+                loop_cost = 1 + iterations * (body_cost + 1)
+                if iterations == 0:
+                    budget -= 1
+                    op_idx = args[op_idx] + 1
+                elif loop_cost <= budget and data_pointer + min_offset >= 0:
+                    if data_pointer + max_offset >= memory_size:
+                        while data_pointer + max_offset >= len(memory):
+                            self.grow_memory()
+                        memory_size = len(memory)
+                    for target, delta in transfers:
+                        target += data_pointer
+                        memory[target] = (memory[target] + delta * iterations) % cell_range
+                    memory[data_pointer] = 0
+                    budget -= loop_cost
+                    op_idx = args[op_idx] + 1
+                else:
+                    budget -= 1
+                    op_idx += 1
+            elif op == OP_FLAG:
+                debug_flags.append(program.flags[args[op_idx]])
+                budget -= 1
+                op_idx += 1
+                if stop_on_flag:
+                    break
+            else:
+                self.data_pointer = data_pointer
+                self.instruction_pointer = positions[op_idx]
+                if op == OP_INPUT and self.input.is_pending():
+                    break
+                if op == OP_OUTPUT:
+                    self.print_cell()
+                elif op == OP_INPUT:
+                    self.input_cell()
+                else:
+                    raise Exception(f"Unrecognized symbol {args[op_idx]} in code")
+                budget -= 1
+                op_idx += 1
+        self.data_pointer = data_pointer
+        self.stop_at(op_idx)
+        return max_amount - budget, debug_flags
+
+    def stop_at(self, op_idx):
+        """
+        Point the instruction pointer to the operation at op_idx, the end of the program if it is past the last one
+        """
+        if op_idx < len(self.program.ops):
+            self.instruction_pointer = self.program.positions[op_idx]
+        else:
+            self.instruction_pointer = self.program.code_length
+            self.flush()
+        self.located_pointer = self.instruction_pointer
+        self.located_op = op_idx
+
+    def exec_counted(self, max_amount, stop_on_flag):
+        """
+        exec_commands that also counts the commands each operation executes in op_counts, and updates stats
+        """
+        self.own_memory()
+        program = self.program
+        ops, args, costs, positions, loops = program.ops, program.args, program.costs, program.positions, program.loops
+        op_counts = self.op_counts
+        stats = self.stats
+        tracer = self.tracer
+        watched = self.watched_cells
+        self.watch_hit = False
+        self.break_hit = False
+        break_ops = self.break_ops if self.stop_at_breaks else ()
+        break_runs = self.break_runs if self.stop_at_breaks else {}
+        debug_flags = []
+        budget = max_amount
+        op_idx, done = self.locate_op()
+        if op_idx < len(ops) and self.data_pointer >= len(self.memory):
+            self.grow_memory()
+        while op_idx < len(ops) and budget > 0:
+            if op_idx in break_ops and done == 0 and budget < max_amount:
+                self.break_hit = True
+                break
+            op = ops[op_idx]
+            if op == OP_ADD or op == OP_MOVE:
+                amount = min(costs[op_idx] - done, budget)
+                if op == OP_ADD and self.data_pointer in watched:
+                    amount = 1
+                for offset in break_runs.get(op_idx, ()):
+                    if offset > done:
+                        if offset - done <= amount:
+                            amount = offset - done
+                            self.break_hit = True
+                        break
+                self.exec_run(op_idx, amount)
+                op_counts[op_idx] += amount
+                budget -= amount
+                stats.peak_data_pointer = max(stats.peak_data_pointer, self.data_pointer)
+                self.watch_hit = op == OP_ADD and self.data_pointer in watched
+                if done + amount < costs[op_idx]:
+                    self.instruction_pointer = positions[op_idx] + done + amount
+                    return max_amount - budget, debug_flags
+                done = 0
+                op_idx += 1
+                if self.watch_hit:
+                    break
+                continue
+            value = self.memory[self.data_pointer]
+            if op == OP_OPEN or op == OP_CLOSE:
+                stats.loop_iterations += 1 if value else 0
+                if tracer is not None:
+                    tracer.branch(value != 0)
+                if op == OP_OPEN:
+                    next_idx = op_idx + 1 if value else args[op_idx] + 1
+                else:
+                    next_idx = args[op_idx] + 1 if value else op_idx + 1
+            elif op == OP_CLEAR or op == OP_TRANSFER:
+                loop_cell_delta, transfers, body_cost, min_offset, max_offset = loops[op_idx]
+                iterations = value if loop_cell_delta < 0 else (self.cell_range - value) % self.cell_range
+                loop_cost = 1 + iterations * (body_cost + 1)
+                if iterations == 0:
+                    next_idx = args[op_idx] + 1
+                    if tracer is not None:
+                        tracer.branch(False)
+                elif loop_cost <= budget and self.data_pointer + min_offset >= 0 and not (watched and (
+                        self.data_pointer in watched or
+                        any(self.data_pointer + target in watched for target, delta in transfers))):
+                    while self.data_pointer + max_offset >= len(self.memory):
+                        self.grow_memory()
+                    for target, delta in transfers:
+                        target += self.data_pointer
+                        self.memory[target] = (self.memory[target] + delta * iterations) % self.cell_range
+                    self.memory[self.data_pointer] = 0
+                    for body_idx in range(op_idx + 1, args[op_idx]):
+                        op_counts[body_idx] += iterations * costs[body_idx]
+                    op_counts[args[op_idx]] += iterations
+                    stats.loop_iterations += iterations
+                    stats.peak_data_pointer = max(stats.peak_data_pointer, self.data_pointer + max_offset)
+                    budget -= loop_cost - 1
+                    next_idx = args[op_idx] + 1
+                    if tracer is not None:
+                        tracer.branch(True, iterations)
+                        tracer.branch(False)
+                else:
+                    stats.loop_iterations += 1
+                    next_idx = op_idx + 1
+                    if tracer is not None:
+                        tracer.branch(True)
+            elif op == OP_FLAG:
+                debug_flags.append(program.flags[args[op_idx]])
+                next_idx = op_idx + 1
+            else:
+                self.instruction_pointer = positions[op_idx]
+                if op == OP_INPUT and self.input.is_pending():
+                    break
+                if op == OP_OUTPUT:
+                    self.print_cell()
+                elif op == OP_INPUT:
+                    consumed = self.input.consumed
+                    self.input_cell()
+                    if self.data_pointer in watched:
+                        self.watch_hit = True
+                    if tracer is not None:
+                        tracer.read(self.memory[self.data_pointer] if self.input.consumed > consumed else None)
+                else:
+                    raise Exception(f"Unrecognized symbol {args[op_idx]} in code")
+                next_idx = op_idx + 1
+            op_counts[op_idx] += 1
+            budget -= 1
+            op_idx = next_idx
+            if op == OP_FLAG and stop_on_flag or self.watch_hit:
+                break
+        self.stop_at(op_idx)
+        return max_amount - budget, debug_flags
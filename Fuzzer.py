@@ -0,0 +1,249 @@
+import random
+import sys
+from AsmInterpreter import AsmInterpreter
+from BrainfuckIO import EOF_ERROR, EOF_POLICIES
+from BrainfuckInterpreter import BrainfuckInterpreter
+from CodegenInterpreter import CodegenInterpreter
+from CommandType import CommandType
+from Debugger import Debugger
+from FoldedInterpreter import FoldedInterpreter
+from compiler import compile_code, parse_code
+
+ENGINES = (BrainfuckInterpreter, FoldedInterpreter, CodegenInterpreter)
+
+# (num_size, cell_range) pairs where every number, and so every address, stays small enough for brainfuck runs
+NUMBER_FORMATS = ((1, 2), (1, 3), (1, 10), (1, 16), (1, 256), (2, 3), (2, 10), (2, 16), (2, 64), (3, 2), (3, 10))
+
+
+class FuzzCase:
+    """
+    A program and the input it runs on. header holds the 4 integers of the VMC definition,
+    and commands the assembly lines after it
+    """
+
+    def __init__(self, header, commands, user_input='', eof_policy=EOF_ERROR):
+        self.header = list(header)
+        self.commands = list(commands)
+        self.user_input = user_input
+        self.eof_policy = eof_policy
+
+    @property
+    def source(self):
+        return '\n'.join([' '.join(str(value) for value in self.header)] + self.commands)
+
+    def replace(self, header=None, commands=None, user_input=None):
+        return FuzzCase(self.header if header is None else header, self.commands if commands is None else commands,
+                        self.user_input if user_input is None else user_input, self.eof_policy)
+
+    def __str__(self):
+        return f'# input {self.user_input!r}, eof policy {self.eof_policy}\n{self.source}'
+
+
+def random_immediate(rng, num_range):
+    """
+    A small number, a number around the wraparound points, or any number that fits
+    """
+    kind = rng.randrange(3)
+    if kind == 0:
+        return rng.randint(-3, 3)
+    if kind == 1:
+        return rng.choice((-num_range, 0, num_range)) + rng.randint(-2, 2)
+    return rng.randint(-num_range, num_range)
+
+
+def random_case(rng, max_commands=12):
+    """
+    A random program over every command type, with random number formats and register amounts
+    """
+    num_size, cell_range = rng.choice(NUMBER_FORMATS)
+    num_range = cell_range ** num_size
+    register_amount = rng.randint(1, 4)
+    labels = [f'l{idx}' for idx in range(rng.randint(0, 3))]
+    targets = labels + ['start', 'exit']
+    command_types = list(CommandType)
+    if not labels:
+        command_types.remove(CommandType.label)
+    commands = [f'label {label}' for label in labels]
+    for idx in range(rng.randint(1, max_commands)):
+        command_type = rng.choice(command_types)
+        operands = []
+        for kind in command_type.operand_kinds():
+            if kind == 'l':
+                operands.append(rng.choice(labels) if command_type == CommandType.label else rng.choice(targets))
+            elif kind == 'r' or rng.randrange(2):
+                operands.append(f'r{rng.randrange(register_amount)}')
+            else:
+                operands.append(str(random_immediate(rng, num_range)))
+        if command_type != CommandType.label:
+            commands.append(' '.join([command_type.name] + operands))
+    rng.shuffle(commands)
+    user_input = ''.join(chr(rng.randrange(256)) for idx in range(rng.randint(0, 3)))
+    return FuzzCase([num_size, cell_range, rng.randint(4, 10), register_amount], commands, user_input,
+                    rng.choice(EOF_POLICIES))
+
+
+def run_reference(case, max_commands):
+    """
+    Run the case on the AsmInterpreter. Return the interpreter and the exception that stopped it,
+    or None when the case isn't a valid program or doesn't end within max_commands
+    """
+    try:
+        interpreter = AsmInterpreter.from_source(case.source, case.user_input, eof_policy=case.eof_policy)
+    except Exception:
+        return None
+    try:
+        interpreter.exec_commands(max_commands)
+    except EOFError as e:
+        return interpreter, e
+    if not interpreter.execution_completed:
+        return None
+    return interpreter, None
+
+
+def compare(case, engines=ENGINES, max_steps=2 * 10 ** 6, max_commands=10 ** 4):
+    """
+    Compile the case and run it on each engine, at most max_steps brainfuck commands.
+    Return the differences of the registers, the stack pointer, the heap, the output and the errors
+    from the AsmInterpreter, or None when the case can't be checked: it isn't a valid program,
+    or a run doesn't end within the budgets
+    """
+    reference = run_reference(case, max_commands)
+    if reference is None:
+        return None
+    expected, expected_error = reference
+    try:
+        controller = parse_code(case.source)[0]
+        code, source_map = compile_code(case.source, with_source_map=True)
+    except Exception as e:
+        return [f'compilation raised {e!r}']
+    differences = []
+    for engine in engines:
+        debugger = Debugger(controller, code, interpreter_class=engine, source_map=source_map,
+                            user_input=case.user_input, eof_policy=case.eof_policy)
+        try:
+            debugger.exec_commands(max_steps)
+            error = None
+        except Exception as e:
+            error = e
+        if error is None and not debugger.execution_completed:
+            return None
+        if type(error) != type(expected_error):
+            differences.append(f'{engine.__name__} raised {error!r} instead of {expected_error!r}')
+            continue
+        if debugger.interpreter.code_output != expected.code_output:
+            differences.append(f'{engine.__name__} wrote {debugger.interpreter.code_output!r} '
+                               f'instead of {expected.code_output!r}')
+        if error is not None:
+            continue
+        registers = [debugger.get_vmc_value(offset) for offset in controller.offset_reg]
+        if registers != expected.registers:
+            differences.append(f'{engine.__name__} ended with registers {registers} instead of {expected.registers}')
+        stack_pointer = debugger.get_vmc_value(controller.offset_stack_pointer)
+        if stack_pointer != expected.stack_pointer:
+            differences.append(f'{engine.__name__} ended with stack pointer {stack_pointer} '
+                               f'instead of {expected.stack_pointer}')
+        vmc_count = min(-(-len(debugger.interpreter.memory) // controller.vmc_size), expected.num_range)
+        for address in sorted(set(range(vmc_count)) | set(expected.heap)):
+            value = debugger.get_memory(address) if address < vmc_count else 0
+            if value != expected.get_memory(address):
+                differences.append(f'{engine.__name__} ended with {value} at address {address} '
+                                   f'instead of {expected.get_memory(address)}')
+                break
+    return differences
+
+
+def smaller_immediates(text):
+    """
+    Yield simpler values of an immediate operand
+    """
+    value = int(text)
+    for smaller in (0, 1, value // 2, value - 1 if value > 0 else value + 1):
+        if abs(smaller) < abs(value) or (smaller == 1 and abs(value) > 1):
+            yield str(smaller)
+
+
+def shrink(case, is_failing):
+    """
+    Return the smallest case found that is_failing still holds for, by removing commands and input,
+    and by simplifying immediates and the VMC definition
+    """
+    changed = True
+    while changed:
+        changed = False
+        chunk_size = len(case.commands) // 2
+        while chunk_size >= 1:
+            start = 0
+            while start < len(case.commands):
+                candidate = case.replace(commands=case.commands[:start] + case.commands[start + chunk_size:])
+                if candidate.commands and is_failing(candidate):
+                    case = candidate
+                    changed = True
+                else:
+                    start += chunk_size
+            chunk_size //= 2
+        for command_idx, command in enumerate(case.commands):
+            parts = command.split()
+            for part_idx, part in enumerate(parts):
+                if part_idx == 0 or not part.lstrip('-').isdigit():
+                    continue
+                for smaller in smaller_immediates(part):
+                    commands = list(case.commands)
+                    commands[command_idx] = ' '.join(parts[:part_idx] + [smaller] + parts[part_idx + 1:])
+                    candidate = case.replace(commands=commands)
+                    if is_failing(candidate):
+                        case = candidate
+                        parts = commands[command_idx].split()
+                        changed = True
+                        break
+        for char_idx in range(len(case.user_input) - 1, -1, -1):
+            candidate = case.replace(user_input=case.user_input[:char_idx] + case.user_input[char_idx + 1:])
+            if is_failing(candidate):
+                case = candidate
+                changed = True
+        for header_idx, smaller in ((0, 1), (3, 1)):
+            if case.header[header_idx] > smaller:
+                header = list(case.header)
+                header[header_idx] = smaller
+                candidate = case.replace(header=header)
+                if is_failing(candidate):
+                    case = candidate
+                    changed = True
+    return case
+
+
+def fuzz(iterations, seed=None, engines=ENGINES, max_commands=12, report=None):
+    """
+    Check iterations random cases. Return the shrunk failing cases with their differences.
+    report is called with each of them as it is found
+    """
+    rng = random.Random(seed)
+    failures = []
+    for iteration in range(iterations):
+        case = random_case(rng, max_commands)
+        differences = compare(case, engines)
+        if not differences:
+            continue
+        case = shrink(case, lambda candidate: bool(compare(candidate, engines)))
+        failure = (case, compare(case, engines))
+        failures.append(failure)
+        if report is not None:
+            report(*failure)
+    return failures
+
+
+def print_failure(case, differences):
+    print(case)
+    for difference in differences:
+        print(f'# {difference}')
+    print()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        print(f'Usage {sys.argv[0]} [iterations] [seed]')
+        sys.exit(1)
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    found = fuzz(iterations, seed, report=print_failure)
+    print(f'{len(found)} failing cases in {iterations} programs')
+    sys.exit(1 if found else 0)
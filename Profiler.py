@@ -0,0 +1,110 @@
+from collections import Counter
+
+
+class Profile:
+    """
+    The commands executed by a FoldedInterpreter created with collect_stats, attributed to the assembly through
+    a SourceMap. Commands of folded runs are split between the entries their characters belong to.
+    Steps of code the compiler adds around the commands, which selects the next basic block to run,
+    are dispatch steps. Each label owns the basic blocks from the one it points to up to the next label's.
+    """
+
+    def __init__(self, program, op_counts, source_map):
+        self.source_map = source_map
+        self.entry_steps = [0] * len(source_map)
+        self.entry_runs = [0] * len(source_map)
+        for op_idx, count in enumerate(op_counts):
+            if count:
+                self.attribute_op(program, op_idx, count)
+        for entry_idx, bf_offset in enumerate(source_map.bf_offsets):
+            op_idx, index_in_op = program.locate(bf_offset)
+            if op_idx < len(op_counts):
+                self.entry_runs[entry_idx] = self.char_count(program, op_counts, op_idx, index_in_op)
+        self.total_steps = sum(self.entry_steps)
+        self.dispatch_steps = sum(steps for steps, command_type in zip(self.entry_steps, source_map.command_types)
+                                  if command_type is None)
+        self.line_steps = Counter()
+        self.type_steps = Counter()
+        for entry_idx, steps in enumerate(self.entry_steps):
+            if source_map.command_types[entry_idx] is not None:
+                self.line_steps[source_map.asm_lines[entry_idx]] += steps
+                self.type_steps[source_map.command_types[entry_idx]] += steps
+        self.label_steps, self.label_entries = self.attribute_labels()
+
+    @staticmethod
+    def char_count(program, op_counts, op_idx, index_in_op):
+        """
+        Return how many times the character index_in_op of the operation at op_idx was executed
+        """
+        cost = program.costs[op_idx]
+        return op_counts[op_idx] // cost + (1 if op_counts[op_idx] % cost > index_in_op else 0)
+
+    def attribute_op(self, program, op_idx, count):
+        """
+        Split the count of an operation between the entries of its characters.
+        Whole runs of the operation add to each entry, and the commands of a partial run go to the first characters
+        """
+        source_map = self.source_map
+        start = program.positions[op_idx]
+        end = start + program.costs[op_idx]
+        runs, remainder = divmod(count, program.costs[op_idx])
+        entry_idx = max(source_map.find(start), 0)
+        while start < end:
+            entry_end = end
+            if entry_idx + 1 < len(source_map):
+                entry_end = min(end, source_map.bf_offsets[entry_idx + 1])
+            length = entry_end - start
+            partial = min(remainder, length)
+            self.entry_steps[entry_idx] += runs * length + partial
+            remainder -= partial
+            start = entry_end
+            entry_idx += 1
+
+    def attribute_labels(self):
+        """
+        Return the steps spent in the basic blocks of each label and the amount of times each label's code started
+        """
+        source_map = self.source_map
+        labels = sorted(source_map.labels.items(), key=lambda label: label[1])
+        label_steps = Counter()
+        label_entries = Counter()
+        first_entries = set()
+        for entry_idx, command_type in enumerate(source_map.command_types):
+            basic_block_idx = source_map.basic_blocks[entry_idx]
+            if command_type is None or basic_block_idx in first_entries:
+                continue
+            first_entries.add(basic_block_idx)
+            for label, label_block in labels:
+                if label_block == basic_block_idx:
+                    label_entries[label] += self.entry_runs[entry_idx]
+        for entry_idx, steps in enumerate(self.entry_steps):
+            basic_block_idx = source_map.basic_blocks[entry_idx]
+            if source_map.command_types[entry_idx] is None or basic_block_idx is None:
+                continue
+            owner = None
+            for label, label_block in labels:
+                if label_block <= basic_block_idx:
+                    owner = label
+            if owner is not None:
+                label_steps[owner] += steps
+        return label_steps, label_entries
+
+    def report(self, limit=20):
+        """
+        Return the hot spot report as text
+        """
+        total = max(self.total_steps, 1)
+        instruction_steps = self.total_steps - self.dispatch_steps
+        lines = [f'Total steps: {self.total_steps}',
+                 f'Instructions: {instruction_steps} ({100 * instruction_steps / total:.1f}%)',
+                 f'Basic block dispatch: {self.dispatch_steps} ({100 * self.dispatch_steps / total:.1f}%)',
+                 '', 'Steps per line:']
+        for asm_line, steps in self.line_steps.most_common(limit):
+            lines.append(f'{asm_line:>8} {steps:>16} {100 * steps / total:6.1f}%')
+        lines += ['', 'Steps per label:']
+        for label, steps in self.label_steps.most_common(limit):
+            lines.append(f'{label:>20} {steps:>16} {100 * steps / total:6.1f}% {self.label_entries[label]:>10} entries')
+        lines += ['', 'Steps per command type:']
+        for command_type, steps in self.type_steps.most_common():
+            lines.append(f'{command_type.name:>20} {steps:>16} {100 * steps / total:6.1f}%')
+        return '\n'.join(lines)
@@ -0,0 +1,118 @@
+from bisect import bisect_left, bisect_right
+from CommandType import CommandType
+
+
+def source_map_path(bf_file):
+    """
+    The path of the source map sidecar of a compiled brainfuck file
+    """
+    return bf_file + '.map'
+
+
+class SourceMap:
+    """
+    Maps ranges of compiled brainfuck back to the assembly that produced them.
+    Entry k covers the code from bf_offsets[k] up to the next entry, and was compiled from the command at
+    asm_lines[k] (1 based) of type command_types[k] in basic block basic_blocks[k].
+    Code added by the compiler around the commands has no line or command type.
+    cur_offsets[k] is the data pointer at the start of the entry, relative to the start of the current VMC.
+    labels maps the labels of the assembly to the basic blocks they point to.
+    The compiled code moves to the VMC vmc_move_amounts[k] VMCs away at vmc_move_offsets[k],
+    where cur_offset drops by vmc_size times the amount without moving the data pointer.
+    """
+
+    def __init__(self):
+        self.bf_offsets = []
+        self.asm_lines = []
+        self.basic_blocks = []
+        self.command_types = []
+        self.cur_offsets = []
+        self.labels = {}
+        self.vmc_move_offsets = []
+        self.vmc_move_amounts = []
+
+    def __len__(self):
+        return len(self.bf_offsets)
+
+    def add(self, bf_offset, asm_line, basic_block_idx, command_type, cur_offset):
+        self.bf_offsets.append(bf_offset)
+        self.asm_lines.append(asm_line)
+        self.basic_blocks.append(basic_block_idx)
+        self.command_types.append(command_type)
+        self.cur_offsets.append(cur_offset)
+
+    def add_vmc_move(self, bf_offset, amount):
+        self.vmc_move_offsets.append(bf_offset)
+        self.vmc_move_amounts.append(amount)
+
+    def vmc_moves_between(self, start, end):
+        """
+        Return the sum of the VMC moves from bf offset start up to end, not including end
+        """
+        return sum(self.vmc_move_amounts[bisect_left(self.vmc_move_offsets, start):
+                                         bisect_left(self.vmc_move_offsets, end)])
+
+    def cur_offset_at(self, code, bf_offset, vmc_size):
+        """
+        Return the data pointer relative to the start of the current VMC when the compiled code is at bf_offset.
+        The cur_offset of the entry is followed through the > and < before bf_offset, and the VMC moves
+        """
+        entry_idx = max(self.find(bf_offset), 0)
+        start = self.bf_offsets[entry_idx]
+        cur_offset = self.cur_offsets[entry_idx] + code.count('>', start, bf_offset) - code.count('<', start, bf_offset)
+        return cur_offset - vmc_size * self.vmc_moves_between(start, bf_offset)
+
+    def entry(self, entry_idx):
+        """
+        Return (bf_offset, asm_line, basic_block_idx, command_type, cur_offset) of an entry
+        """
+        return (self.bf_offsets[entry_idx], self.asm_lines[entry_idx], self.basic_blocks[entry_idx],
+                self.command_types[entry_idx], self.cur_offsets[entry_idx])
+
+    def find(self, bf_offset):
+        """
+        Return the index of the entry containing bf_offset, or -1 if it is before the first entry
+        """
+        return bisect_right(self.bf_offsets, bf_offset) - 1
+
+    def lookup(self, bf_offset):
+        """
+        Return the entry containing bf_offset, or None
+        """
+        entry_idx = self.find(bf_offset)
+        return self.entry(entry_idx) if entry_idx >= 0 else None
+
+    def save(self, path):
+        """
+        Write the source map as a text file with an entry per line, followed by a line per label and per VMC move
+        """
+        with open(path, 'w') as f_out:
+            for entry_idx in range(len(self)):
+                bf_offset, asm_line, basic_block_idx, command_type, cur_offset = self.entry(entry_idx)
+                fields = (bf_offset, asm_line, basic_block_idx, command_type.name if command_type else None,
+                          cur_offset)
+                f_out.write(' '.join('-' if field is None else str(field) for field in fields) + '\n')
+            for label, basic_block_idx in self.labels.items():
+                f_out.write(f'label {label} {basic_block_idx}\n')
+            for bf_offset, amount in zip(self.vmc_move_offsets, self.vmc_move_amounts):
+                f_out.write(f'vmc_move {bf_offset} {amount}\n')
+
+    @staticmethod
+    def load(path):
+        source_map = SourceMap()
+        with open(path, 'r') as f_source:
+            for line in f_source:
+                if line.startswith('label '):
+                    label, basic_block_idx = line.split()[1:]
+                    source_map.labels[label] = int(basic_block_idx)
+                    continue
+                if line.startswith('vmc_move '):
+                    bf_offset, amount = line.split()[1:]
+                    source_map.add_vmc_move(int(bf_offset), int(amount))
+                    continue
+                bf_offset, asm_line, basic_block_idx, command_type, cur_offset = [
+                    None if field == '-' else field for field in line.split()]
+                source_map.add(int(bf_offset), None if asm_line is None else int(asm_line),
+                               None if basic_block_idx is None else int(basic_block_idx),
+                               None if command_type is None else CommandType[command_type], int(cur_offset))
+        return source_map
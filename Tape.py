@@ -0,0 +1,122 @@
+import struct
+from array import array
+
+PAGE_SHIFT = 12
+PAGE_SIZE = 1 << PAGE_SHIFT
+PAGE_MASK = PAGE_SIZE - 1
+POINTER_SIZE = struct.calcsize('P')
+
+
+def tape_typecode(cell_range):
+    """
+    Return the typecode of the smallest unsigned array type that holds values below cell_range,
+    or None if values don't fit in any array type
+    """
+    for typecode in ('B', 'H', 'I', 'L', 'Q'):
+        if cell_range <= 1 << (8 * array(typecode).itemsize):
+            return typecode
+    return None
+
+
+def new_page(cell_range):
+    typecode = tape_typecode(cell_range)
+    if typecode is None:
+        return [0] * PAGE_SIZE
+    return array(typecode, bytes(PAGE_SIZE * array(typecode).itemsize))
+
+
+class PagedTape:
+    """
+    Brainfuck memory split to pages of PAGE_SIZE cells, where a page is only allocated once a non zero value
+    is written to it. Reading from a missing page gives 0. Pages are arrays of the type chosen by tape_typecode.
+    Copies share their pages until one of them writes to a page.
+    """
+
+    def __init__(self, cell_range, size=0):
+        self.cell_range = cell_range
+        self.size = size
+        self.pages = {}
+        self.owned_pages = set()
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.size))]
+        page = self.pages.get(index >> PAGE_SHIFT)
+        return 0 if page is None else page[index & PAGE_MASK]
+
+    def __setitem__(self, index, value):
+        page_idx = index >> PAGE_SHIFT
+        if page_idx not in self.owned_pages:
+            if page_idx not in self.pages:
+                if value == 0:
+                    return
+                self.pages[page_idx] = new_page(self.cell_range)
+            else:
+                self.pages[page_idx] = self.pages[page_idx][:]
+            self.owned_pages.add(page_idx)
+        self.pages[page_idx][index & PAGE_MASK] = value
+
+    def grow(self, amount):
+        self.size += amount
+
+    def copy(self):
+        """
+        Return a copy of the tape. Pages are copied when they are written to
+        """
+        copied = PagedTape(self.cell_range, self.size)
+        copied.pages = dict(self.pages)
+        self.owned_pages = set()
+        return copied
+
+    def allocated_cells(self):
+        return len(self.pages) * PAGE_SIZE
+
+
+def new_tape(cell_range, paged=False):
+    """
+    Return an empty tape for cells of cell_range values: a bytearray for cell ranges up to 256,
+    an array of the smallest fitting unsigned type for larger ones, and a list past 64 bits
+    """
+    if paged:
+        return PagedTape(cell_range)
+    typecode = tape_typecode(cell_range)
+    if typecode == 'B':
+        return bytearray()
+    if typecode is not None:
+        return array(typecode)
+    return []
+
+
+def grow_tape(tape, amount):
+    """
+    Add amount zeroed cells to the end of the tape
+    """
+    if isinstance(tape, PagedTape):
+        tape.grow(amount)
+    elif isinstance(tape, bytearray):
+        tape += bytes(amount)
+    elif isinstance(tape, array):
+        tape.frombytes(bytes(amount * tape.itemsize))
+    else:
+        tape += [0] * amount
+
+
+def tape_bytes(tape):
+    """
+    Return the amount of bytes allocated for the cells of the tape, counting a pointer per cell of list tapes
+    """
+    if isinstance(tape, PagedTape):
+        typecode = tape_typecode(tape.cell_range)
+        return tape.allocated_cells() * (POINTER_SIZE if typecode is None else array(typecode).itemsize)
+    if isinstance(tape, array):
+        return len(tape) * tape.itemsize
+    if isinstance(tape, bytearray):
+        return len(tape)
+    return len(tape) * POINTER_SIZE
+
+
+def copy_tape(tape):
+    return tape.copy() if isinstance(tape, PagedTape) else tape[:]
@@ -0,0 +1,252 @@
+import hashlib
+from bisect import bisect_right
+from BrainfuckIO import EOF_ERROR, EOF_POLICIES
+from FoldedInterpreter import FoldedInterpreter
+
+TRACE_MAGIC = b'BFTRACE1'
+RECORD_NOT_TAKEN = 0  # a run of [ and ] that didn't jump into or back to the loop body
+RECORD_TAKEN = 1  # a run of [ and ] that entered the loop body
+RECORD_INPUT = 2  # a value read by , where the count is the value + 1, or 0 at the end of the input
+
+
+def code_hash(code):
+    return hashlib.sha256(code.encode()).digest()
+
+
+def encode_varint(value, output):
+    """
+    Append value to the bytearray output as an unsigned LEB128 varint
+    """
+    while value >= 0x80:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def read_varints(stream, buffer_size=65536):
+    """
+    Yield the varints of a binary stream until its end
+    """
+    value = 0
+    shift = 0
+    while True:
+        data = stream.read(buffer_size)
+        if not data:
+            return
+        for byte in data:
+            value |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+            else:
+                yield value
+                value = 0
+                shift = 0
+
+
+class TraceDivergence(Exception):
+    """
+    Raised when a replayed execution doesn't follow its trace
+    """
+
+
+class TraceWriter:
+    """
+    Streams the trace of an execution to a binary stream.
+    After a header of the cell range, eof policy and the code's hash, the trace is a list of varint records,
+    each holding (count << 2) | kind. Branch outcomes are run length encoded, so a loop of n iterations
+    takes two records however it was executed. Input values are kept in the order they were read.
+    """
+
+    def __init__(self, stream, code, cell_range, eof_policy=EOF_ERROR, buffer_size=65536):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.buffer = bytearray(TRACE_MAGIC)
+        encode_varint(cell_range, self.buffer)
+        encode_varint(EOF_POLICIES.index(eof_policy), self.buffer)
+        self.buffer += code_hash(code)
+        self.run_kind = RECORD_TAKEN
+        self.run_length = 0
+
+    def write_record(self, kind, count):
+        encode_varint((count << 2) | kind, self.buffer)
+        if len(self.buffer) >= self.buffer_size:
+            self.stream.write(self.buffer)
+            self.buffer = bytearray()
+
+    def end_run(self):
+        if self.run_length > 0:
+            self.write_record(self.run_kind, self.run_length)
+            self.run_length = 0
+
+    def branch(self, taken, count=1):
+        """
+        Record count outcomes of [ or ]
+        """
+        kind = RECORD_TAKEN if taken else RECORD_NOT_TAKEN
+        if kind != self.run_kind:
+            self.end_run()
+            self.run_kind = kind
+        self.run_length += count
+
+    def read(self, value):
+        """
+        Record a value read by , or None at the end of the input
+        """
+        self.end_run()
+        self.write_record(RECORD_INPUT, 0 if value is None else value + 1)
+
+    def flush(self):
+        self.end_run()
+        if self.buffer:
+            self.stream.write(self.buffer)
+            self.buffer = bytearray()
+        if hasattr(self.stream, 'flush'):
+            self.stream.flush()
+
+
+class TraceReader:
+    """
+    Reads the header and the records of a trace from a binary stream
+    """
+
+    def __init__(self, stream):
+        if stream.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise Exception("Not a brainfuck trace")
+        self.cell_range = next(read_varints(stream, 1))
+        self.eof_policy = EOF_POLICIES[next(read_varints(stream, 1))]
+        self.code_hash = stream.read(32)
+        self.stream = stream
+
+    def records(self):
+        """
+        Yield the (kind, count) records of the trace
+        """
+        for value in read_varints(self.stream):
+            yield value & 3, value >> 2
+
+
+class TraceChecker:
+    """
+    Takes the place of a TraceWriter to check that an execution follows a recorded trace
+    """
+
+    def __init__(self, reader):
+        self.records = reader.records()
+        self.run_kind = None
+        self.run_length = 0
+        self.branches = 0
+
+    def next_record(self, expected):
+        for kind, count in self.records:
+            if kind == RECORD_INPUT or count > 0:
+                return kind, count
+        raise TraceDivergence(f"The trace ended before {expected}")
+
+    def branch(self, taken, count=1):
+        kind = RECORD_TAKEN if taken else RECORD_NOT_TAKEN
+        while count > 0:
+            if self.run_length == 0:
+                self.run_kind, self.run_length = self.next_record(f"branch {self.branches}")
+                if self.run_kind == RECORD_INPUT:
+                    raise TraceDivergence(f"Branch {self.branches} was an input in the trace")
+            if self.run_kind != kind:
+                raise TraceDivergence(f"Branch {self.branches} went the other way in the trace")
+            amount = min(count, self.run_length)
+            self.run_length -= amount
+            self.branches += amount
+            count -= amount
+
+    def read(self, value):
+        if self.run_length > 0:
+            raise TraceDivergence(f"Branch {self.branches} was an input in the execution")
+        kind, count = self.next_record("an input")
+        if kind != RECORD_INPUT:
+            raise TraceDivergence(f"Branch {self.branches} was an input in the execution")
+        if count != (0 if value is None else value + 1):
+            raise TraceDivergence(f"Different input after branch {self.branches}")
+
+    def flush(self):
+        pass
+
+    def finish(self):
+        """
+        Check that nothing is left in the trace
+        """
+        if self.run_length > 0 or any(kind == RECORD_INPUT or count > 0 for kind, count in self.records):
+            raise TraceDivergence(f"The execution ended before the trace, after branch {self.branches}")
+
+
+class TraceReplay:
+    """
+    Reproduces a traced execution of code. The input is taken from the trace, and seek runs to any step,
+    from the closest snapshot taken every checkpoint_interval steps on the way
+    """
+
+    def __init__(self, code, trace_path, program=None, checkpoint_interval=10 ** 7):
+        self.code = code
+        self.trace_path = trace_path
+        self.checkpoint_interval = checkpoint_interval
+        with open(trace_path, 'rb') as f_trace:
+            reader = TraceReader(f_trace)
+            if reader.code_hash != code_hash(code):
+                raise Exception("The trace was recorded for a different code")
+            self.cell_range = reader.cell_range
+            self.eof_policy = reader.eof_policy
+            values = [count - 1 for kind, count in reader.records() if kind == RECORD_INPUT and count > 0]
+        self.user_input = ''.join(chr(value) for value in values)
+        self.interpreter = FoldedInterpreter(code, self.cell_range, self.user_input, program=program,
+                                             eof_policy=self.eof_policy)
+        self.steps = 0
+        self.checkpoint_steps = [0]
+        self.checkpoints = [self.interpreter.snapshot()]
+
+    def seek(self, step):
+        """
+        Bring the interpreter to the state after step commands. Return the amount of commands executed,
+        which is less than step if the program ended before
+        """
+        if step < self.steps:
+            checkpoint_idx = bisect_right(self.checkpoint_steps, step) - 1
+            self.interpreter.restore(self.checkpoints[checkpoint_idx])
+            self.steps = self.checkpoint_steps[checkpoint_idx]
+        while self.steps < step:
+            next_checkpoint = (self.steps // self.checkpoint_interval + 1) * self.checkpoint_interval
+            executed = self.interpreter.exec_commands(min(step, next_checkpoint) - self.steps)[0]
+            if executed == 0:
+                break
+            self.steps += executed
+            if self.steps == next_checkpoint and next_checkpoint > self.checkpoint_steps[-1]:
+                self.checkpoint_steps.append(self.steps)
+                self.checkpoints.append(self.interpreter.snapshot())
+        return self.steps
+
+    def verify(self):
+        """
+        Replay the whole execution and check it follows the branches of the trace.
+        Return None, or the amount of commands executed before the first difference
+        """
+        with open(self.trace_path, 'rb') as f_trace:
+            checker = TraceChecker(TraceReader(f_trace))
+            interpreter = FoldedInterpreter(self.code, self.cell_range, self.user_input, tracer=checker,
+                                            program=self.interpreter.program, eof_policy=self.eof_policy)
+            try:
+                while interpreter.exec_commands(10 ** 9)[0] > 0:
+                    pass
+                checker.finish()
+            except TraceDivergence:
+                return interpreter.get_stats().steps
+        return None
+
+
+def record_trace(code, cell_range, trace_path, user_input="Hello World!", max_amount=10 ** 12, **options):
+    """
+    Run code with a trace written to trace_path. Return the interpreter
+    """
+    with open(trace_path, 'wb') as f_trace:
+        tracer = TraceWriter(f_trace, code, cell_range, options.get('eof_policy', EOF_ERROR))
+        interpreter = FoldedInterpreter(code, cell_range, user_input, tracer=tracer, **options)
+        try:
+            interpreter.exec_commands(max_amount)
+        finally:
+            tracer.flush()
+    return interpreter
@@ -35,6 +35,20 @@ class VMCController:
         self.temp_allocator = TempAllocator(self.vmc_size, self.offset_temp)
         self.debug = debug
 
+    def layout(self):
+        """
+        Return the VMC layout as a dict that can be saved as JSON, see from_layout
+        """
+        return {'num_size': self.num_size, 'cell_range': self.cell_range, 'temp_amount': len(self.offset_temp),
+                'register_amount': len(self.offset_reg), 'debug': self.debug, 'vmc_size': self.vmc_size,
+                'register_offsets': {register.name: self.register_list.get_register_offset(register.name)
+                                     for register in self.register_list.register_list}}
+
+    @staticmethod
+    def from_layout(layout):
+        return VMCController(layout['num_size'], layout['cell_range'], layout['temp_amount'],
+                             layout['register_amount'], layout['debug'])
+
     def move_to_offset(self, offset):
         if self.cur_offset < offset:
             code = '>' * (offset - self.cur_offset)
@@ -134,10 +148,9 @@ class VMCController:
         return self.clear_byte(cell_offset) + self.increment_byte(cell_offset, value - self.cell_range)
 
     def set_num(self, cell_offset, value):
-        if value < 0:
-            value = self.cell_range ** self.num_size + value
+        value %= self.cell_range ** self.num_size
         code = [self.set_byte(cell_offset + i,
-                              (abs(value) // (self.cell_range ** (self.num_size - i - 1))) % self.cell_range)
+                              (value // (self.cell_range ** (self.num_size - i - 1))) % self.cell_range)
                 for i in range(self.num_size)]
         return ''.join(code)
 
@@ -1,9 +1,15 @@
+import re
 import sys
 from VMCController import VMCController
 from Debugger import Debugger
 from Command import Command
 from CommandType import CommandType
 from Operand import OperandType
+from BrainfuckProgram import BrainfuckProgram, precompiled_path
+from CBackend import generate_c
+from SourceMap import SourceMap, source_map_path
+
+VMC_MOVE_FLAG = re.compile(r'\{move_vmc (-?\d+)\}')
 
 
 def parse_vmc_definition(vmc_definition):
@@ -20,14 +26,14 @@ def parse_code(source):
     Returns the VMCController, a list of Command objects, and a label_to_basic_block dictionary
     """
     source_lines = [line.strip() for line in source.splitlines()]
-    commands_text = [(line[:line.find('#')] if '#' in line else line).rstrip() for line in source_lines if
-                     len(line) > 0 and line[0] != '#']
-    controller = parse_vmc_definition(commands_text[0])
+    commands_text = [((line[:line.find('#')] if '#' in line else line).rstrip(), line_number)
+                     for line_number, line in enumerate(source_lines, 1) if len(line) > 0 and line[0] != '#']
+    controller = parse_vmc_definition(commands_text[0][0])
     commands = []
     label_to_basic_block = {'start': 0}
     basic_block_idx = 0
-    for command_text in commands_text[1:]:
-        command = Command(command_text, controller.register_list, basic_block_idx)
+    for command_text, line_number in commands_text[1:]:
+        command = Command(command_text, controller.register_list, basic_block_idx, line_number)
         if command.command_type == CommandType.label:
             label_to_basic_block[command.operands[0].value] = basic_block_idx + 1  # Label points to next basic block
         if command.command_type.ends_basic_block():
@@ -39,32 +45,108 @@ def parse_code(source):
     return controller, commands, label_to_basic_block
 
 
-def compile_code(source):
+def compile_code(source, with_source_map=False):
     """
     Returns the compiled brainfuck of source
+    With with_source_map, returns the compiled brainfuck and its SourceMap.
+    The VMC moves of the source map are found from move_vmc flags, which are removed unless source asked for them
     """
     controller, commands, label_to_basic_block = parse_code(source)
-    if len(commands) == 0:
-        return ''
-    output = [controller.opening_code(), controller.basic_block_start()]
-    for command_idx, command in enumerate(commands):
-        output.append(command.compile(controller, label_to_basic_block))
-        if command_idx != len(commands) - 1 and command.command_type.ends_basic_block():
-            output.append(controller.basic_block_start())
-    if not commands[-1].command_type.ends_basic_block():
-        output.append(controller.basic_block_goto_next())
-    output.append(controller.closing_code())
+    keep_flags = controller.debug
+    if with_source_map:
+        controller.debug = True
+    source_map = SourceMap()
+    source_map.labels = dict(label_to_basic_block)
+    output = []
+    code_length = 0
+
+    def map_vmc_moves(code):
+        """
+        Add the move_vmc flags of code to the source map, and return the code without them if they weren't asked for
+        """
+        parts = []
+        position = code_length
+        last_end = 0
+        for match in VMC_MOVE_FLAG.finditer(code):
+            parts.append(code[last_end:match.start()])
+            position += match.start() - last_end
+            source_map.add_vmc_move(position, int(match.group(1)))
+            if keep_flags:
+                parts.append(match.group(0))
+                position += len(match.group(0))
+            last_end = match.end()
+        parts.append(code[last_end:])
+        return ''.join(parts)
+
+    def emit(code_function, command=None, basic_block_idx=None):
+        """
+        Append the code returned by code_function to the output, mapped to command or to basic_block_idx
+        """
+        nonlocal code_length
+        cur_offset = controller.cur_offset
+        code = code_function()
+        if with_source_map:
+            code = map_vmc_moves(code)
+        if len(code) == 0:
+            return
+        if command is None:
+            source_map.add(code_length, None, basic_block_idx, None, cur_offset)
+        else:
+            source_map.add(code_length, command.line_number, command.basic_block_idx, command.command_type,
+                           cur_offset)
+        output.append(code)
+        code_length += len(code)
+
+    if len(commands) > 0:
+        emit(controller.opening_code)
+        emit(controller.basic_block_start, basic_block_idx=0)
+        for command_idx, command in enumerate(commands):
+            emit(lambda: command.compile(controller, label_to_basic_block), command)
+            if command_idx != len(commands) - 1 and command.command_type.ends_basic_block():
+                emit(controller.basic_block_start, basic_block_idx=command.basic_block_idx + 1)
+        if not commands[-1].command_type.ends_basic_block():
+            emit(controller.basic_block_goto_next, basic_block_idx=commands[-1].basic_block_idx)
+        emit(controller.closing_code)
+    controller.debug = keep_flags
+    if with_source_map:
+        return ''.join(output), source_map
     return ''.join(output)
 
 
-def compile_file(source_file, output_file):
+def compile_c(source):
+    """
+    Returns the compiled program of source as C source code
+    """
+    controller = parse_code(source)[0]
+    return generate_c(BrainfuckProgram(compile_code(source)), controller)
+
+
+def compile_file(source_file, output_file, write_source_map=False, write_precompiled=False):
+    """
+    Compiles source_file to brainfuck, or to C when output_file ends with .c
+    With write_source_map, the source map of the brainfuck is saved next to it, see SourceMap.source_map_path
+    With write_precompiled, the decoded program is saved next to it with the VMC layout,
+    see BrainfuckProgram.precompiled_path
+    """
     with open(source_file, 'r') as f_source:
         source = f_source.read()
+    if output_file.endswith('.c'):
+        code = compile_c(source)
+    elif write_source_map:
+        code, source_map = compile_code(source, with_source_map=True)
+        source_map.save(source_map_path(output_file))
+    else:
+        code = compile_code(source)
     with open(output_file, 'w') as f_out:
-        f_out.write(compile_code(source))
+        f_out.write(code)
+    if write_precompiled and not output_file.endswith('.c'):
+        controller = parse_code(source)[0]
+        BrainfuckProgram(code).save(precompiled_path(output_file), code, controller.layout())
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print(f'Usage {sys.argv[0]} code_file output_file')
-    compile_file(sys.argv[1], sys.argv[2])
+    options = sys.argv[3:]
+    if len(sys.argv) < 3 or any(option not in ('--source-map', '--precompiled') for option in options):
+        print(f'Usage {sys.argv[0]} code_file output_file(.bf or .c) [--source-map] [--precompiled]')
+        sys.exit(1)
+    compile_file(sys.argv[1], sys.argv[2], '--source-map' in options, '--precompiled' in options)
@@ -0,0 +1,142 @@
+import argparse
+import sys
+import time
+from AsmInterpreter import AsmInterpreter
+from BrainfuckIO import EOF_ERROR, EOF_POLICIES
+from BrainfuckInterpreter import BrainfuckInterpreter
+from BrainfuckProgram import BrainfuckProgram
+from CodegenInterpreter import CodegenInterpreter
+from FoldedInterpreter import FoldedInterpreter
+from Tape import tape_bytes
+from compiler import compile_code, parse_code
+
+ENGINES = {'folded': FoldedInterpreter, 'simple': BrainfuckInterpreter, 'codegen': CodegenInterpreter,
+           'asm': AsmInterpreter}
+SLICE_STEPS = 100000  # commands executed between checks of the time limit
+
+
+class RunStats:
+    """
+    The outcome of run_file. error is the exception that stopped the run, or None when the program ended.
+    tape_size is the size in bytes of the tape, None for the asm engine
+    """
+
+    def __init__(self, steps, elapsed, tape_cells, tape_size=None, error=None):
+        self.steps = steps
+        self.elapsed = elapsed
+        self.tape_cells = tape_cells
+        self.tape_size = tape_size
+        self.error = error
+
+    def steps_per_second(self):
+        return self.steps / self.elapsed if self.elapsed > 0 else 0
+
+    def report(self):
+        return '\n'.join([f'Steps: {self.steps}',
+                          f'Time: {self.elapsed:.3f}s',
+                          f'Steps per second: {self.steps_per_second():,.0f}',
+                          f'Peak tape size: {self.tape_cells} cells'
+                          + ('' if self.tape_size is None else f', {self.tape_size} bytes')])
+
+
+def load_interpreter(path, engine, user_input, output_stream=None, cell_range=None, eof_policy=EOF_ERROR):
+    """
+    Create the engine's interpreter of an assembly source (.asm), a precompiled program (.bfc) or brainfuck.
+    Assembly is compiled unless the engine is asm. The cell range of brainfuck defaults to 256,
+    the others come with their own
+    """
+    options = {'output_stream': output_stream, 'eof_policy': eof_policy}
+    if path.endswith('.asm'):
+        with open(path, 'r') as f_source:
+            source = f_source.read()
+        if engine == 'asm':
+            return AsmInterpreter.from_source(source, user_input, **options)
+        code = compile_code(source)
+        cell_range = parse_code(source)[0].cell_range
+        program = None
+    elif engine == 'asm':
+        raise Exception("The asm engine only runs assembly sources")
+    elif path.endswith('.bfc'):
+        program, code, layout = BrainfuckProgram.load(path)
+        if cell_range is None:
+            cell_range = layout['cell_range']
+    else:
+        with open(path, 'r') as f_code:
+            code = f_code.read()
+        program = None
+        if cell_range is None:
+            cell_range = 256
+    if engine == 'simple':
+        return BrainfuckInterpreter(code, cell_range, user_input, **options)
+    return ENGINES[engine](code, cell_range, user_input, program=program, **options)
+
+
+def execution_completed(interpreter):
+    if isinstance(interpreter, AsmInterpreter):
+        return interpreter.execution_completed
+    return interpreter.instruction_pointer >= len(interpreter.code)
+
+
+def run_file(path, engine='folded', user_input='', output_stream=None, cell_range=None, eof_policy=EOF_ERROR,
+             max_steps=None, time_limit=None):
+    """
+    Run a program on user_input, writing its output to output_stream. See load_interpreter.
+    Stop with an error after max_steps commands, or after time_limit seconds.
+    The codegen engine runs the whole program in one call, so it only takes a step limit.
+    For the asm engine, steps count assembly commands and the tape cells are the heap and stack values
+    """
+    if engine == 'codegen' and time_limit is not None:
+        raise Exception("The codegen engine can't stop at a time limit")
+    interpreter = load_interpreter(path, engine, user_input, output_stream, cell_range, eof_policy)
+    start = time.monotonic()
+    deadline = None if time_limit is None else start + time_limit
+    steps = 0
+    error = None
+    try:
+        while not execution_completed(interpreter):
+            if max_steps is not None and steps >= max_steps:
+                raise Exception("Step limit exceeded")
+            if deadline is not None and time.monotonic() > deadline:
+                raise Exception("Time limit exceeded")
+            amount = 10 ** 18 if engine == 'codegen' else SLICE_STEPS
+            if max_steps is not None:
+                amount = min(amount, max_steps - steps)
+            executed = interpreter.exec_commands(amount)
+            steps += executed if engine == 'asm' else executed[0]
+    except Exception as e:
+        error = e
+    finally:
+        interpreter.flush()
+    elapsed = time.monotonic() - start
+    if engine == 'asm':
+        return RunStats(steps, elapsed, len(interpreter.heap) + len(interpreter.stack), error=error)
+    return RunStats(steps, elapsed, len(interpreter.memory), tape_bytes(interpreter.memory), error)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an assembly source, a brainfuck file or a precompiled program, "
+                                                 "reading stdin and writing stdout")
+    parser.add_argument('program', help="a .asm, .bf or .bfc file")
+    parser.add_argument('--engine', choices=list(ENGINES), default='folded')
+    parser.add_argument('--cell-range', type=int, help="the cell range of brainfuck files, 256 by default")
+    parser.add_argument('--eof', choices=EOF_POLICIES, default=EOF_ERROR, help="what input does at the end of stdin")
+    parser.add_argument('--max-steps', type=int)
+    parser.add_argument('--time-limit', type=float, help="in seconds")
+    parser.add_argument('--stats', action='store_true', help="print the time, speed and tape size to stderr")
+    args = parser.parse_args(argv)
+    try:
+        stats = run_file(args.program, args.engine, sys.stdin.buffer, sys.stdout.buffer, args.cell_range, args.eof,
+                         args.max_steps, args.time_limit)
+    except Exception as e:
+        print(f'Error: {e}', file=sys.stderr)
+        return 1
+    if args.stats:
+        print(stats.report(), file=sys.stderr)
+    if stats.error is not None:
+        print(f'Error: {stats.error}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
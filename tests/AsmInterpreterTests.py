@@ -0,0 +1,130 @@
+import unittest
+from compiler import compile_code, parse_code
+from AsmInterpreter import AsmInterpreter
+from BrainfuckIO import EOF_ZERO, EOF_UNCHANGED
+from Debugger import Debugger
+
+ARITHMETIC_SOURCE = """1 16 8 4
+                       mov r0 -3
+                       add r1 r0 7
+                       sub r2 r1 9
+                       neg r2
+                       binary_not r1
+                       add r3 200 -1
+                       less r0 r2 r1
+                       less r1 -1 2
+                       eq r2 r3 -9
+                       eq r3 17 1"""
+
+LOGIC_SOURCE = """2 16 8 4
+                  mov r0 35
+                  mov r1 1
+                  logic_not r0
+                  logic_not r1
+                  logic_and r2 r0 r0
+                  logic_or r3 r0 r1
+                  mov r1 16
+                  logic_and r1 r1 r0
+                  logic_not r3"""
+
+MEMORY_SOURCE = """1 8 8 3
+                   store 3 5
+                   store -1 r0
+                   load r1 11
+                   push 6
+                   push r1
+                   pop r2
+                   mov r0 7
+                   store r0 r2
+                   load r0 r0
+                   pop r1
+                   pop r1"""
+
+FLOW_SOURCE = """1 16 8 3
+                 mov r0 3
+                 label loop
+                 add r1 r1 r0
+                 call double
+                 sub r0 r0 1
+                 jnz r0 loop
+                 push 5
+                 ret
+                 mov r2 1
+                 jmp exit
+                 label done
+                 add r2 r2 2
+                 jmp exit
+                 label double
+                 add r1 r1 r1
+                 ret"""
+
+IO_SOURCE = """2 256 8 2
+               mov r0 300
+               read r0
+               write r0
+               read r1
+               add r1 r1 1
+               write r1
+               write 321"""
+
+
+class AsmInterpreterTests(unittest.TestCase):
+
+    def assertSameAsBrainfuck(self, source, user_input='', **options):
+        controller = parse_code(source)[0]
+        debugger = Debugger(controller, compile_code(source), user_input=user_input, **options)
+        debugger.exec_commands()
+        self.assertTrue(debugger.execution_completed)
+        interpreter = AsmInterpreter.from_source(source, user_input, **options)
+        interpreter.exec_commands(10 ** 6)
+        self.assertTrue(interpreter.execution_completed)
+        self.assertEqual(interpreter.registers, [debugger.get_vmc_value(offset) for offset in controller.offset_reg])
+        self.assertEqual(interpreter.stack_pointer, debugger.get_vmc_value(controller.offset_stack_pointer))
+        for address in interpreter.heap:
+            self.assertEqual(interpreter.get_memory(address), debugger.get_memory(address))
+        self.assertEqual(interpreter.code_output, debugger.interpreter.code_output)
+        return interpreter
+
+    def test_arithmetic(self):
+        interpreter = self.assertSameAsBrainfuck(ARITHMETIC_SOURCE)
+        self.assertEqual(interpreter.registers, [1, 1, 1, 0])
+
+    def test_logic(self):
+        self.assertSameAsBrainfuck(LOGIC_SOURCE)
+
+    def test_memory(self):
+        interpreter = self.assertSameAsBrainfuck(MEMORY_SOURCE)
+        self.assertEqual(interpreter.get_memory(7), 5)
+        self.assertEqual(interpreter.get_memory(-1), 5)
+        self.assertEqual(interpreter.stack_pointer, 7)
+
+    def test_flow(self):
+        interpreter = self.assertSameAsBrainfuck(FLOW_SOURCE)
+        self.assertEqual(interpreter.registers, [0, 2, 2])
+        self.assertEqual(interpreter.basic_block_idx, interpreter.label_to_basic_block['exit'])
+        self.assertEqual(interpreter.get_stack(), [])
+
+    def test_io(self):
+        self.assertSameAsBrainfuck(IO_SOURCE, 'ab')
+        self.assertSameAsBrainfuck(IO_SOURCE, 'a', eof_policy=EOF_ZERO)
+        interpreter = self.assertSameAsBrainfuck(IO_SOURCE, '', eof_policy=EOF_UNCHANGED)
+        self.assertEqual(interpreter.code_output, ',\x01A')
+        interpreter = AsmInterpreter.from_source(IO_SOURCE, 'a')
+        with self.assertRaises(EOFError):
+            interpreter.exec_commands(100)
+        self.assertEqual(interpreter.commands_executed, 3)
+        self.assertEqual(interpreter.code_output, 'a')
+
+    def test_examples(self):
+        for name, user_input in [('hello_world', ''), ('echo', 'echo\0'), ('fib_fast', '')]:
+            with open(f'examples/{name}.asm') as f_source:
+                self.assertSameAsBrainfuck(f_source.read(), user_input)
+        with open('examples/fib.asm') as f_source:
+            interpreter = AsmInterpreter.from_source(f_source.read())
+        while not interpreter.execution_completed:
+            interpreter.exec_commands(1000)
+        self.assertEqual(interpreter.get_register(0), 6765)
+
+
+if __name__ == '__main__':
+    unittest.main()
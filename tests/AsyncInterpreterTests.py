@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+from compiler import compile_code
+from AsyncInterpreter import AsyncInterpreter
+from FoldedInterpreter import FoldedInterpreter
+from BrainfuckIO import InputBuffer, InputPending, EOF_ZERO
+
+UPPERCASE_ECHO = compile_code("""1 256 6 2
+                                 read r0
+                                 eq r1 r0 0
+                                 jnz r1 exit
+                                 sub r0 r0 32
+                                 write r0
+                                 jmp start""")
+
+
+class BufferWriter:
+    """
+    The writing side of a StreamWriter, collecting the written bytes
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.drains = 0
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.drains += 1
+
+
+class AsyncInterpreterTests(unittest.TestCase):
+
+    def test_pushed_input(self):
+        input_buffer = InputBuffer(None)
+        self.assertTrue(input_buffer.is_pending())
+        with self.assertRaises(InputPending):
+            input_buffer.read_byte()
+        input_buffer.feed(b'ab')
+        self.assertEqual(input_buffer.read_byte(), 97)
+        input_buffer.feed(b'c')
+        input_buffer.close()
+        self.assertEqual([input_buffer.read_byte() for i in range(3)], [98, 99, None])
+
+    def test_folded_stops_at_pending_input(self):
+        interpreter = FoldedInterpreter('+.,.', 256, None)
+        self.assertEqual(interpreter.exec_commands(100), (2, []))
+        self.assertEqual(interpreter.exec_commands(100), (0, []))
+        self.assertEqual(interpreter.instruction_pointer, 2)
+        interpreter.input.feed(b'x')
+        self.assertEqual(interpreter.exec_commands(100), (2, []))
+        self.assertEqual(interpreter.code_output, '\x01x')
+
+    def test_interactive_sessions(self):
+        async def session(text, chunks):
+            reader = asyncio.StreamReader()
+            writer = BufferWriter()
+            interpreter = AsyncInterpreter(UPPERCASE_ECHO, 256, reader, writer, yield_steps=50)
+            task = asyncio.ensure_future(interpreter.run())
+            for k in range(0, len(text), chunks):
+                reader.feed_data(text[k:k + chunks])
+                await asyncio.sleep(0.001)
+            reader.feed_data(b'\0')
+            steps = await task
+            return bytes(writer.data), steps, writer.drains
+
+        async def sessions():
+            return await asyncio.gather(*(session(b'hello session %d' % k, k + 1) for k in range(20)))
+
+        results = asyncio.run(sessions())
+        for k, (output, steps, drains) in enumerate(results):
+            self.assertEqual(output, bytes((char - 32) % 256 for char in b'hello session %d' % k))
+            expected = FoldedInterpreter(UPPERCASE_ECHO, 256, 'hello session %d\0' % k)
+            self.assertEqual(steps, expected.exec_commands(10 ** 9)[0])
+            self.assertGreater(drains, 1)
+
+    def test_end_of_stream(self):
+        async def session():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'abc')
+            reader.feed_eof()
+            interpreter = AsyncInterpreter(',[.,]', 256, reader, eof_policy=EOF_ZERO)
+            await interpreter.run()
+            return interpreter.code_output
+
+        self.assertEqual(asyncio.run(session()), 'abc')
+
+    def test_step_limit(self):
+        interpreter = AsyncInterpreter('+[]', 256, None, yield_steps=7)
+        self.assertEqual(asyncio.run(interpreter.run(100)), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import unittest
+from compiler import compile_code
+from FoldedInterpreter import FoldedInterpreter
+from BatchInterpreter import BatchInterpreter, numpy
+from BrainfuckIO import EOF_ZERO, EOF_UNCHANGED
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+
+@unittest.skipUnless(numpy, 'numpy is not installed')
+class BatchInterpreterTests(unittest.TestCase):
+
+    def assertSameAsFolded(self, code, cell_range, user_inputs, **options):
+        batch = BatchInterpreter(code, cell_range, user_inputs, **options)
+        batch.run(10 ** 9)
+        for lane, user_input in enumerate(user_inputs):
+            expected = FoldedInterpreter(code, cell_range, user_input, program=batch.program, **options)
+            try:
+                amount = expected.exec_commands(10 ** 9)[0]
+            except Exception as e:
+                self.assertEqual(str(batch.errors[lane]), str(e))
+                continue
+            self.assertIsNone(batch.errors[lane])
+            self.assertEqual(batch.steps[lane], amount)
+            self.assertEqual(batch.code_outputs[lane], expected.code_output)
+            width = min(batch.memory.shape[1], len(expected.memory))
+            self.assertEqual(list(batch.memory[lane, :width]), list(expected.memory[:width]))
+            self.assertEqual(batch.data_pointers[lane], expected.data_pointer)
+
+    def test_echo(self):
+        with open(os.path.join(EXAMPLES_DIR, 'echo.asm')) as f:
+            code = compile_code(f.read())
+        user_inputs = ['\0', 'a\0', 'Hello World!\0', 'x' * 30 + '\0', 'missing end']
+        self.assertSameAsFolded(code, 256, user_inputs)
+        batch = BatchInterpreter(code, 256, user_inputs)
+        batch.run()
+        self.assertEqual(batch.code_outputs[:4], user_inputs[:4])
+        self.assertIsInstance(batch.errors[4], EOFError)
+
+    def test_diverging_loops(self):
+        code = ',[>+++[>+<-]>[-<+>]<<-]>.,[->>>+<<<]>>>>>+<<.' + '>' * 2000 + '+.'
+        user_inputs = ['\0\0', '\1\7', '\5\0', 'X\1']
+        self.assertSameAsFolded(code, 256, user_inputs)
+
+    def test_cell_ranges(self):
+        code = ',>-' + '-' * 20 + '[>++>+++<<+]>' + '+' * 300 + '[->+>>>-<<<<]>>>,[-<+>]'
+        for cell_range in (256, 65536, 2 ** 32, 2 ** 64, 7, 1000, 2 ** 40, 2 ** 70):
+            self.assertSameAsFolded(code, cell_range, ['ab', 'z\0', '\0'], eof_policy=EOF_ZERO)
+
+    def test_failures(self):
+        self.assertSameAsFolded('+,[<]', 256, ['', '\0', '\1'], eof_policy=EOF_UNCHANGED)
+        batch = BatchInterpreter('+[]', 256, ['', ''])
+        batch.run(1000)
+        self.assertEqual(str(batch.errors[0]), "Step limit exceeded")
+        self.assertFalse(batch.running.any())
+
+    def test_empty_program(self):
+        batch = BatchInterpreter('', 256, ['a', 'b'])
+        batch.run()
+        self.assertEqual(list(batch.steps), [0, 0])
+        self.assertEqual(batch.code_outputs, ['', ''])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from compiler import compile_code
+from BatchRunner import run_batch
+from FoldedInterpreter import FoldedInterpreter
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+
+class BatchRunnerTests(unittest.TestCase):
+
+    def test_outputs_in_input_order(self):
+        with open(os.path.join(EXAMPLES_DIR, 'echo.asm')) as f:
+            code = compile_code(f.read())
+        user_inputs = [f'input {k}\0' for k in range(40)] + ['no end']
+        results = run_batch(code, 256, user_inputs, workers=3)
+        self.assertEqual([result.output for result in results[:-1]], user_inputs[:-1])
+        for user_input, result in zip(user_inputs, results[:-1]):
+            expected = FoldedInterpreter(code, 256, user_input)
+            self.assertEqual(result.steps, expected.exec_commands(10 ** 9)[0])
+            self.assertIsNone(result.error)
+        self.assertIsInstance(results[-1].error, EOFError)
+        self.assertEqual(results[-1].output, 'no end')
+
+    def test_input_files_and_step_limit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, 'input')
+            path.write_bytes(b'file input\0')
+            results = run_batch(',[.,]', 256, [path, 'text\0'], max_steps=1000, workers=2)
+            self.assertEqual([result.output for result in results], ['file input', 'text'])
+            results = run_batch('+[]', 256, [''], max_steps=1000)
+            self.assertEqual(str(results[0].error), "Step limit exceeded")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import unittest
+from compiler import compile_code
+from BrainfuckInterpreter import BrainfuckInterpreter
+from FoldedInterpreter import FoldedInterpreter
+from CodegenInterpreter import CodegenInterpreter
+from BrainfuckIO import InputBuffer, OutputBuffer, EOF_ZERO, EOF_MAX, EOF_UNCHANGED
+
+
+class BrainfuckIOTests(unittest.TestCase):
+
+    def test_input_buffer_stream(self):
+        input_buffer = InputBuffer(io.BytesIO(b'abcdef'), buffer_size=4)
+        self.assertEqual([input_buffer.read_byte() for i in range(7)], [97, 98, 99, 100, 101, 102, None])
+        self.assertEqual(input_buffer.consumed, 6)
+
+    def test_input_buffer_string(self):
+        input_buffer = InputBuffer('aא')
+        self.assertEqual([input_buffer.read_byte() for i in range(3)], [97, 0x5d0, None])
+
+    def test_output_buffer_stream(self):
+        stream = io.BytesIO()
+        output_buffer = OutputBuffer(stream, buffer_size=2)
+        for value in b'xyz':
+            output_buffer.write(value)
+        self.assertEqual(stream.getvalue(), b'xy')
+        output_buffer.flush()
+        self.assertEqual(stream.getvalue(), b'xyz')
+        self.assertEqual(output_buffer.getvalue(), '')
+
+    def test_eof_policies(self):
+        for interpreter_class in (BrainfuckInterpreter, FoldedInterpreter, CodegenInterpreter):
+            interpreter = interpreter_class('+++,>,>+,', 256, 'a', eof_policy=EOF_ZERO)
+            interpreter.exec_commands(100)
+            self.assertEqual(list(interpreter.memory[:3]), [97, 0, 0])
+            interpreter = interpreter_class('+++,>,>+,', 256, 'a', eof_policy=EOF_MAX)
+            interpreter.exec_commands(100)
+            self.assertEqual(list(interpreter.memory[:3]), [97, 255, 255])
+            interpreter = interpreter_class('+++,>,>+,', 256, 'a', eof_policy=EOF_UNCHANGED)
+            interpreter.exec_commands(100)
+            self.assertEqual(list(interpreter.memory[:3]), [97, 0, 1])
+            interpreter = interpreter_class('+++,>,>+,', 256, 'a')
+            with self.assertRaises(EOFError):
+                interpreter.exec_commands(100)
+
+    def test_streams(self):
+        for interpreter_class in (BrainfuckInterpreter, FoldedInterpreter, CodegenInterpreter):
+            output_stream = io.BytesIO()
+            interpreter = interpreter_class(',[.,]', 256, io.BytesIO(b'streamed\xff'), output_stream=output_stream,
+                                            eof_policy=EOF_ZERO)
+            interpreter.exec_commands(1000)
+            self.assertEqual(output_stream.getvalue(), b'streamed\xff')
+
+    def test_echo_large_input(self):
+        code = compile_code("""1 256 14 1
+                               read r0
+                               write r0
+                               jnz r0 start""")
+        data = bytes(range(1, 256)) * 40
+        output_stream = io.BytesIO()
+        interpreter = FoldedInterpreter(code, 256, io.BytesIO(data), output_stream=output_stream, eof_policy=EOF_ZERO)
+        while interpreter.exec_commands(10 ** 7)[0] > 0:
+            pass
+        self.assertEqual(output_stream.getvalue(), data + b'\0')
+        self.assertEqual(interpreter.input_progress, len(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import unittest
+from compiler import compile_code
+from BrainfuckInterpreter import BrainfuckInterpreter
+from FoldedInterpreter import FoldedInterpreter
+from CodegenInterpreter import CodegenInterpreter
+from BrainfuckIO import EOF_ZERO
+
+PREFIX_THEN_ECHO = compile_code("""1 256 6 2
+                                   store 3 33
+                                   store 4 62
+                                   load r1 4
+                                   write r1
+                                   label loop
+                                   read r0
+                                   write r0
+                                   jnz r0 loop
+                                   load r1 3
+                                   write r1""")
+
+
+class BrainfuckInterpreterTests(unittest.TestCase):
+
+    def run_prefix(self, interpreter_class, user_input="abc\0"):
+        """
+        Run PREFIX_THEN_ECHO up to its first read
+        """
+        interpreter = interpreter_class(PREFIX_THEN_ECHO, 256, user_input)
+        while interpreter.input_progress == 0:
+            interpreter.exec_commands(1000)
+        return interpreter
+
+    def test_snapshot_restore(self):
+        for interpreter_class in (BrainfuckInterpreter, FoldedInterpreter):
+            interpreter = self.run_prefix(interpreter_class)
+            state = interpreter.snapshot()
+            interpreter.exec_commands(10 ** 9)
+            memory = list(interpreter.memory)
+            self.assertEqual(interpreter.code_output, '>abc\0!')
+            interpreter.restore(state)
+            self.assertEqual(interpreter.input_progress, 1)
+            self.assertEqual(interpreter.code_output, '>a')
+            interpreter.exec_commands(10 ** 9)
+            self.assertEqual(interpreter.code_output, '>abc\0!')
+            self.assertEqual(list(interpreter.memory), memory)
+
+    def test_state_not_changed_by_execution(self):
+        interpreter = self.run_prefix(FoldedInterpreter)
+        state = interpreter.snapshot()
+        memory = list(state.memory)
+        interpreter.exec_commands(10 ** 9)
+        self.assertEqual(list(state.memory), memory)
+        self.assertIsNot(interpreter.memory, state.memory)
+
+    def test_fork(self):
+        for interpreter_class in (BrainfuckInterpreter, FoldedInterpreter):
+            interpreter = self.run_prefix(interpreter_class)
+            forks = [interpreter.fork(user_input) for user_input in ("xy\0", "\0")]
+            self.assertIs(forks[0].memory, interpreter.memory)
+            output_stream = io.BytesIO()
+            forks.append(interpreter.fork(io.BytesIO(b'stream'), output_stream=output_stream))
+            forks[-1].eof_policy = EOF_ZERO
+            for forked in forks:
+                forked.exec_commands(10 ** 9)
+            self.assertEqual(forks[0].code_output, '>axy\0!')
+            self.assertEqual(forks[1].code_output, '>a\0!')
+            self.assertEqual(output_stream.getvalue(), b'stream\0!')
+            interpreter.exec_commands(10 ** 9)
+            self.assertEqual(interpreter.code_output, '>abc\0!')
+
+    def test_fork_codegen(self):
+        interpreter = CodegenInterpreter(PREFIX_THEN_ECHO, 256, "q\0")
+        forked = interpreter.fork("r\0")
+        interpreter.exec_commands(10 ** 9)
+        forked.exec_commands(10 ** 9)
+        self.assertEqual(interpreter.code_output, '>q\0!')
+        self.assertEqual(forked.code_output, '>r\0!')
+
+    def test_restore_streamed_output(self):
+        output_stream = io.BytesIO()
+        interpreter = BrainfuckInterpreter('+.+.', 256, output_stream=output_stream)
+        state = interpreter.snapshot()
+        interpreter.exec_commands(10 ** 9)
+        with self.assertRaises(Exception):
+            interpreter.restore(state)
+
+
+if __name__ == '__main__':
+    unittest.main()
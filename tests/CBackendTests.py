@@ -0,0 +1,80 @@
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from compiler import compile_c, compile_code
+from BrainfuckProgram import BrainfuckProgram
+from FoldedInterpreter import FoldedInterpreter
+from CBackend import CGenerator
+from BrainfuckIO import EOF_ZERO, EOF_MAX, EOF_UNCHANGED
+
+C_COMPILER = shutil.which('cc') or shutil.which('gcc')
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+
+@unittest.skipUnless(C_COMPILER, 'No C compiler found')
+class CBackendTests(unittest.TestCase):
+
+    def setUp(self):
+        self.build_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.build_dir.cleanup()
+
+    def run_c(self, c_source, user_input=b''):
+        """
+        Build c_source and run it, returning the completed process
+        """
+        source_file = os.path.join(self.build_dir.name, 'program.c')
+        binary_file = os.path.join(self.build_dir.name, 'program')
+        with open(source_file, 'w') as f:
+            f.write(c_source)
+        subprocess.run([C_COMPILER, '-O1', '-Wall', '-Werror', source_file, '-o', binary_file], check=True)
+        return subprocess.run([binary_file], input=user_input, capture_output=True, timeout=60)
+
+    def assertSameOutput(self, code, cell_range, user_input="Hello World!", **generator_options):
+        output_stream = io.BytesIO()
+        expected = FoldedInterpreter(code, cell_range, user_input, output_stream=output_stream, **generator_options)
+        expected.exec_commands(10 ** 9)
+        c_source = CGenerator(BrainfuckProgram(code), cell_range, 16, **generator_options).generate()
+        result = self.run_c(c_source, bytes(ord(char) for char in user_input))
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout, output_stream.getvalue())
+
+    def test_examples(self):
+        for name, user_input in (('hello_world', ''), ('echo', 'echo me\0'), ('fib_fast', '')):
+            with open(os.path.join(EXAMPLES_DIR, name + '.asm')) as f:
+                source = f.read()
+            expected = FoldedInterpreter(compile_code(source), 256, user_input)
+            expected.exec_commands(10 ** 10)
+            result = self.run_c(compile_c(source), user_input.encode())
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stdout.decode('latin-1'), expected.code_output)
+
+    def test_cell_ranges(self):
+        code = '->+>' + '-' * 20 + '[>++>+++<<+]>' + '+' * 300 + '[->+>>>-<<<<]<<.>.>.>.>.>.>.'
+        for cell_range in (256, 65536, 2 ** 32, 2 ** 64, 16, 2 ** 40, 7, 1000, 70000):
+            self.assertSameOutput(code, cell_range)
+
+    def test_io(self):
+        self.assertSameOutput(',[.,]', 256, user_input="Hello\0")
+        self.assertSameOutput(',.,.,.', 1000, user_input="a", eof_policy=EOF_MAX)
+        self.assertSameOutput('+++,.,.', 256, user_input="", eof_policy=EOF_UNCHANGED)
+        self.assertSameOutput('+++,.', 256, user_input="", eof_policy=EOF_ZERO)
+
+    def test_input_exhausted(self):
+        result = self.run_c(CGenerator(BrainfuckProgram('+.,.'), 256).generate())
+        self.assertNotEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, b'\x01')
+
+    def test_negative_data_pointer(self):
+        for code in ('+>><<<', '>+[-<<+>>]', '>+[<<+>>-]>>>[-]'):
+            result = self.run_c(CGenerator(BrainfuckProgram(code), 256).generate())
+            self.assertNotEqual(result.returncode, 0)
+            self.assertIn(b'Negative data pointer', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
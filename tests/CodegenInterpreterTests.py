@@ -0,0 +1,86 @@
+import unittest
+from compiler import compile_code
+from BrainfuckInterpreter import BrainfuckInterpreter
+from CodegenInterpreter import CodegenInterpreter
+from Debugger import Debugger
+from VMCController import VMCController
+
+
+class CodegenInterpreterTests(unittest.TestCase):
+
+    def assertSameExecution(self, code, cell_range, user_input="Hello World!"):
+        expected = BrainfuckInterpreter(code, cell_range, user_input)
+        expected_amount, expected_flags = expected.exec_commands(10 ** 9)
+        generated = CodegenInterpreter(code, cell_range, user_input)
+        amount, flags = generated.exec_commands(10 ** 9)
+        self.assertEqual(amount, expected_amount)
+        self.assertEqual(flags, expected_flags)
+        self.assertEqual(list(generated.memory[:len(expected.memory)]), list(expected.memory))
+        self.assertEqual(generated.data_pointer, expected.data_pointer)
+        self.assertEqual(generated.code_output, expected.code_output)
+        self.assertEqual(generated.exec_commands(10 ** 9), (0, []))
+
+    def test_folded_offsets(self):
+        self.assertSameExecution('+++>++>>-<<<[->+<]>>>.<.', 256)
+        self.assertSameExecution('-' * 300 + '>' + '+' * 600 + '<[>+<-]>>++[+]', 7)
+
+    def test_io(self):
+        self.assertSameExecution(',[.,]', 256, user_input="Hello\0")
+
+    def test_deep_nesting(self):
+        code = '+>+<' + '[>[-]<' * 40 + '-' + ']' * 40
+        self.assertSameExecution(code, 256)
+
+    def test_negative_data_pointer(self):
+        with self.assertRaises(Exception):
+            CodegenInterpreter('+>><<<', 256).exec_commands(100)
+        for code in ('+.<', '>+<-<', ',>+[-<+>]<<', '>>-----,<<++++[[-<+>]]', '>>+++<<+[->>[<<<+>>>-]<<]'):
+            expected = BrainfuckInterpreter(code, 65536, 'a')
+            generated = CodegenInterpreter(code, 65536, 'a')
+            for interpreter in (expected, generated):
+                with self.assertRaises(Exception):
+                    interpreter.exec_commands(100)
+            self.assertEqual(list(generated.memory[:len(expected.memory)]), list(expected.memory))
+            self.assertEqual(generated.data_pointer, expected.data_pointer)
+            self.assertEqual(generated.code_output, expected.code_output)
+
+    def test_step_limit(self):
+        interpreter = CodegenInterpreter('+[]', 256)
+        amount, flags = interpreter.exec_commands(1000)
+        self.assertTrue(interpreter.limit_exceeded)
+        self.assertGreater(amount, 1000)
+        with self.assertRaises(Exception):
+            interpreter.exec_commands(1000)
+
+    def test_compiled_program(self):
+        code = compile_code("""4 256 14 2 True
+                               store 0 72
+                               store 1 105
+                               mov r0 0
+                               label loop
+                               load r1 r0
+                               write r1
+                               add r0 r0 1
+                               less r1 r0 2
+                               jnz r1 loop""")
+        self.assertSameExecution(code, 256)
+
+    def test_debugger_on_result(self):
+        code = compile_code("""4 256 14 5 True
+                               mov r0 2
+                               mov r1 -9999
+                               store r0 r1
+                               load r2 r0""")
+        controller = VMCController(4, 256, 14, 5)
+        debugger = Debugger(controller, code, interpreter_class=CodegenInterpreter)
+        debugger.exec_commands(10000000)
+        self.assertTrue(debugger.execution_completed)
+        self.assertEqual(debugger.get_memory(2, as_signed_num=True), -9999)
+        self.assertEqual(debugger.get_vmc_value(controller.offset_reg[2], as_signed_num=True), -9999)
+        for code in ('+{mem}>+', '+{print here}'):
+            with self.assertRaises(Exception):
+                Debugger(VMCController(1, 256, 1, 1), code, interpreter_class=CodegenInterpreter)
+
+
+if __name__ == '__main__':
+    unittest.main()
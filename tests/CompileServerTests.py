@@ -0,0 +1,85 @@
+import json
+import threading
+import unittest
+import urllib.request
+from urllib.error import HTTPError
+from CompileServer import make_server, run_program, source_key, LRUCache
+from compiler import compile_code
+
+HELLO = """1 256 6 2
+           write 72
+           write 105"""
+
+ECHO = """1 256 6 2
+          read r0
+          write r0
+          jnz r0 start"""
+
+FOREVER = """1 256 6 1
+             jmp start"""
+
+
+class CompileServerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server(0, workers=2, cache_size=2, time_limit=1)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.service.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+
+    def post(self, **request):
+        url = f'http://127.0.0.1:{self.server.server_port}/'
+        data = json.dumps(request).encode()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, data)) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            return json.loads(e.read())
+
+    def test_run_and_cache(self):
+        first = self.post(source=ECHO, input='cached?\0')
+        second = self.post(source=ECHO, input='again\0')
+        self.assertEqual((first['output'], first['error']), ('cached?\0', None))
+        self.assertEqual((second['output'], second['error']), ('again\0', None))
+        self.assertTrue(second['cached'])
+        self.assertGreater(second['steps'], 0)
+
+    def test_limits(self):
+        result = self.post(source=FOREVER, max_steps=10000)
+        self.assertEqual(result['error'], 'Step limit exceeded')
+        self.assertEqual(result['steps'], 10000)
+        result = self.post(source=FOREVER, max_steps=10 ** 12)
+        self.assertEqual(result['error'], 'Time limit exceeded')
+        result = self.post(source=ECHO, input='no end')
+        self.assertEqual(result['error'], 'Input exhausted')
+
+    def test_bad_requests(self):
+        self.assertIn('error', self.post(source='1 256 6 2\nnot_a_command r0'))
+        self.assertIn('error', self.post(input='no source'))
+        self.assertEqual(self.post(source=HELLO)['output'], 'Hi')
+
+    def test_worker_cache(self):
+        key = source_key(HELLO)
+        self.assertIsNone(run_program(key, 256, '', 1000, 1))
+        code = compile_code(HELLO)
+        self.assertEqual(run_program(key, 256, '', 1000, 1, code)['output'], 'Hi')
+        self.assertEqual(run_program(key, 256, '', 1000, 1)['output'], 'Hi')
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,296 @@
+import contextlib
+import io
+import unittest
+from compiler import compile_code, parse_code
+from Debugger import Debugger, numpy
+from VMCController import VMCController
+
+SOURCE = """2 256 8 3 True
+            mov r0 5
+            label loop
+            add r1 r1 r0
+            sub r0 r0 1
+            jnz r0 loop
+            mov r2 7
+            call work
+            jmp exit
+            label work
+            mov r1 3
+            ret"""
+
+HEAP_SOURCE = """2 256 8 2
+                 mov r0 3
+                 label loop
+                 store 5 r0
+                 sub r0 r0 1
+                 jnz r0 loop
+                 store 6 9"""
+
+
+class DebuggerTests(unittest.TestCase):
+
+    def run_to(self, step):
+        debugger = Debugger(parse_code(SOURCE)[0], compile_code(SOURCE))
+        debugger.exec_commands(step)
+        return debugger
+
+    def assertSameState(self, debugger, expected):
+        self.assertEqual(debugger.commands_executed, expected.commands_executed)
+        self.assertEqual(debugger.vmc_idx, expected.vmc_idx)
+        self.assertEqual(debugger.interpreter.data_pointer, expected.interpreter.data_pointer)
+        self.assertEqual(debugger.interpreter.instruction_pointer, expected.interpreter.instruction_pointer)
+        size = len(expected.interpreter.memory)
+        self.assertEqual(list(debugger.interpreter.memory[:size]), list(expected.interpreter.memory))
+
+    def test_go_back(self):
+        debugger = Debugger(parse_code(SOURCE)[0], compile_code(SOURCE), checkpoint_interval=500)
+        debugger.exec_commands()
+        total = debugger.commands_executed
+        self.assertGreater(len(debugger.checkpoints), 3)
+        for step in [total - 1, 1200, 7, 1201, 0, total // 2]:
+            debugger.go_to(step)
+            self.assertFalse(debugger.execution_completed)
+            self.assertSameState(debugger, self.run_to(step))
+        debugger.step_back(3)
+        self.assertSameState(debugger, self.run_to(total // 2 - 3))
+        debugger.exec_commands()
+        self.assertTrue(debugger.execution_completed)
+        self.assertEqual(debugger.commands_executed, total)
+
+    def test_run_back_to_change(self):
+        controller = parse_code(SOURCE)[0]
+        code, source_map = compile_code(SOURCE, with_source_map=True)
+        debugger = Debugger(controller, code, source_map=source_map, checkpoint_interval=300)
+        debugger.exec_commands()
+        change_steps = self.register_change_steps(SOURCE, 1)
+        r1 = controller.offset_reg[1]
+        self.assertEqual(debugger.get_vmc_value(r1), 3)
+        self.assertTrue(debugger.run_back_to_change(1))
+        self.assertEqual(debugger.commands_executed, change_steps[-1])
+        self.assertEqual(debugger.get_vmc_value(r1), 3)
+        self.assertSameState(debugger, self.run_to(change_steps[-1]))
+        for change_step in reversed(change_steps[:-1]):
+            debugger.step_back(1)
+            self.assertTrue(debugger.run_back_to_change(1))
+            self.assertEqual(debugger.commands_executed, change_step)
+        debugger.step_back(1)
+        self.assertFalse(debugger.run_back_to_change(1))
+        self.assertEqual(debugger.commands_executed, change_steps[0] - 1)
+        with self.assertRaises(Exception):
+            Debugger(controller, code, checkpoint_interval=300).run_back_to_change(1)
+
+    def test_run_back_in_batches(self):
+        code, source_map = compile_code(SOURCE, with_source_map=True)
+        debugger = Debugger(parse_code(SOURCE)[0], code, source_map=source_map, checkpoint_interval=5000)
+        debugger.exec_commands()
+        total = debugger.commands_executed
+        exec_commands = debugger.interpreter.exec_commands
+        calls = []
+
+        def counted_exec_commands(*args, **kwargs):
+            calls.append(args)
+            return exec_commands(*args, **kwargs)
+
+        debugger.interpreter.exec_commands = counted_exec_commands
+        self.assertTrue(debugger.run_back_to_change(2))
+        self.assertEqual(debugger.commands_executed, self.register_change_steps(SOURCE, 2)[-1])
+        self.assertLess(len(calls), total // 100)
+
+    def test_run_back_over_vmc_moves(self):
+        source = """2 256 8 3
+                    mov r1 42
+                    mov r0 3
+                    store r0 7
+                    load r2 r0"""
+        code, source_map = compile_code(source, with_source_map=True)
+        debugger = Debugger(parse_code(source)[0], code, source_map=source_map, checkpoint_interval=5000)
+        debugger.exec_commands()
+        self.assertTrue(debugger.run_back_to_change(1))
+        self.assertEqual(debugger.commands_executed, self.register_change_steps(source, 1)[-1])
+        self.assertEqual(source_map.lookup(debugger.interpreter.instruction_pointer)[1], 3)
+
+    def test_flags_print_once(self):
+        code = '+{print first}>+<[->+<]{print second}'
+        debugger = Debugger(VMCController(1, 256, 1, 1), code, checkpoint_interval=2)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            debugger.exec_commands()
+            debugger.go_to(1)
+            debugger.exec_commands()
+        self.assertEqual(output.getvalue(), 'first\nsecond\n')
+
+    def test_locate_vmc(self):
+        source = """2 256 8 2 True
+                    store 2 5
+                    load r0 2
+                    store 1 r0"""
+        controller = parse_code(source)[0]
+        code, source_map = compile_code(source, with_source_map=True)
+        debugger = Debugger(controller, code, source_map=source_map)
+        visited = set()
+        while not debugger.execution_completed:
+            self.assertEqual(debugger.locate_vmc(), debugger.flag_vmc_idx)
+            visited.add(debugger.flag_vmc_idx)
+            debugger.exec_commands(1)
+        self.assertEqual(visited, {0, 1, 2})
+        debugger = Debugger(VMCController(2, 256, 8, 2), code)
+        while not debugger.execution_completed:
+            self.assertEqual(debugger.vmc_idx, debugger.flag_vmc_idx)
+            debugger.exec_commands(1)
+
+    def test_locate_vmc_release(self):
+        controller = parse_code(HEAP_SOURCE)[0]
+        self.assertFalse(controller.debug)
+        code, source_map = compile_code(HEAP_SOURCE, with_source_map=True)
+        self.assertEqual(code, compile_code(HEAP_SOURCE))
+        self.assertNotIn('{', code)
+        debugger = Debugger(controller, code, source_map=source_map)
+        entry_starts = set(source_map.bf_offsets)
+        visited = set()
+        while not debugger.execution_completed:
+            if debugger.interpreter.instruction_pointer in entry_starts:
+                vmc_idx = debugger.vmc_idx
+                visited.add(vmc_idx)
+                self.assertEqual(debugger.get_vmc_value(controller.offset_cell_index), vmc_idx)
+            debugger.exec_commands(1)
+        self.assertGreater(len(visited), 2)
+        self.assertEqual(debugger.get_vmc_value(controller.offset_reg[0]), 0)
+        self.assertEqual(debugger.get_memory(6), 9)
+
+    def change_steps(self, source, first_cell):
+        """
+        The steps after which the number at first_cell changes, found by decoding it after every command
+        """
+        debugger = Debugger(parse_code(source)[0], compile_code(source))
+        value = debugger.parse_num_unsigned(first_cell)
+        steps = []
+        while not debugger.execution_completed:
+            debugger.exec_commands(1)
+            new_value = debugger.parse_num_unsigned(first_cell)
+            if new_value != value:
+                steps.append(debugger.commands_executed)
+            value = new_value
+        return steps
+
+    def run_watched(self, debugger):
+        """
+        Run to completion, returning the steps where a watchpoint triggered and the changes
+        """
+        steps = []
+        changes = []
+        while True:
+            debugger.exec_commands()
+            if debugger.execution_completed:
+                return steps, changes
+            steps.append(debugger.commands_executed)
+            changes += debugger.triggered_watchpoints
+
+    def register_change_steps(self, source, register_idx):
+        """
+        The steps at the start of the commands after ones that changed a register,
+        found by decoding it at every command boundary
+        """
+        code, source_map = compile_code(source, with_source_map=True)
+        debugger = Debugger(parse_code(source)[0], code, source_map=source_map)
+        offset = debugger.vmc_controller.offset_reg[register_idx]
+        value = debugger.get_vmc_value(offset)
+        steps = []
+        while not debugger.execution_completed:
+            debugger.exec_commands(1)
+            if debugger.at_command_boundary():
+                new_value = debugger.get_vmc_value(offset)
+                if new_value != value:
+                    steps.append(debugger.commands_executed)
+                value = new_value
+        return steps
+
+    def test_watch_register(self):
+        controller = parse_code(SOURCE)[0]
+        code, source_map = compile_code(SOURCE, with_source_map=True)
+        debugger = Debugger(controller, code, source_map=source_map)
+        debugger.watch_register(1)
+        steps, changes = self.run_watched(debugger)
+        self.assertEqual(steps, self.register_change_steps(SOURCE, 1))
+        self.assertEqual({name for name, old_value, new_value in changes}, {'r1'})
+        self.assertEqual([new_value for name, old_value, new_value in changes], [5, 9, 12, 14, 15, 3])
+        with self.assertRaises(Exception):
+            Debugger(controller, code).watch_register(1)
+
+    def test_watch_register_across_vmcs(self):
+        for header in ("2 256 8 3 True", "2 256 8 3"):
+            source = header + """
+                     mov r1 42
+                     mov r0 3
+                     store r0 7
+                     load r2 r0
+                     add r1 r1 1
+                     store 1 r1"""
+            code, source_map = compile_code(source, with_source_map=True)
+            debugger = Debugger(parse_code(source)[0], code, source_map=source_map, checkpoint_interval=5000)
+            while source_map.lookup(debugger.interpreter.instruction_pointer)[1] != 3:
+                debugger.exec_commands(1)
+            debugger.watch_register(1)
+            debugger.exec_commands()
+            self.assertEqual(debugger.triggered_watchpoints, [('r1', 42, 43)])
+            self.assertEqual(source_map.lookup(debugger.interpreter.instruction_pointer)[1], 7)
+            self.assertEqual(debugger.vmc_idx, 3)
+            debugger.go_to(debugger.commands_executed // 2)
+            self.assertEqual(self.run_watched(debugger)[1], [('r1', 42, 43)])
+
+    def test_watch_memory(self):
+        controller = parse_code(HEAP_SOURCE)[0]
+        debugger = Debugger(controller, compile_code(HEAP_SOURCE))
+        debugger.watch_memory(5)
+        steps, changes = self.run_watched(debugger)
+        first_cell = 5 * controller.vmc_size + controller.offset_heap_value
+        self.assertEqual(steps, self.change_steps(HEAP_SOURCE, first_cell))
+        self.assertEqual({name for name, old_value, new_value in changes}, {'memory 5'})
+        self.assertLessEqual({3, 2}, {new_value for name, old_value, new_value in changes})
+        self.assertEqual(changes[-1][2], 1)
+        self.assertEqual(debugger.get_memory(6), 9)
+        debugger.clear_watchpoints()
+        self.assertEqual(debugger.interpreter.watched_cells, set())
+
+    def test_go_back_needs_checkpoints(self):
+        debugger = self.run_to(100)
+        with self.assertRaises(Exception):
+            debugger.step_back()
+
+    def assertBulkDecoding(self, header, **interpreter_options):
+        source = header + """
+                 store 0 7
+                 store 3 -5
+                 store 9 123
+                 push 11
+                 push -2
+                 push 4
+                 pop r1
+                 mov r0 -1"""
+        controller = parse_code(source)[0]
+        debugger = Debugger(controller, compile_code(source), **interpreter_options)
+        debugger.exec_commands()
+        for as_signed_num in (False, True):
+            heap = debugger.get_heap(12, as_signed_num)
+            self.assertEqual(heap.tolist(), [debugger.get_memory(address, as_signed_num) for address in range(12)])
+            stack = debugger.get_stack(as_signed_num)
+            stack_cells = [controller.vmc_size * idx + controller.offset_stack_value for idx in range(2)]
+            self.assertEqual(stack.tolist(), [debugger.parse_num_signed(cell) if as_signed_num else
+                                              debugger.parse_num_unsigned(cell) for cell in stack_cells])
+            column = debugger.get_register_column(0, as_signed_num)
+            self.assertEqual(len(column), -(-len(debugger.interpreter.memory) // controller.vmc_size))
+            self.assertEqual(column[debugger.vmc_idx], debugger.get_vmc_value(controller.offset_reg[0], as_signed_num))
+        self.assertEqual(debugger.get_heap(10, as_signed_num=True)[[0, 3, 9]].tolist(), [7, -5, 123])
+        self.assertEqual(debugger.get_stack(as_signed_num=True).tolist(), [11, -2])
+
+    @unittest.skipUnless(numpy, 'numpy is not installed')
+    def test_bulk_decoding(self):
+        self.assertBulkDecoding("2 256 8 2 True")
+        self.assertBulkDecoding("2 256 8 2 True", paged_memory=True)
+        self.assertBulkDecoding("8 256 8 2 True")
+        self.assertBulkDecoding("3 65536 8 2 True")
+        self.assertBulkDecoding("2 100 8 2 True")
+        self.assertBulkDecoding("7 512 20 2 True")
+
+
+if __name__ == '__main__':
+    unittest.main()
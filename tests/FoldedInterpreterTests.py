@@ -0,0 +1,167 @@
+import unittest
+from compiler import compile_code
+from BrainfuckInterpreter import BrainfuckInterpreter
+from FoldedInterpreter import FoldedInterpreter
+from Debugger import Debugger
+from VMCController import VMCController
+from BrainfuckProgram import BrainfuckProgram, OP_ADD, OP_MOVE, OP_OPEN, OP_CLOSE, OP_CLEAR, OP_TRANSFER
+
+
+def run_in_chunks(interpreter, chunk_sizes):
+    """
+    Run interpreter to completion, cycling through chunk_sizes as the amount of commands per call
+    Returns the total amount of commands executed and the debug flags passed
+    """
+    total = 0
+    flags = []
+    chunk_idx = 0
+    while True:
+        amount, new_flags = interpreter.exec_commands(chunk_sizes[chunk_idx % len(chunk_sizes)])
+        chunk_idx += 1
+        total += amount
+        flags += new_flags
+        if amount == 0:
+            return total, flags
+
+
+class FoldedInterpreterTests(unittest.TestCase):
+
+    def assertSameExecution(self, code, cell_range, chunk_sizes, user_input="Hello World!"):
+        expected = BrainfuckInterpreter(code, cell_range, user_input)
+        expected_total, expected_flags = run_in_chunks(expected, [10 ** 9])
+        folded = FoldedInterpreter(code, cell_range, user_input)
+        total, flags = run_in_chunks(folded, chunk_sizes)
+        self.assertEqual(total, expected_total)
+        self.assertEqual(flags, expected_flags)
+        self.assertEqual(list(folded.memory[:len(expected.memory)]), list(expected.memory))
+        self.assertEqual(folded.data_pointer, expected.data_pointer)
+        self.assertEqual(folded.code_output, expected.code_output)
+
+    def test_decode_folds_runs(self):
+        program = BrainfuckProgram('+++>>[-<]{mem}')
+        self.assertEqual(program.ops[:5], [OP_ADD, OP_MOVE, OP_OPEN, OP_ADD, OP_MOVE])
+        self.assertEqual(program.args[:2], [3, 2])
+        self.assertEqual(program.args[2], 5)
+        self.assertEqual(program.ops[5], OP_CLOSE)
+        self.assertEqual(program.args[5], 2)
+        self.assertEqual(program.flags, ['mem'])
+        self.assertEqual(program.while_mapper(), {5: 8, 8: 5})
+
+    def test_recognize_loops(self):
+        program = BrainfuckProgram('[-]>[->>+<+<]>[+>[-]<]>[->+<<]')
+        self.assertEqual(program.ops[0], OP_CLEAR)
+        self.assertEqual(program.ops[4], OP_TRANSFER)
+        self.assertEqual(program.loops[4], (-1, ((2, 1), (1, 1)), 7, 0, 2))
+        self.assertEqual(program.ops[13], OP_OPEN)
+        self.assertEqual(program.ops[16], OP_CLEAR)
+        self.assertEqual(program.ops[22], OP_OPEN)
+
+    def test_recognized_loops_execution(self):
+        code = '+' * 200 + '[->+>+++<<]>[-<+>]+[+]>>>' + '+' * 5 + '[-<<<+>>>]<<<[->>+<<]'
+        self.assertSameExecution(code, 256, [10 ** 9])
+        self.assertSameExecution(code, 256, [1, 3, 100, 7])
+        self.assertSameExecution(code, 7, [10 ** 9])
+        interpreter = FoldedInterpreter('+++[-<+>]', 256)
+        with self.assertRaises(Exception):
+            interpreter.exec_commands(100)
+        self.assertEqual(interpreter.instruction_pointer, 5)
+
+    def test_unbalanced_brackets(self):
+        with self.assertRaises(Exception):
+            FoldedInterpreter('[[]', 256)
+        with self.assertRaises(Exception):
+            FoldedInterpreter('[]]', 256)
+
+    def test_wraparound(self):
+        self.assertSameExecution('-' * 300 + '>' + '+' * 600, 256, [10 ** 9])
+        self.assertSameExecution('-' * 300 + '>' + '+' * 600, 7, [10 ** 9])
+
+    def test_negative_data_pointer(self):
+        interpreter = FoldedInterpreter('>><<<+', 256)
+        with self.assertRaises(Exception):
+            interpreter.exec_commands(100)
+        self.assertEqual(interpreter.data_pointer, 0)
+        self.assertEqual(interpreter.instruction_pointer, 4)
+
+    def test_io(self):
+        code = ',[.,]'
+        self.assertSameExecution(code, 256, [10 ** 9], user_input="Hello\0")
+        self.assertSameExecution(code, 256, [1, 2, 3], user_input="Hello\0")
+
+    def test_compiled_program_single_steps(self):
+        code = compile_code("""2 256 6 2 True
+                               mov r0 3
+                               store 1 r0
+                               load r1 1
+                               write r1""")
+        self.assertSameExecution(code, 256, [1])
+
+    def test_compiled_program_chunks(self):
+        code = compile_code("""4 256 14 2
+                               store 0 72
+                               store 1 105
+                               mov r0 0
+                               label loop
+                               load r1 r0
+                               write r1
+                               add r0 r0 1
+                               less r1 r0 2
+                               jnz r1 loop""")
+        self.assertSameExecution(code, 256, [10 ** 9])
+        self.assertSameExecution(code, 256, [7, 1, 1000, 3, 55])
+
+    def test_stop_on_flag(self):
+        for interpreter_class in (BrainfuckInterpreter, FoldedInterpreter):
+            interpreter = interpreter_class('++{a}+[-{b}]', 256)
+            self.assertEqual(interpreter.exec_commands(100, stop_on_flag=True), (3, ['a']))
+            self.assertEqual(interpreter.exec_commands(100, stop_on_flag=True), (4, ['b']))
+            self.assertEqual(interpreter.exec_commands(100, stop_on_flag=True), (3, ['b']))
+
+    def assertSameStats(self, code, cell_range, chunk_sizes, user_input="Hello World!"):
+        expected = BrainfuckInterpreter(code, cell_range, user_input, collect_stats=True)
+        expected_total = run_in_chunks(expected, [10 ** 9])[0]
+        folded = FoldedInterpreter(code, cell_range, user_input, collect_stats=True)
+        self.assertEqual(run_in_chunks(folded, chunk_sizes)[0], expected_total)
+        self.assertEqual(list(folded.memory[:len(expected.memory)]), list(expected.memory))
+        self.assertEqual(folded.code_output, expected.code_output)
+        expected_stats, stats = expected.get_stats(), folded.get_stats()
+        self.assertEqual(stats.steps, expected_total)
+        self.assertEqual(vars(stats), vars(expected_stats))
+
+    def test_execution_stats(self):
+        code = compile_code("""2 256 6 2 True
+                               read r0
+                               store 1 r0
+                               load r1 1
+                               write r1""")
+        for chunk_sizes in ([10 ** 9], [1], [7, 1, 1000, 3, 55]):
+            self.assertSameStats(code, 256, chunk_sizes)
+            self.assertSameStats('+++[>++[->+>+<<]<-]>>>>>' + '>' * 30 + '<' * 30 + '{x}.,.', 256, chunk_sizes)
+        stats = FoldedInterpreter('+++[>++<-]>>{a}.,', 256, 'in', collect_stats=True)
+        stats.exec_commands(100)
+        stats = stats.get_stats()
+        self.assertEqual(stats.instruction_counts, {'+': 9, '-': 3, '>': 5, '<': 3, '[': 1, ']': 3, '.': 1, ',': 1,
+                                                    '{': 1})
+        self.assertEqual((stats.steps, stats.loop_iterations, stats.peak_data_pointer), (27, 3, 2))
+        self.assertEqual((stats.bytes_read, stats.bytes_written, stats.tape_bytes), (1, 1, 10000))
+        with self.assertRaises(Exception):
+            FoldedInterpreter('+', 256).get_stats()
+
+    def test_debugger_engines(self):
+        code = compile_code("""4 256 14 5 True
+                               mov r0 2
+                               store r0 7
+                               load r1 r0""")
+        controller = VMCController(4, 256, 14, 5)
+        debuggers = [Debugger(controller, code, interpreter_class) for interpreter_class in
+                     (BrainfuckInterpreter, FoldedInterpreter)]
+        for debugger in debuggers:
+            debugger.exec_commands(10000000)
+            self.assertTrue(debugger.execution_completed)
+            self.assertEqual(debugger.get_vmc_value(controller.offset_reg[1]), 7)
+        self.assertEqual(debuggers[0].commands_executed, debuggers[1].commands_executed)
+        self.assertEqual(debuggers[0].vmc_idx, debuggers[1].vmc_idx)
+
+
+if __name__ == '__main__':
+    unittest.main()
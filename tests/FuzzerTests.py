@@ -0,0 +1,55 @@
+import random
+import unittest
+from AsmInterpreter import AsmInterpreter
+from BrainfuckInterpreter import BrainfuckInterpreter
+from BrainfuckIO import EOF_ZERO
+from compiler import compile_code
+from Fuzzer import FuzzCase, random_case, compare, shrink, fuzz
+
+
+class WrongOutputInterpreter(BrainfuckInterpreter):
+    """
+    Writes every value plus one
+    """
+
+    def print_cell(self):
+        self.output.write(self.memory[self.data_pointer] + 1)
+        self.instruction_pointer += 1
+
+
+class FuzzerTests(unittest.TestCase):
+
+    def test_random_cases(self):
+        rng = random.Random(0)
+        for idx in range(200):
+            case = random_case(rng)
+            AsmInterpreter.from_source(case.source)
+            compile_code(case.source)
+
+    def test_engines_agree(self):
+        self.assertEqual(fuzz(15, seed=1), [])
+
+    def test_immediate_wraparound(self):
+        case = FuzzCase([1, 10, 4, 2], ['mov r0 -11', 'add r1 r0 -23', 'write -250'])
+        self.assertEqual(compare(case), [])
+
+    def test_finds_and_shrinks(self):
+        failures = fuzz(20, seed=2, engines=[WrongOutputInterpreter])
+        self.assertGreater(len(failures), 0)
+        for case, differences in failures:
+            self.assertEqual(len(case.commands), 1)
+            self.assertTrue(case.commands[0].startswith('write'))
+            self.assertIn('WrongOutputInterpreter wrote', differences[0])
+
+    def test_shrink(self):
+        case = FuzzCase([2, 16, 8, 3], ['mov r0 5', 'neg r1', 'add r2 r0 -200', 'write r1', 'push 77'], 'abc',
+                        EOF_ZERO)
+        shrunk = shrink(case, lambda candidate: any(command.startswith('add') and int(command.split()[-1]) < -10
+                                                     for command in candidate.commands))
+        self.assertEqual(shrunk.commands, ['add r2 r0 -11'])
+        self.assertEqual(shrunk.header, [1, 16, 8, 1])
+        self.assertEqual(shrunk.user_input, '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from compiler import compile_code, compile_file, parse_code
+from BrainfuckProgram import BrainfuckProgram, precompiled_path
+from Debugger import Debugger
+from FoldedInterpreter import FoldedInterpreter
+from VMCController import VMCController
+
+
+class PrecompiledTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertSameProgram(self, loaded, program):
+        self.assertEqual(loaded.ops, program.ops)
+        self.assertEqual(loaded.args, program.args)
+        self.assertEqual(loaded.costs, program.costs)
+        self.assertEqual(loaded.positions, program.positions)
+        self.assertEqual(loaded.loops, program.loops)
+        self.assertEqual(loaded.flags, program.flags)
+        self.assertEqual(loaded.code_length, program.code_length)
+        self.assertEqual(loaded.while_mapper(), program.while_mapper())
+
+    def test_round_trip(self):
+        path = os.path.join(self.directory.name, 'program.bfc')
+        for code in ['', '+++[->++>+<<]>.,[-]x{print ä}<<[[>]+<-]', compile_code('2 256 8 2\nmov r0 5')]:
+            program = BrainfuckProgram(code)
+            program.save(path, code, {'cell_range': 256})
+            loaded, loaded_code, metadata = BrainfuckProgram.load(path)
+            self.assertSameProgram(loaded, program)
+            self.assertEqual(loaded_code, code)
+            self.assertEqual(metadata, {'cell_range': 256})
+
+    def test_compile_file(self):
+        source_file = os.path.join(self.directory.name, 'echo.asm')
+        output_file = os.path.join(self.directory.name, 'echo.bf')
+        with open('examples/echo.asm') as f_source, open(source_file, 'w') as f_out:
+            source = f_source.read()
+            f_out.write(source)
+        compile_file(source_file, output_file, write_precompiled=True)
+        self.assertEqual(precompiled_path(output_file), os.path.join(self.directory.name, 'echo.bfc'))
+        with open(output_file) as f_code:
+            code = f_code.read()
+        program, loaded_code, layout = BrainfuckProgram.load(precompiled_path(output_file))
+        self.assertEqual(loaded_code, code)
+        self.assertSameProgram(program, BrainfuckProgram(code))
+        controller = parse_code(source)[0]
+        self.assertEqual(layout, controller.layout())
+        self.assertEqual(VMCController.from_layout(layout).layout(), layout)
+        self.assertEqual(layout['register_offsets']['r0'], controller.offset_reg[0])
+
+        interpreter = FoldedInterpreter.from_file(precompiled_path(output_file), 'precompiled\0')
+        interpreter.exec_commands(10 ** 9)
+        expected = FoldedInterpreter(code, 256, 'precompiled\0')
+        expected.exec_commands(10 ** 9)
+        self.assertEqual(interpreter.code_output, expected.code_output)
+        self.assertEqual(interpreter.code_output, 'precompiled\0')
+
+        debugger = Debugger(VMCController.from_layout(layout), loaded_code, program=program, user_input='a\0')
+        debugger.exec_commands()
+        self.assertTrue(debugger.execution_completed)
+        self.assertEqual(debugger.interpreter.code_output, 'a\0')
+
+    def test_not_precompiled(self):
+        path = os.path.join(self.directory.name, 'program.bf')
+        with open(path, 'w') as f_out:
+            f_out.write('+' * 100)
+        with self.assertRaises(Exception):
+            BrainfuckProgram.load(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from compiler import compile_code, parse_code
+from CommandType import CommandType
+from Debugger import Debugger
+from BrainfuckInterpreter import BrainfuckInterpreter
+
+SOURCE = """2 256 8 3
+            mov r0 5
+            label loop
+            call work
+            sub r0 r0 1
+            jnz r0 loop
+            jmp exit
+            label work
+            add r1 r1 r0
+            ret"""
+
+
+class ProfilerTests(unittest.TestCase):
+
+    def profiled_debugger(self, source):
+        code, source_map = compile_code(source, with_source_map=True)
+        debugger = Debugger(parse_code(source)[0], code, source_map=source_map, profile=True)
+        debugger.exec_commands()
+        return debugger
+
+    def test_profile(self):
+        debugger = self.profiled_debugger(SOURCE)
+        profile = debugger.profile()
+        self.assertEqual(profile.total_steps, debugger.commands_executed)
+        self.assertEqual(sum(profile.line_steps.values()) + profile.dispatch_steps, profile.total_steps)
+        self.assertEqual(sum(profile.type_steps.values()), sum(profile.label_steps.values()))
+        self.assertEqual(profile.label_entries['work'], 5)
+        self.assertEqual(profile.label_entries['loop'], 5)
+        self.assertEqual(set(profile.label_steps), {'start', 'loop', 'work'})
+        self.assertEqual(set(+profile.line_steps), set(range(2, 11)) - {8})
+        self.assertGreater(profile.type_steps[CommandType.call], profile.type_steps[CommandType.mov])
+        report = profile.report()
+        self.assertIn('Basic block dispatch', report)
+        self.assertIn('work', report)
+
+    def test_matches_single_commands(self):
+        code, source_map = compile_code(SOURCE, with_source_map=True)
+        interpreter = BrainfuckInterpreter(code, 256)
+        line_steps = {}
+        while interpreter.instruction_pointer < len(code):
+            asm_line = source_map.lookup(interpreter.instruction_pointer)[1]
+            if interpreter.exec_commands(1)[0] == 0:
+                break
+            line_steps[asm_line] = line_steps.get(asm_line, 0) + 1
+        profile = self.profiled_debugger(SOURCE).profile()
+        self.assertEqual(line_steps.pop(None), profile.dispatch_steps)
+        self.assertEqual(line_steps, dict(+profile.line_steps))
+
+    def test_profile_needs_source_map(self):
+        code = compile_code(SOURCE)
+        with self.assertRaises(Exception):
+            Debugger(parse_code(SOURCE)[0], code, profile=True)
+        with self.assertRaises(Exception):
+            Debugger(parse_code(SOURCE)[0], code).profile()
+
+
+if __name__ == '__main__':
+    unittest.main()
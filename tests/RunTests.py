@@ -0,0 +1,76 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from BrainfuckIO import EOF_ZERO
+from compiler import compile_file
+from run import ENGINES, run_file
+
+
+class RunTests(unittest.TestCase):
+
+    def run_echo(self, path, engine, **options):
+        output = io.BytesIO()
+        stats = run_file(path, engine, io.BytesIO(b'echo\0'), output, **options)
+        return stats, output.getvalue()
+
+    def test_engines(self):
+        for engine in ENGINES:
+            stats, output = self.run_echo('examples/echo.asm', engine)
+            self.assertIsNone(stats.error)
+            self.assertEqual(output, b'echo\0')
+            self.assertGreater(stats.steps, 0)
+        stats, output = self.run_echo('examples/echo.bf', 'simple')
+        self.assertEqual(output, b'echo\0')
+        self.assertGreater(stats.tape_cells, 0)
+        self.assertGreater(stats.tape_size, 0)
+        self.assertIn('Steps per second', stats.report())
+
+    def test_precompiled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output_file = os.path.join(directory, 'echo.bf')
+            compile_file('examples/echo.asm', output_file, write_precompiled=True)
+            for engine in ('folded', 'simple', 'codegen'):
+                stats, output = self.run_echo(os.path.join(directory, 'echo.bfc'), engine)
+                self.assertEqual(output, b'echo\0')
+                self.assertEqual(stats.steps, self.run_echo(output_file, engine)[0].steps)
+
+    def test_limits(self):
+        for engine in ENGINES:
+            stats, output = self.run_echo('examples/fib.asm', engine, max_steps=1000)
+            self.assertEqual(str(stats.error), "Step limit exceeded")
+            if engine == 'codegen':
+                self.assertGreaterEqual(stats.steps, 1000)
+            else:
+                self.assertEqual(stats.steps, 1000)
+        stats, output = self.run_echo('examples/fib.bf', 'simple', time_limit=0.05)
+        self.assertEqual(str(stats.error), "Time limit exceeded")
+        with self.assertRaises(Exception):
+            self.run_echo('examples/fib.bf', 'codegen', time_limit=1)
+        with self.assertRaises(Exception):
+            self.run_echo('examples/echo.bf', 'asm')
+
+    def test_eof_policy(self):
+        output = io.BytesIO()
+        stats = run_file('examples/echo.asm', 'folded', io.BytesIO(b'ab'), output, eof_policy=EOF_ZERO)
+        self.assertIsNone(stats.error)
+        self.assertEqual(output.getvalue(), b'ab\0')
+        stats = run_file('examples/echo.asm', 'folded', io.BytesIO(b'ab'), io.BytesIO())
+        self.assertIsInstance(stats.error, EOFError)
+
+    def test_command_line(self):
+        result = subprocess.run([sys.executable, 'run.py', 'examples/echo.bf', '--stats'], input=b'hi\0',
+                                capture_output=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, b'hi\0')
+        self.assertIn(b'Peak tape size', result.stderr)
+        result = subprocess.run([sys.executable, 'run.py', 'examples/fib.asm', '--max-steps', '100'],
+                                capture_output=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(b'Step limit exceeded', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from compiler import compile_code, compile_file, parse_code
+from CommandType import CommandType
+from Debugger import Debugger
+from SourceMap import SourceMap, source_map_path
+
+SOURCE = """2 256 8 2 True
+            # store values and read them back
+            store 3 7
+
+            call double  # r0 = 14
+            jmp exit
+            label double
+            load r0 3
+            add r0 r0 r0
+            ret"""
+
+
+class SourceMapTests(unittest.TestCase):
+
+    def test_line_numbers(self):
+        commands = parse_code(SOURCE)[1]
+        self.assertEqual([command.line_number for command in commands], [3, 5, 6, 7, 8, 9, 10])
+
+    def test_entries(self):
+        code, source_map = compile_code(SOURCE, with_source_map=True)
+        self.assertEqual(code, compile_code(SOURCE))
+        self.assertEqual(source_map.bf_offsets, sorted(source_map.bf_offsets))
+        self.assertEqual(source_map.bf_offsets[0], 0)
+        self.assertEqual(source_map.lookup(0)[1:4], (None, None, None))
+        commands = [entry for entry in zip(source_map.asm_lines, source_map.basic_blocks, source_map.command_types)
+                    if entry[0] is not None]
+        self.assertEqual(commands, [(3, 0, CommandType.store), (5, 0, CommandType.call), (6, 1, CommandType.jmp),
+                                    (7, 2, CommandType.label), (8, 3, CommandType.load), (9, 3, CommandType.add),
+                                    (10, 3, CommandType.ret)])
+        add_idx = source_map.command_types.index(CommandType.add)
+        add_offset = source_map.bf_offsets[add_idx]
+        next_offset = source_map.bf_offsets[add_idx + 1]
+        self.assertEqual(source_map.lookup(add_offset)[1], 9)
+        self.assertEqual(source_map.lookup(next_offset - 1)[1], 9)
+        self.assertEqual(source_map.find(-1), -1)
+
+    def test_cur_offset(self):
+        code, source_map = compile_code(SOURCE, with_source_map=True)
+        controller = parse_code(SOURCE)[0]
+        debugger = Debugger(controller, code)
+        boundaries = {}
+        for entry_idx, bf_offset in enumerate(source_map.bf_offsets):
+            boundaries[bf_offset] = source_map.cur_offsets[entry_idx]
+        checked = 0
+        while not debugger.execution_completed:
+            instruction_pointer = debugger.interpreter.instruction_pointer
+            if instruction_pointer in boundaries:
+                self.assertEqual(debugger.interpreter.data_pointer,
+                                 debugger.vmc_idx * controller.vmc_size + boundaries[instruction_pointer])
+                checked += 1
+            debugger.exec_commands(1)
+        self.assertGreater(checked, 8)
+
+    def test_sidecar_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source_file = os.path.join(directory, 'program.asm')
+            output_file = os.path.join(directory, 'program.bf')
+            with open(source_file, 'w') as f:
+                f.write(SOURCE)
+            compile_file(source_file, output_file, write_source_map=True)
+            loaded = SourceMap.load(source_map_path(output_file))
+        source_map = compile_code(SOURCE, with_source_map=True)[1]
+        self.assertEqual([loaded.entry(k) for k in range(len(loaded))],
+                         [source_map.entry(k) for k in range(len(source_map))])
+        self.assertEqual(loaded.vmc_move_offsets, source_map.vmc_move_offsets)
+        self.assertEqual(loaded.vmc_move_amounts, source_map.vmc_move_amounts)
+        self.assertGreater(len(loaded.vmc_move_offsets), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from compiler import compile_code
+from Debugger import Debugger
+from VMCController import VMCController
+from BrainfuckInterpreter import BrainfuckInterpreter
+from FoldedInterpreter import FoldedInterpreter
+from CodegenInterpreter import CodegenInterpreter
+from array import array
+from Tape import PagedTape, PAGE_SIZE, new_tape, grow_tape
+
+
+class TapeTests(unittest.TestCase):
+
+    def test_tape_types(self):
+        self.assertIsInstance(new_tape(256), bytearray)
+        self.assertIsInstance(new_tape(100), bytearray)
+        self.assertEqual(new_tape(65536).typecode, 'H')
+        self.assertEqual(new_tape(65537).itemsize, 4)
+        self.assertEqual(new_tape(2 ** 64).itemsize, 8)
+        self.assertIsInstance(new_tape(2 ** 64 + 1), list)
+        for cell_range in (256, 65536, 2 ** 64, 2 ** 70):
+            tape = new_tape(cell_range)
+            grow_tape(tape, 5)
+            self.assertEqual(list(tape), [0] * 5)
+
+    def test_wraparound_in_typed_tapes(self):
+        code = '->+>-' + '-' * 20 + '[+]>,'
+        for cell_range in (256, 65536, 2 ** 32, 2 ** 64, 2 ** 70):
+            for interpreter_class in (BrainfuckInterpreter, FoldedInterpreter, CodegenInterpreter):
+                interpreter = interpreter_class(code, cell_range, 'a')
+                interpreter.exec_commands(10 ** 9)
+                self.assertEqual(list(interpreter.memory[:4]), [cell_range - 1, 1, 0, 97])
+                if cell_range <= 2 ** 64:
+                    self.assertIsInstance(interpreter.memory, (bytearray, array))
+
+    def test_paged_tape_allocation(self):
+        tape = PagedTape(256, 10 * PAGE_SIZE)
+        self.assertEqual(tape[5 * PAGE_SIZE + 3], 0)
+        tape[5 * PAGE_SIZE + 3] = 0
+        self.assertEqual(tape.allocated_cells(), 0)
+        tape[5 * PAGE_SIZE + 3] = 7
+        self.assertEqual(tape[5 * PAGE_SIZE + 3], 7)
+        self.assertEqual(tape.allocated_cells(), PAGE_SIZE)
+        self.assertEqual(tape[5 * PAGE_SIZE + 2: 5 * PAGE_SIZE + 5], [0, 7, 0])
+
+    def test_paged_tape_copy_on_write(self):
+        tape = PagedTape(256, PAGE_SIZE * 2)
+        tape[1] = 1
+        tape[PAGE_SIZE] = 2
+        copied = tape.copy()
+        copied[1] = 3
+        tape[PAGE_SIZE] = 4
+        self.assertEqual((tape[1], tape[PAGE_SIZE]), (1, 4))
+        self.assertEqual((copied[1], copied[PAGE_SIZE]), (3, 2))
+        self.assertIsNot(tape.pages[0], copied.pages[0])
+        self.assertIsNot(tape.pages[1], copied.pages[1])
+
+    def test_engines_with_paged_memory(self):
+        code = '+' * 300 + '[->+>>>+<<<<]>>>>' + '>' * PAGE_SIZE * 3 + '+' * 1000 + '.[>+<-]>>,'
+        for cell_range in (256, 1000):
+            expected = BrainfuckInterpreter(code, cell_range, 'x')
+            expected.exec_commands(10 ** 9)
+            for interpreter_class in (BrainfuckInterpreter, FoldedInterpreter, CodegenInterpreter):
+                interpreter = interpreter_class(code, cell_range, 'x', paged_memory=True)
+                interpreter.exec_commands(10 ** 9)
+                self.assertIsInstance(interpreter.memory, PagedTape)
+                self.assertEqual(interpreter.memory[:len(expected.memory)], list(expected.memory))
+                self.assertEqual(interpreter.code_output, expected.code_output)
+                self.assertEqual(interpreter.memory.allocated_cells(), 2 * PAGE_SIZE)
+
+    def test_high_heap_address(self):
+        code = compile_code("""2 256 8 2
+                               store 2000 1234
+                               load r0 2000""")
+        controller = VMCController(2, 256, 8, 2)
+        debugger = Debugger(controller, code, paged_memory=True)
+        debugger.exec_commands(10 ** 9)
+        self.assertTrue(debugger.execution_completed)
+        self.assertEqual(debugger.get_memory(2000), 1234)
+        allocated_cells = debugger.interpreter.memory.allocated_cells()
+        self.assertEqual(debugger.get_memory(10 ** 6), 0)
+        self.assertEqual(debugger.interpreter.memory.allocated_cells(), allocated_cells)
+        self.assertLess(allocated_cells, 2001 * controller.vmc_size + PAGE_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import io
+import os
+import tempfile
+import unittest
+from compiler import compile_code
+from BrainfuckIO import EOF_ZERO
+from FoldedInterpreter import FoldedInterpreter
+from Trace import TraceWriter, TraceReader, TraceReplay, record_trace, RECORD_INPUT, RECORD_TAKEN
+from tests.FoldedInterpreterTests import run_in_chunks
+
+ECHO_CODE = ',[.,]'
+LOOPS_CODE = '++++++++[>++++++++<-]>[<++>-]<[>+<-]>.,[.[-],]'
+
+
+def cells(interpreter, amount=8):
+    return [interpreter.memory[k] if k < len(interpreter.memory) else 0 for k in range(amount)]
+
+
+class TraceTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.trace_path = os.path.join(self.directory.name, 'run.trace')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        with open('examples/echo.asm') as f:
+            code = compile_code(f.read())
+        recorded = record_trace(code, 256, self.trace_path, 'echo\0')
+        replay = TraceReplay(code, self.trace_path)
+        self.assertEqual(replay.user_input, 'echo\0')
+        steps = replay.seek(10 ** 12)
+        self.assertEqual(steps, recorded.get_stats().steps)
+        self.assertEqual(replay.interpreter.code_output, recorded.code_output)
+        self.assertIsNone(replay.verify())
+
+    def test_seek(self):
+        code = LOOPS_CODE
+        record_trace(code, 256, self.trace_path, 'ab', eof_policy=EOF_ZERO)
+        replay = TraceReplay(code, self.trace_path, checkpoint_interval=7)
+        for step in [40, 3, 100, 41, 0, 500, 12]:
+            expected = FoldedInterpreter(code, 256, 'ab', eof_policy=EOF_ZERO)
+            expected_steps = expected.exec_commands(step)[0]
+            self.assertEqual(replay.seek(step), expected_steps)
+            self.assertEqual(replay.interpreter.data_pointer, expected.data_pointer)
+            self.assertEqual(cells(replay.interpreter), cells(expected))
+            self.assertEqual(replay.interpreter.code_output, expected.code_output)
+        self.assertGreater(len(replay.checkpoints), 3)
+
+    def test_compact(self):
+        code = '+' * 200 + '[>+++<-]>[-]' + '-' * 50 + '[-]'
+        record_trace(code, 256, self.trace_path)
+        self.assertLess(os.path.getsize(self.trace_path), 60)
+        with open(self.trace_path, 'rb') as f_trace:
+            reader = TraceReader(f_trace)
+            self.assertEqual(reader.cell_range, 256)
+            records = list(reader.records())
+        self.assertIn((RECORD_TAKEN, 200), records)
+        self.assertIn((RECORD_TAKEN, 206), records)
+
+    def test_same_trace_for_any_chunks(self):
+        traces = []
+        for chunk_sizes in [[10 ** 9], [1], [3, 17, 2]]:
+            stream = io.BytesIO()
+            tracer = TraceWriter(stream, LOOPS_CODE, 256, EOF_ZERO)
+            interpreter = FoldedInterpreter(LOOPS_CODE, 256, 'xyz', tracer=tracer, eof_policy=EOF_ZERO)
+            run_in_chunks(interpreter, chunk_sizes)
+            tracer.flush()
+            traces.append(stream.getvalue())
+        self.assertEqual(traces[0], traces[1])
+        self.assertEqual(traces[0], traces[2])
+
+    def test_input_records(self):
+        record_trace(ECHO_CODE, 256, self.trace_path, 'hi', eof_policy=EOF_ZERO)
+        with open(self.trace_path, 'rb') as f_trace:
+            inputs = [count for kind, count in TraceReader(f_trace).records() if kind == RECORD_INPUT]
+        self.assertEqual(inputs, [ord('h') + 1, ord('i') + 1, 0])
+        self.assertEqual(TraceReplay(ECHO_CODE, self.trace_path).seek(10 ** 6), 8)
+
+    def test_divergence(self):
+        record_trace(LOOPS_CODE, 256, self.trace_path, 'ab', eof_policy=EOF_ZERO)
+        replay = TraceReplay(LOOPS_CODE, self.trace_path)
+        replay.user_input = 'a'
+        self.assertIsNotNone(replay.verify())
+        with self.assertRaises(Exception):
+            TraceReplay(LOOPS_CODE + '+', self.trace_path)
+        with self.assertRaises(Exception):
+            FoldedInterpreter(ECHO_CODE, 256, tracer=TraceWriter(io.BytesIO(), ECHO_CODE, 256)).restore(None)
+
+
+if __name__ == '__main__':
+    unittest.main()